@@ -0,0 +1,160 @@
+# ai_client.py
+# One lazily created OpenAI client shared by the whole process, plus a
+# persistent response cache keyed by a hash of the model and prompt.
+# Prompts here are deterministic functions of a few product fields, so
+# identical inputs can skip the LLM round trip entirely.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Dict
+
+from config import OPENAI_API_KEY_ENV, AI_CACHE_PATH, AI_CACHE_MAX_ENTRIES, AI_CACHE_MAX_BYTES
+
+
+_client = None
+_client_key: Optional[str] = None
+_client_lock = threading.Lock()
+
+
+def get_ai_client():
+    """Return the shared OpenAI client, or None if no key is set or openai is missing."""
+    global _client, _client_key
+    key = os.getenv(OPENAI_API_KEY_ENV)
+    if not key:
+        return None
+    with _client_lock:
+        if _client is None or _client_key != key:
+            try:
+                from openai import OpenAI
+                _client = OpenAI(api_key=key)
+                _client_key = key
+            except Exception:
+                return None
+        return _client
+
+
+def cache_key(model: str, prompt: Any) -> str:
+    """Content address for a request: sha256 over the model name and prompt input."""
+    blob = json.dumps([model, prompt], sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key         TEXT PRIMARY KEY,
+    text        TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    last_access REAL NOT NULL
+)
+"""
+
+
+class ResponseCache:
+    """SQLite store of response text with LRU eviction by entry count and total size."""
+
+    def __init__(self, path: str, max_entries: int, max_bytes: int):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_SCHEMA)
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_access)")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT text FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, text: str):
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, text, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, text, size, time.time()),
+            )
+            self._evict_locked()
+
+    def _evict_locked(self):
+        count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_access ASC"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            count, total = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"entries": count, "bytes": total, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache, or None if disabled or unavailable."""
+    global _cache
+    if not AI_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = ResponseCache(AI_CACHE_PATH, AI_CACHE_MAX_ENTRIES, AI_CACHE_MAX_BYTES)
+            except Exception:
+                return None
+        return _cache
+
+
+def cached_response_text(model: str, prompt: Any) -> Optional[str]:
+    cache = get_response_cache()
+    return cache.get(cache_key(model, prompt)) if cache is not None else None
+
+
+def store_response_text(model: str, prompt: Any, text: str):
+    cache = get_response_cache()
+    if cache is not None and text:
+        cache.put(cache_key(model, prompt), text)
+
+
+def create_response_text(model: str, prompt: Any) -> Optional[str]:
+    """responses.create(...).output_text through the cache; None if no client or on error."""
+    text = cached_response_text(model, prompt)
+    if text is not None:
+        return text
+    client = get_ai_client()
+    if client is None:
+        return None
+    try:
+        resp = client.responses.create(model=model, input=prompt)
+        text = (resp.output_text or "").strip()
+    except Exception:
+        return None
+    if text:
+        store_response_text(model, prompt, text)
+    return text or None
@@ -0,0 +1,189 @@
+# barcode_tracker.py
+# Follow decoded barcodes across frames and only hand a code to the lookup
+# once it is trustworthy: GS1 check digit valid, and either read cleanly on
+# a sharp frame or agreed on by several frames. UPC-E, UPC-A and EAN-13
+# reads of the same product are folded onto one canonical key.
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from config import (
+    TRACKER_CONFIRM_VOTES,
+    TRACKER_MAX_MISSES,
+    TRACKER_MATCH_IOU,
+)
+
+
+def gs1_check_digit_ok(digits: str) -> bool:
+    """GS1 mod-10 check: weights 3,1,3,... from the digit left of the check digit."""
+    if len(digits) < 2 or not digits.isdigit():
+        return False
+    total = 0
+    for i, ch in enumerate(reversed(digits[:-1])):
+        total += int(ch) * (3 if i % 2 == 0 else 1)
+    return (10 - total % 10) % 10 == int(digits[-1])
+
+
+def expand_upce(code: str) -> Optional[str]:
+    """8-digit UPC-E (number system, 6 digits, check) -> 12-digit UPC-A."""
+    if len(code) != 8 or not code.isdigit() or code[0] not in "01":
+        return None
+    ns, d, check = code[0], code[1:7], code[7]
+    last = d[5]
+    if last in "012":
+        body = d[0:2] + last + "0000" + d[2:5]
+    elif last == "3":
+        body = d[0:3] + "00000" + d[3:5]
+    elif last == "4":
+        body = d[0:4] + "00000" + d[4]
+    else:
+        body = d[0:5] + "0000" + last
+    return ns + body + check
+
+
+def canonical_code(data: Optional[str], symbology: str = "") -> Optional[str]:
+    """
+    Canonical lookup key for a retail barcode, or None if it isn't a valid
+    EAN/UPC read. UPC-E and UPC-A become their 13-digit EAN form; EAN-8
+    stays 8 digits because it has its own number space.
+    """
+    code = (data or "").strip()
+    if not code.isdigit():
+        return None
+    if len(code) == 8:
+        if symbology == "UPCE" or (symbology != "EAN8" and not gs1_check_digit_ok(code)):
+            upca = expand_upce(code)
+            return "0" + upca if upca and gs1_check_digit_ok(upca) else None
+        return code if gs1_check_digit_ok(code) else None
+    if len(code) == 12:
+        return "0" + code if gs1_check_digit_ok(code) else None
+    if len(code) == 13:
+        return code if gs1_check_digit_ok(code) else None
+    if len(code) == 14 and code.startswith("0"):
+        return code[1:] if gs1_check_digit_ok(code) else None
+    return None
+
+
+def _iou(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+@dataclass
+class _Track:
+    rect: Tuple[int, int, int, int]
+    votes: Dict[str, int] = field(default_factory=dict)
+    rejected: int = 0       # reads on this track that failed validation
+    frames: int = 0
+    misses: int = 0
+
+    def leader(self) -> Tuple[Optional[str], int, int]:
+        """(key, its votes, votes for every other key)."""
+        if not self.votes:
+            return None, 0, 0
+        key = max(self.votes, key=self.votes.get)
+        lead = self.votes[key]
+        return key, lead, sum(self.votes.values()) - lead
+
+
+class BarcodeTracker:
+    """
+    One per scan session. Feed every BarcodeFrameAnalysis to update(); it
+    returns the canonical code once one is confirmed.
+
+    A code confirms on its first frame when the read is valid, the frame is
+    sharp, and it is the only code in view. Otherwise it needs
+    TRACKER_CONFIRM_VOTES more agreeing frames than all conflicting reads
+    at that position combined. Invalid reads never confirm.
+    """
+
+    def __init__(self, confirm_votes: int = TRACKER_CONFIRM_VOTES,
+                 max_misses: int = TRACKER_MAX_MISSES, match_iou: float = TRACKER_MATCH_IOU):
+        self.confirm_votes = max(1, int(confirm_votes))
+        self.max_misses = max_misses
+        self.match_iou = match_iou
+        self.tracks: List[_Track] = []
+        self.confirmed: Optional[str] = None
+        self.confirmed_at: Optional[float] = None
+        self.rejected_reads = 0
+
+    def reset(self):
+        self.tracks = []
+        self.confirmed = None
+        self.confirmed_at = None
+
+    def _match(self, rect, key: Optional[str], claimed) -> Optional[_Track]:
+        free = [t for t in self.tracks if id(t) not in claimed]
+        # The same valid code is the same track even after a jump in position
+        if key is not None:
+            for t in free:
+                if key in t.votes:
+                    return t
+        best, best_iou = None, self.match_iou
+        for t in free:
+            iou = _iou(t.rect, rect)
+            if iou >= best_iou:
+                best, best_iou = t, iou
+        return best
+
+    def update(self, analysis) -> Optional[str]:
+        if self.confirmed is not None:
+            return self.confirmed
+
+        claimed = set()
+        for sym in getattr(analysis, "codes", None) or []:
+            if sym.data is None:
+                continue
+            key = canonical_code(sym.data, sym.symbology)
+            track = self._match(sym.rect, key, claimed)
+            if track is None:
+                track = _Track(rect=sym.rect)
+                self.tracks.append(track)
+            claimed.add(id(track))
+            track.rect = sym.rect
+            track.frames += 1
+            track.misses = 0
+            if key is None:
+                track.rejected += 1
+                self.rejected_reads += 1
+            else:
+                track.votes[key] = track.votes.get(key, 0) + 1
+
+        for t in self.tracks:
+            if id(t) not in claimed:
+                t.misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        sharp = analysis.sharp
+        alone = len(claimed) == 1
+        best, best_margin = None, 0
+        for t in self.tracks:
+            if id(t) not in claimed:
+                continue
+            key, lead, others = t.leader()
+            if key is None:
+                continue
+            clean = t.frames == 1 and lead == 1 and t.rejected == 0 and sharp and alone
+            margin = lead - others - t.rejected
+            if (clean or margin >= self.confirm_votes) and margin > best_margin:
+                best, best_margin = key, margin
+
+        if best is not None:
+            self.confirmed = best
+            self.confirmed_at = time.monotonic()
+        return self.confirmed
+
+    def candidate(self) -> Optional[str]:
+        """Best unconfirmed key so far, e.g. for logging; never use it for lookups."""
+        best, best_margin = None, 0
+        for t in self.tracks:
+            key, lead, others = t.leader()
+            if key is not None and lead - others > best_margin:
+                best, best_margin = key, lead - others
+        return best
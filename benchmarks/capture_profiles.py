@@ -0,0 +1,52 @@
+# benchmarks/capture_profiles.py
+# Measure what the camera really delivers in each capture profile: the
+# negotiated format, effective fps, and how long a profile switch takes
+# until the first frame in the new mode. Run from the repo root:
+#
+#   python -m benchmarks.capture_profiles [--seconds 3] [--switches 10]
+
+import argparse
+import time
+
+from camera_scanner import BarcodeScanner
+from config import CAMERA_INDEX, FRAME_WIDTH, FRAME_HEIGHT, CAPTURE_PROFILES
+
+
+def drain(scanner, seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        scanner.read_latest(timeout=0.5)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark camera capture profiles.")
+    ap.add_argument("--seconds", type=float, default=3.0, help="capture time per profile")
+    ap.add_argument("--switches", type=int, default=10, help="profile switches to time")
+    args = ap.parse_args(argv)
+
+    names = list(CAPTURE_PROFILES)
+    scanner = BarcodeScanner(CAMERA_INDEX, FRAME_WIDTH, FRAME_HEIGHT, threaded=True, profile=names[0])
+    try:
+        print(f"{'profile':<10}{'format':<24}{'fps':>8}")
+        for name in names:
+            scanner.set_profile(name)
+            drain(scanner, args.seconds)
+            w, h, fps, fourcc = scanner.capture_format
+            print(f"{name:<10}{f'{w}x{h}@{fps:g} {fourcc}':<24}{scanner.effective_fps:>8.1f}")
+
+        scanner.switch_latencies.clear()
+        for i in range(args.switches):
+            scanner.set_profile(names[(i + 1) % len(names)])
+            drain(scanner, 0.5)
+        lat = sorted(1000.0 * x for x in scanner.switch_latencies)
+        if lat:
+            print(f"switch latency over {len(lat)} switches: "
+                  f"median {lat[len(lat) // 2]:.0f} ms, max {lat[-1]:.0f} ms")
+        else:
+            print("no profile switches completed")
+    finally:
+        scanner.release()
+
+
+if __name__ == "__main__":
+    main()
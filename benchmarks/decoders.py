@@ -0,0 +1,73 @@
+# benchmarks/decoders.py
+# Run every available decoder backend over a folder of sample frames and
+# report decode rate and time per frame. Run from the repo root:
+#
+#   python -m benchmarks.decoders path/to/frames [--repeat 3]
+#
+# If a file name starts with the expected barcode digits (e.g.
+# "4006381333931_blur2.png"), wrong reads are counted as well.
+
+import argparse
+import glob
+import os
+import re
+import time
+
+import cv2
+
+from decoders import available_backends, make_decoder
+from config import DECODER_CASCADE
+
+
+def load_gray_frames(folder):
+    frames = []
+    for path in sorted(glob.glob(os.path.join(folder, "*"))):
+        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            continue
+        m = re.match(r"(\d{8,14})", os.path.basename(path))
+        frames.append((img, m.group(1) if m else None))
+    return frames
+
+
+def bench(decoder, frames, repeat):
+    read = wrong = 0
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for img, expected in frames:
+            codes = [c for c in decoder.decode(img) if c.data]
+            if not codes:
+                continue
+            read += 1
+            if expected and codes[0].data.lstrip("0") != expected.lstrip("0"):
+                wrong += 1
+    elapsed = time.perf_counter() - t0
+    n = len(frames) * repeat
+    return read / n, wrong / n, 1000.0 * elapsed / n
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compare barcode decoder backends.")
+    ap.add_argument("folder", help="folder of sample frames")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    frames = load_gray_frames(args.folder)
+    if not frames:
+        raise SystemExit(f"No readable images in {args.folder}")
+
+    names = available_backends()
+    decoders = [(n, make_decoder(n)) for n in names]
+    cascade = [n for n in DECODER_CASCADE if n in names]
+    if len(cascade) > 1:
+        decoders.append(("cascade:" + ">".join(cascade), make_decoder("cascade")))
+
+    print(f"{len(frames)} frames x {args.repeat}")
+    print(f"{'backend':<26}{'decoded':>9}{'wrong':>8}{'ms/frame':>10}")
+    for name, dec in decoders:
+        rate, wrong, ms = bench(dec, frames, args.repeat)
+        print(f"{name:<26}{rate:>8.1%}{wrong:>8.1%}{ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/frame_memory.py
+# Steady-state memory allocated per analysed frame, before and after the
+# buffer-reusing FrameAnalyzer. Run from the repo root:
+#
+#   python -m benchmarks.frame_memory [--frames DIR] [-n 200]
+
+import argparse
+import glob
+import os
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from camera_scanner import FrameAnalyzer, _build_analysis, _decode_region
+from decoders import make_decoder
+from config import FRAME_WIDTH, FRAME_HEIGHT
+
+
+_decoder = make_decoder()
+
+
+def legacy_analyze_frame(frame):
+    """The original analyze_frame: new gray image and CV_64F Laplacian every call."""
+    h, w = frame.shape[:2]
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    blur_score = cv2.Laplacian(gray, cv2.CV_64F).var()
+    return _build_analysis(w, h, blur_score, _decode_region(_decoder, gray))
+
+
+def load_frames(folder):
+    if not folder:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 256, (FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8) for _ in range(4)]
+    frames = []
+    for path in sorted(glob.glob(os.path.join(folder, "*"))):
+        img = cv2.imread(path, cv2.IMREAD_COLOR)
+        if img is not None:
+            frames.append(img)
+    if not frames:
+        raise SystemExit(f"No readable images in {folder}")
+    return frames
+
+
+def measure(analyze, frames, n, warmup=10):
+    """Return (mean transient peak bytes per frame, net bytes retained, ms per frame)."""
+    for i in range(warmup):
+        analyze(frames[i % len(frames)])
+
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    peaks = []
+    t0 = time.perf_counter()
+    for i in range(n):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        analyze(frames[i % len(frames)])
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+    elapsed = time.perf_counter() - t0
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return sum(peaks) / len(peaks), end - base, 1000.0 * elapsed / n
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Per-frame allocation benchmark for analyze_frame.")
+    ap.add_argument("--frames", help="folder of sample frames (default: synthetic noise)")
+    ap.add_argument("-n", type=int, default=200, help="frames to analyse per variant")
+    args = ap.parse_args(argv)
+
+    frames = load_frames(args.frames)
+    variants = [
+        ("legacy analyze_frame", legacy_analyze_frame),
+        ("FrameAnalyzer", FrameAnalyzer().analyze),
+    ]
+    print(f"{'variant':<24}{'alloc/frame':>14}{'retained':>12}{'ms/frame':>10}")
+    for name, fn in variants:
+        per_frame, retained, ms = measure(fn, frames, args.n)
+        print(f"{name:<24}{per_frame / 1024:>11.1f} KB{retained / 1024:>9.1f} KB{ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
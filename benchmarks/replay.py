@@ -0,0 +1,271 @@
+# benchmarks/replay.py
+# Replay recorded scan sequences through the vision pipeline the way
+# run_scan_session drives it (FrameAnalyzer -> BarcodeTracker -> guidance)
+# and write machine-readable results, so commits can be compared without
+# standing in a store. Run from the repo root:
+#
+#   python -m benchmarks.replay                      # synthetic corpus
+#   python -m benchmarks.replay path/to/corpus --out after.json --baseline before.json
+#   python -m benchmarks.replay --compare            # FrameAnalyzer vs stateless analyze_frame
+#
+# A path may be a corpus with manifest.json (see synth_barcodes.py), a
+# folder of image folders / videos, or a single folder or video. Names
+# starting with the expected digits ("4006381333931_aisle3.mp4") are checked.
+
+import argparse
+import copy
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from barcode_tracker import BarcodeTracker, canonical_code
+from camera_scanner import FrameAnalyzer, analyze_frame
+from decoders import make_decoder
+from frame_scheduler import FrameScheduler
+from frame_sources import FileFrameSource, IMAGE_EXTENSIONS
+from guidance import guidance_message
+from config import DECODER_BACKEND
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    v = sorted(values)
+    return v[min(len(v) - 1, int(round(q * (len(v) - 1))))]
+
+
+def _expected_from_name(path: str) -> Optional[str]:
+    m = re.match(r"(\d{8,14})", os.path.basename(os.path.normpath(path)))
+    return m.group(1) if m else None
+
+
+def discover_cases(path: str) -> List[Dict]:
+    manifest = os.path.join(path, "manifest.json")
+    if os.path.isfile(manifest):
+        with open(manifest) as f:
+            return [{"case": c["case"], "path": os.path.join(path, c["case"]), "expected": c.get("expected")}
+                    for c in json.load(f)["cases"]]
+    if os.path.isfile(path) or any(p.lower().endswith(IMAGE_EXTENSIONS) for p in os.listdir(path)):
+        return [{"case": os.path.basename(os.path.normpath(path)), "path": path,
+                 "expected": _expected_from_name(path)}]
+    return [{"case": name, "path": os.path.join(path, name), "expected": _expected_from_name(name)}
+            for name in sorted(os.listdir(path)) if not name.startswith(".")]
+
+
+def replay_case(case: Dict, args) -> Dict:
+    source = FileFrameSource(case["path"], fps=args.fps, realtime=args.realtime)
+    decoder = make_decoder(args.decoder)
+    analyzer = None if args.stateless else FrameAnalyzer(decoder=decoder)
+    tracker = BarcodeTracker()
+    scheduler = FrameScheduler() if args.scheduler else None
+    expected = canonical_code(case.get("expected")) if case.get("expected") else None
+
+    latencies: List[float] = []
+    guidance: List[str] = []
+    frames = decoded_frames = skipped = 0
+    first_decode = first_confirm = None
+    confirmed = None
+    start = time.perf_counter()
+
+    while True:
+        captured = source.read_latest(timeout=1.0)
+        if captured is None:
+            break
+        frames += 1
+        t0 = time.perf_counter()
+        if scheduler is not None and not scheduler.assess(captured.frame).decode:
+            skipped += 1
+            latencies.append(time.perf_counter() - t0)
+            continue
+        if analyzer is not None:
+            analysis = analyzer.analyze(captured.frame)
+        else:
+            analysis = analyze_frame(captured.frame, decoder)
+        if scheduler is not None:
+            scheduler.note_result(analysis)
+        msg = guidance_message(analysis, args.distance_cm)
+        result = tracker.update(analysis)
+        latencies.append(time.perf_counter() - t0)
+
+        if not guidance or guidance[-1] != msg:
+            guidance.append(msg)
+        elapsed = time.perf_counter() - start
+        if analysis.decoded:
+            decoded_frames += 1
+            if first_decode is None:
+                first_decode = {"frame": frames - 1, "s": elapsed}
+        if result and confirmed is None:
+            confirmed = result
+            first_confirm = {"frame": frames - 1, "s": elapsed}
+
+    source.release()
+    ms = [1000.0 * x for x in latencies]
+    return {
+        "case": case["case"],
+        "expected": expected,
+        "confirmed": confirmed,
+        "correct": None if expected is None else confirmed == expected,
+        "frames": frames,
+        "frames_dropped": source.frames_dropped,
+        "frames_skipped": skipped,
+        "decode_rate": decoded_frames / frames if frames else 0.0,
+        "first_decode": first_decode,
+        "first_confirm": first_confirm,
+        "rejected_reads": tracker.rejected_reads,
+        "latency_ms": {
+            "mean": sum(ms) / len(ms) if ms else None,
+            "p50": _percentile(ms, 0.50),
+            "p95": _percentile(ms, 0.95),
+            "p99": _percentile(ms, 0.99),
+            "max": max(ms) if ms else None,
+        },
+        "guidance": guidance,
+    }
+
+
+def summarize(results: List[Dict]) -> Dict:
+    checked = [r for r in results if r["correct"] is not None]
+    confirm_s = [r["first_confirm"]["s"] for r in results if r["first_confirm"]]
+    confirm_frames = [r["first_confirm"]["frame"] for r in results if r["first_confirm"]]
+    all_p50 = [r["latency_ms"]["p50"] for r in results if r["latency_ms"]["p50"] is not None]
+    all_p95 = [r["latency_ms"]["p95"] for r in results if r["latency_ms"]["p95"] is not None]
+    return {
+        "cases": len(results),
+        "success_rate": sum(r["correct"] for r in checked) / len(checked) if checked else None,
+        "wrong_confirms": sum(1 for r in checked if r["confirmed"] and not r["correct"]),
+        "confirm_s_median": _percentile(confirm_s, 0.5),
+        "confirm_frame_median": _percentile(confirm_frames, 0.5),
+        "latency_p50_ms_median": _percentile(all_p50, 0.5),
+        "latency_p95_ms_max": max(all_p95) if all_p95 else None,
+        # Linux reports ru_maxrss in KiB
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    }
+
+
+def compare_modes(cases: List[Dict], args) -> Dict:
+    """
+    Replay every case with the tracking FrameAnalyzer and with stateless
+    analyze_frame, interleaved so machine noise hits both alike.
+    """
+    tracking_args = copy.copy(args)
+    tracking_args.stateless = False
+    stateless_args = copy.copy(args)
+    stateless_args.stateless = True
+    rows = []
+    for case in cases:
+        t = replay_case(case, tracking_args)
+        s = replay_case(case, stateless_args)
+        rows.append({"case": case["case"], "tracking": t["latency_ms"], "stateless": s["latency_ms"],
+                     "tracking_correct": t["correct"], "stateless_correct": s["correct"]})
+
+    def ratio(key):
+        vals = [r["stateless"][key] / r["tracking"][key] for r in rows
+                if r["tracking"][key] and r["stateless"][key]]
+        return _percentile(vals, 0.5)
+
+    return {
+        "cases": rows,
+        "speedup_p50_median": ratio("p50"),
+        "speedup_p95_median": ratio("p95"),
+        "speedup_mean_median": ratio("mean"),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(summary: Dict, baseline_path: str):
+    with open(baseline_path) as f:
+        base = json.load(f)["summary"]
+    print(f"\n{'metric':<26}{'baseline':>12}{'current':>12}")
+    for key, cur in summary.items():
+        old = base.get(key)
+        fmt = lambda v: "-" if v is None else f"{v:.3f}" if isinstance(v, float) else str(v)
+        print(f"{key:<26}{fmt(old):>12}{fmt(cur):>12}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Replay recorded frames through the scan pipeline.")
+    ap.add_argument("path", nargs="?", help="corpus, folder or video; default: synthetic corpus")
+    ap.add_argument("--decoder", default=DECODER_BACKEND)
+    ap.add_argument("--realtime", action="store_true", help="play at --fps and drop frames like a camera")
+    ap.add_argument("--fps", type=float, default=30.0)
+    ap.add_argument("--stateless", action="store_true", help="use analyze_frame instead of FrameAnalyzer")
+    ap.add_argument("--compare", action="store_true",
+                    help="replay with FrameAnalyzer and with analyze_frame and report the speedup")
+    ap.add_argument("--scheduler", action="store_true", help="gate decodes with FrameScheduler")
+    ap.add_argument("--distance-cm", type=float, default=None, help="distance fed to guidance")
+    ap.add_argument("--out", help="write results JSON here")
+    ap.add_argument("--baseline", help="earlier results JSON to compare against")
+    args = ap.parse_args(argv)
+
+    tmp = None
+    path = args.path
+    if path is None:
+        from benchmarks.synth_barcodes import generate
+        tmp = tempfile.TemporaryDirectory(prefix="replay-corpus-")
+        path = tmp.name
+        generate(path)
+
+    try:
+        if args.compare:
+            comparison = compare_modes(discover_cases(path), args)
+        else:
+            results = [replay_case(c, args) for c in discover_cases(path)]
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    if args.compare:
+        print(f"{'case':<22}{'track p50':>10}{'p95':>8}{'stateless p50':>15}{'p95':>8}")
+        for r in comparison["cases"]:
+            t, s = r["tracking"], r["stateless"]
+            print(f"{r['case']:<22}{t['p50']:>10.1f}{t['p95']:>8.1f}{s['p50']:>15.1f}{s['p95']:>8.1f}")
+        print(f"median speedup: p50 x{comparison['speedup_p50_median']:.2f}, "
+              f"p95 x{comparison['speedup_p95_median']:.2f}, mean x{comparison['speedup_mean_median']:.2f}")
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump({"commit": _git_commit(), "timestamp": time.time(),
+                           "options": {k: v for k, v in vars(args).items() if k not in ("out", "baseline")},
+                           "compare": comparison}, f, indent=2)
+        return
+
+    summary = summarize(results)
+    print(f"{'case':<22}{'ok':>5}{'confirm@':>10}{'p50 ms':>9}{'p95 ms':>9}{'decoded':>9}")
+    for r in results:
+        ok = "-" if r["correct"] is None else ("yes" if r["correct"] else "NO")
+        at = f"{r['first_confirm']['frame']}" if r["first_confirm"] else "-"
+        lat = r["latency_ms"]
+        p50 = f"{lat['p50']:.1f}" if lat["p50"] is not None else "-"
+        p95 = f"{lat['p95']:.1f}" if lat["p95"] is not None else "-"
+        print(f"{r['case']:<22}{ok:>5}{at:>10}{p50:>9}{p95:>9}{r['decode_rate']:>9.0%}")
+    print(json.dumps(summary, indent=2))
+
+    if args.out:
+        doc = {
+            "commit": _git_commit(),
+            "timestamp": time.time(),
+            "python": sys.version.split()[0],
+            "options": {k: v for k, v in vars(args).items() if k not in ("out", "baseline")},
+            "summary": summary,
+            "cases": results,
+        }
+        with open(args.out, "w") as f:
+            json.dump(doc, f, indent=2)
+    if args.baseline:
+        compare(summary, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
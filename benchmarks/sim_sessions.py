@@ -0,0 +1,141 @@
+# benchmarks/sim_sessions.py
+# Run complete scan sessions headless on simulated hardware (sim_hardware.py)
+# and report press-to-"Barcode captured." and press-to-result-speech latency.
+# The real main() runs unchanged: a scripted button presses the trigger pin,
+# the ultrasonic sensor follows a distance trace, recorded frames stand in
+# for the camera and a sink logs when each utterance would be heard.
+#
+#   python -m benchmarks.sim_sessions [--frames DIR_OR_VIDEO] [--sessions 10] [--out results.json]
+#
+# By default the product lookup is replaced by a fixture with a fixed delay
+# so runs are repeatable offline; --lookup real uses the network path.
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    v = sorted(values)
+    pick = lambda q: v[min(len(v) - 1, int(round(q * (len(v) - 1))))] if v else None
+    return {"n": len(v), "p50": pick(0.5), "p95": pick(0.95), "max": v[-1] if v else None}
+
+
+def _wait_for(sink, text: str, since: float, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for u in sink.utterances_since(since):
+            if u.text == text:
+                return u
+        time.sleep(0.02)
+    return None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Headless scan sessions on simulated hardware.")
+    ap.add_argument("--frames", help="folder or video used as the camera; default: synthetic sweep")
+    ap.add_argument("--sessions", type=int, default=10)
+    ap.add_argument("--gap-s", type=float, default=1.0, help="idle time between sessions")
+    ap.add_argument("--decoder", help="decoder backend override")
+    ap.add_argument("--lookup", choices=["fixture", "real"], default="fixture")
+    ap.add_argument("--lookup-delay-s", type=float, default=0.3, help="fixture lookup latency")
+    ap.add_argument("--speech-speed", type=float, default=1.0, help=">1 speaks faster than real time")
+    ap.add_argument("--out", help="write results JSON here")
+    args = ap.parse_args(argv)
+
+    # Must happen before anything imports hardware.py or decoders.py
+    os.environ["SCANNER_HARDWARE"] = "sim"
+    tmp = None
+    frames = args.frames
+    if frames is None:
+        from benchmarks.synth_barcodes import generate
+        tmp = tempfile.TemporaryDirectory(prefix="sim-frames-")
+        generate(tmp.name, frames=30)
+        frames = os.path.join(tmp.name, "ean13_sharp")
+    os.environ["SCANNER_SIM_CAMERA"] = frames
+    import config
+    if args.decoder:
+        config.DECODER_BACKEND = args.decoder
+
+    import hardware
+    import main as scanner_main
+    from sim_hardware import SimButton, SimMotor, SimUltrasonic, DistanceTrace
+
+    gpio = hardware.GPIO
+    sink = hardware.speech_sink()
+    sink.speed = args.speech_speed
+    button = SimButton(gpio, config.BUTTON_PIN)
+    motor = SimMotor(gpio, config.VIBRATOR_PIN)
+    # Hand approaches from 70 cm and settles inside the target range
+    trace = DistanceTrace([(0.0, 70.0), (1.5, 35.0), (3.0, 28.0), (60.0, 28.0)], noise_cm=1.0)
+    ultrasonic = SimUltrasonic(gpio, config.US_TRIG_PIN, config.US_ECHO_PIN, trace)
+
+    if args.lookup == "fixture":
+        def fixture_lookup(barcode):
+            time.sleep(args.lookup_delay_s)
+            return {"code": barcode, "name": "Test crackers", "brand": "Sim Foods",
+                    "nutriments": {"energy-kcal_100g": 450, "sugars_100g": 4, "fat_100g": 18},
+                    "estimated": False}
+        scanner_main.lookup_product = fixture_lookup
+
+    runner = threading.Thread(target=scanner_main.main, name="scanner-main", daemon=True)
+    runner.start()
+    if _wait_for(sink, "Scanner ready. Press the trigger to begin.", 0.0, 30.0) is None:
+        raise SystemExit("scanner did not start")
+
+    sessions = []
+    timeout = config.SCAN_TIMEOUT_S + 30.0
+    try:
+        for i in range(args.sessions):
+            time.sleep(args.gap_s)
+            trace.restart()
+            pressed = time.monotonic()
+            button.press(0.08)
+            ready = _wait_for(sink, "Ready.", pressed, timeout)
+            spoken = sink.utterances_since(pressed)
+            captured = next((u for u in spoken if u.text == "Barcode captured."), None)
+            result = None
+            if captured is not None:
+                result = next((u for u in spoken if u.started >= captured.ended
+                               and u.text not in ("Ready.", "Barcode captured.")), None)
+            sessions.append({
+                "session": i,
+                "completed": ready is not None,
+                "captured_s": captured.started - pressed if captured else None,
+                "result_speech_s": result.started - pressed if result else None,
+                "result_text": result.text if result else None,
+                "camera_acquire_s": scanner_main._camera.last_acquire_s,
+                "haptic_pulses": motor.pulses_since(pressed),
+                "utterances": [[round(u.started - pressed, 3), u.text, u.interrupted] for u in spoken],
+            })
+            s = sessions[-1]
+            fmt = lambda v: f"{v * 1000:.0f} ms" if v is not None else "-"
+            print(f"session {i}: captured {fmt(s['captured_s'])}, result speech {fmt(s['result_speech_s'])}",
+                  file=sys.stderr)
+    finally:
+        scanner_main._shutdown.set()
+        runner.join(timeout=5.0)
+        if tmp is not None:
+            tmp.cleanup()
+
+    summary = {
+        "sessions": len(sessions),
+        "captured": sum(1 for s in sessions if s["captured_s"] is not None),
+        "press_to_captured_s": _percentiles([s["captured_s"] for s in sessions if s["captured_s"] is not None]),
+        "press_to_result_speech_s": _percentiles(
+            [s["result_speech_s"] for s in sessions if s["result_speech_s"] is not None]),
+        "ultrasonic_pings": ultrasonic.pings,
+    }
+    print(json.dumps(summary, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"options": vars(args), "summary": summary, "sessions": sessions}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# benchmarks/synth_barcodes.py
+# Render a small synthetic corpus of EAN-13, UPC-A and EAN-8 scan sequences
+# with numpy and OpenCV only, so the replay benchmark runs on any Linux box.
+# Each case is a folder of frames that mimics a sweep: empty shelf, a
+# blurred approach, then the code settling in view; plus a manifest.json.
+# One case adds a large striped graphic beside the code, the kind of packaging
+# art the gradient locator mistakes for a barcode.
+#
+#   python -m benchmarks.synth_barcodes out_dir [--frames 24] [--seed 1]
+
+import argparse
+import json
+import os
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+_L = ["0001101", "0011001", "0010011", "0111101", "0100011",
+      "0110001", "0101111", "0111011", "0110111", "0001011"]
+_G = ["0100111", "0110011", "0011011", "0100001", "0011101",
+      "0111001", "0000101", "0010001", "0001001", "0010111"]
+_R = ["1110010", "1100110", "1101100", "1000010", "1011100",
+      "1001110", "1010000", "1000100", "1001000", "1110100"]
+# Parity of the left half, selected by the first EAN-13 digit
+_PARITY = ["LLLLLL", "LLGLGG", "LLGGLG", "LLGGGL", "LGLLGG",
+           "LGGLLG", "LGGGLL", "LGLGLG", "LGLGGL", "LGGLGL"]
+
+
+def check_digit(body: str) -> str:
+    total = sum(int(c) * (3 if i % 2 == 0 else 1) for i, c in enumerate(reversed(body)))
+    return str((10 - total % 10) % 10)
+
+
+def ean_modules(code: str) -> str:
+    """Bar/space module string ("1" = bar) for an EAN-13, UPC-A or EAN-8 code."""
+    if len(code) == 12:
+        code = "0" + code
+    if len(code) == 13:
+        parity = _PARITY[int(code[0])]
+        left = "".join((_L if p == "L" else _G)[int(d)] for p, d in zip(parity, code[1:7]))
+        right = "".join(_R[int(d)] for d in code[7:])
+    elif len(code) == 8:
+        left = "".join(_L[int(d)] for d in code[:4])
+        right = "".join(_R[int(d)] for d in code[4:])
+    else:
+        raise ValueError(f"unsupported length {len(code)}")
+    return "101" + left + "01010" + right + "101"
+
+
+def render_barcode(code: str, module_px: int = 4, height_px: int = 160) -> np.ndarray:
+    """Gray image of the symbol with quiet zones."""
+    modules = ean_modules(code)
+    quiet = 11 * module_px
+    w = len(modules) * module_px + 2 * quiet
+    img = np.full((height_px + 2 * quiet // 2, w), 255, np.uint8)
+    y0 = quiet // 2
+    for i, m in enumerate(modules):
+        if m == "1":
+            x = quiet + i * module_px
+            img[y0:y0 + height_px, x:x + module_px] = 0
+    return img
+
+
+def _shelf(h: int, w: int, rng) -> np.ndarray:
+    """Low-contrast clutter standing in for a shelf background."""
+    bg = rng.integers(90, 170, size=(h // 16 + 1, w // 16 + 1), dtype=np.uint8)
+    bg = cv2.resize(bg, (w, h), interpolation=cv2.INTER_CUBIC)
+    return cv2.cvtColor(bg, cv2.COLOR_GRAY2BGR)
+
+
+def _place(frame: np.ndarray, symbol: np.ndarray, cx: float, cy: float, scale: float, angle: float):
+    h, w = symbol.shape
+    M = cv2.getRotationMatrix2D((w / 2, h / 2), angle, scale)
+    M[0, 2] += cx - w / 2
+    M[1, 2] += cy - h / 2
+    fh, fw = frame.shape[:2]
+    label = cv2.warpAffine(np.full_like(symbol, 255), M, (fw, fh), borderValue=0)
+    warped = cv2.warpAffine(symbol, M, (fw, fh), borderValue=255)
+    mask = label > 0
+    for c in range(3):
+        frame[..., c][mask] = warped[mask]
+
+
+def _stripes(frame: np.ndarray, x: int, y: int, w: int, h: int, period_px: int = 12):
+    """Vertical stripes: barcode-like gradients in a box bigger than any code."""
+    cols = (np.arange(w) // (period_px // 2)) % 2 == 0
+    frame[y:y + h, x:x + w][:, cols] = 30
+    frame[y:y + h, x:x + w][:, ~cols] = 225
+
+
+def render_sequence(code: str, frames: int, size, blur_px: float, angle: float,
+                    scale: float, rng, distractor: bool = False) -> List[np.ndarray]:
+    """Sweep: empty frames, then the symbol slides in blurred and settles sharp near the centre."""
+    w, h = size
+    symbol = render_barcode(code)
+    empty = max(1, frames // 6)
+    out = []
+    for i in range(frames):
+        frame = _shelf(h, w, rng)
+        if distractor:
+            # Left half of the frame; the code settles to its right
+            _stripes(frame, w // 20, h // 12, w // 2, int(h * 0.55))
+        if i >= empty:
+            t = min(1.0, (i - empty) / max(1, (frames - empty) // 2))
+            x_end = 0.78 if distractor else 0.5
+            cx = w * (0.15 + (x_end - 0.15) * t) + rng.normal(0, 2)
+            cy = h * 0.5 + rng.normal(0, 2)
+            _place(frame, symbol, cx, cy, scale, angle + rng.normal(0, 0.5))
+            # Motion blur while the hand moves, settling to the case's residual blur
+            k = int(round(blur_px + (1 - t) * 25))
+            if k > 1:
+                kernel = np.zeros((k, k), np.float32)
+                kernel[k // 2, :] = 1.0 / k
+                frame = cv2.filter2D(frame, -1, kernel)
+        noise = rng.normal(0, 4, frame.shape)
+        out.append(np.clip(frame + noise, 0, 255).astype(np.uint8))
+    return out
+
+
+CASES = [
+    # name, digits without check digit, residual blur px, angle deg, scale, striped distractor
+    ("ean13_sharp", "400638133393", 0, 0, 1.0, False),
+    ("ean13_blur", "590123412345", 4, 0, 1.0, False),
+    ("ean13_rot15", "978020137962", 0, 15, 1.0, False),
+    ("ean13_small", "871125300120", 0, 0, 0.6, False),
+    ("upca_sharp", "03600029145", 0, 0, 1.0, False),
+    ("upca_rot_blur", "01234567890", 3, -10, 0.9, False),
+    ("ean8_sharp", "9638507", 0, 0, 1.2, False),
+    ("ean13_stripes", "400638133393", 0, 0, 0.8, True),
+]
+
+
+def generate(out_dir: str, frames: int = 24, size=(1280, 720), seed: int = 1) -> List[Dict]:
+    rng = np.random.default_rng(seed)
+    manifest = []
+    for name, body, blur_px, angle, scale, distractor in CASES:
+        code = body + check_digit(body)
+        case_dir = os.path.join(out_dir, name)
+        os.makedirs(case_dir, exist_ok=True)
+        frames_out = render_sequence(code, frames, size, blur_px, angle, scale, rng, distractor)
+        for i, frame in enumerate(frames_out):
+            cv2.imwrite(os.path.join(case_dir, f"frame_{i:04d}.png"), frame)
+        manifest.append({"case": name, "expected": code, "blur_px": blur_px,
+                         "angle": angle, "scale": scale, "distractor": distractor,
+                         "frames": frames})
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump({"seed": seed, "size": list(size), "cases": manifest}, f, indent=2)
+    return manifest
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Render the synthetic barcode replay corpus.")
+    ap.add_argument("out_dir")
+    ap.add_argument("--frames", type=int, default=24)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+    cases = generate(args.out_dir, args.frames, seed=args.seed)
+    print(f"Wrote {len(cases)} cases to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# button.py
+# Interrupt-driven trigger button with debouncing and gestures.
+# GPIO edge detection wakes us only when the level changes; a small thread
+# re-reads the pin once it has been quiet for BUTTON_DEBOUNCE_MS and turns
+# those stable levels into gestures:
+#   PRESS  - button went down (reported at once, without waiting for release)
+#   DOUBLE - second press within BUTTON_DOUBLE_PRESS_S of the last release
+#   LONG   - button held for BUTTON_LONG_PRESS_S (reported while still held)
+# DOUBLE and LONG follow the PRESS of the same press, so a handler that acted
+# on that PRESS (e.g. started a scan) is expected to undo or repurpose it.
+
+import threading
+import time
+from typing import Callable, Optional
+
+from hardware import GPIO
+from config import BUTTON_DEBOUNCE_MS, BUTTON_LONG_PRESS_S, BUTTON_DOUBLE_PRESS_S
+
+PRESS = "press"
+DOUBLE = "double"
+LONG = "long"
+
+
+class ButtonInput:
+    def __init__(
+        self,
+        pin: int,
+        on_gesture: Callable[[str], None],
+        debounce_ms: int = BUTTON_DEBOUNCE_MS,
+        long_press_s: float = BUTTON_LONG_PRESS_S,
+        double_press_s: float = BUTTON_DOUBLE_PRESS_S,
+    ):
+        self.pin = pin
+        self.on_gesture = on_gesture
+        self.debounce_ms = debounce_ms
+        self.long_press_s = long_press_s
+        self.double_press_s = double_press_s
+
+        self._cond = threading.Condition()
+        self._burst_start: Optional[float] = None   # first edge since the pin was last read
+        self._last_edge = 0.0
+        self._level_pressed = False
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        self._pressed_at: Optional[float] = None
+        self._long_fired = False
+        self._in_double = False                     # the current press already reported DOUBLE
+        self._released_at: Optional[float] = None   # end of the last short press, for DOUBLE
+        self.last_latency_s: Optional[float] = None   # edge to gesture callback
+
+    def start(self):
+        if self._thread is not None:
+            return
+        # Pull-up wiring: pressed reads LOW
+        self._level_pressed = GPIO.input(self.pin) == GPIO.LOW
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="button", daemon=True)
+        self._thread.start()
+        GPIO.add_event_detect(self.pin, GPIO.BOTH, callback=self._edge, bouncetime=self.debounce_ms)
+
+    def stop(self):
+        try:
+            GPIO.remove_event_detect(self.pin)
+        except Exception:
+            pass
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _edge(self, channel):
+        """GPIO callback thread: note that the level is changing; the gesture thread reads it."""
+        now = time.monotonic()
+        with self._cond:
+            if self._burst_start is None:
+                self._burst_start = now
+            self._last_edge = now
+            self._cond.notify()
+
+    def _emit(self, gesture: str, edge_time: float):
+        self.last_latency_s = time.monotonic() - edge_time
+        try:
+            self.on_gesture(gesture)
+        except Exception:
+            pass
+
+    def _next_deadline(self) -> Optional[float]:
+        deadlines = []
+        if self._burst_start is not None:
+            deadlines.append(self._last_edge + self.debounce_ms / 1000.0)
+        if self._pressed_at is not None and not self._long_fired and not self._in_double:
+            deadlines.append(self._pressed_at + self.long_press_s)
+        return min(deadlines) if deadlines else None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    deadline = self._next_deadline()
+                    if deadline is not None and time.monotonic() >= deadline:
+                        break
+                    self._cond.wait(None if deadline is None else deadline - time.monotonic())
+                if not self._running:
+                    return
+                now = time.monotonic()
+                transition = None
+                if self._burst_start is not None and now - self._last_edge >= self.debounce_ms / 1000.0:
+                    # Bouncing has stopped: the level now is the real one. A glitch
+                    # shorter than the debounce time reads back unchanged.
+                    pressed = GPIO.input(self.pin) == GPIO.LOW
+                    if pressed != self._level_pressed:
+                        self._level_pressed = pressed
+                        transition = (pressed, self._burst_start)
+                    self._burst_start = None
+
+            if transition is not None:
+                self._on_level(*transition)
+            now = time.monotonic()
+            if (self._pressed_at is not None and not self._long_fired and not self._in_double
+                    and now - self._pressed_at >= self.long_press_s):
+                self._long_fired = True
+                self._emit(LONG, self._pressed_at + self.long_press_s)
+
+    def _on_level(self, pressed: bool, t: float):
+        if pressed:
+            self._pressed_at = t
+            self._long_fired = False
+            self._in_double = False
+            if self._released_at is not None and t - self._released_at <= self.double_press_s:
+                # A third quick press starts over instead of doubling again
+                self._released_at = None
+                self._in_double = True
+                self._emit(DOUBLE, t)
+            else:
+                self._emit(PRESS, t)
+        else:
+            if self._pressed_at is not None and not self._long_fired and not self._in_double:
+                self._released_at = t
+            self._pressed_at = None
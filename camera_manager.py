@@ -0,0 +1,106 @@
+# camera_manager.py
+# Owns the one BarcodeScanner across scan sessions so a button press doesn't
+# pay for opening the device, negotiating a format and waiting for auto
+# exposure. States:
+#   closed  - device released (startup, or after CAMERA_IDLE_TIMEOUT_S idle)
+#   standby - device open and streaming at CAMERA_STANDBY_FPS, one frame grabbed now and then
+#   active  - a scan session is reading frames
+
+import threading
+import time
+from typing import Optional
+
+from camera_scanner import BarcodeScanner
+from hardware import open_camera
+from config import (
+    CAMERA_INDEX,
+    FRAME_WIDTH,
+    FRAME_HEIGHT,
+    CAPTURE_THREADED,
+    CAPTURE_PROFILES_ENABLED,
+    CAMERA_IDLE_TIMEOUT_S,
+)
+
+CLOSED = "closed"
+STANDBY = "standby"
+ACTIVE = "active"
+
+
+class CameraManager:
+    def __init__(self, idle_timeout_s: Optional[float] = CAMERA_IDLE_TIMEOUT_S):
+        self.idle_timeout_s = idle_timeout_s
+        self.state = CLOSED
+        self._scanner: Optional[BarcodeScanner] = None
+        self._lock = threading.Lock()
+        self._idle_timer: Optional[threading.Timer] = None
+        self.opens = 0
+        self.last_acquire_s: Optional[float] = None   # how long the last acquire() took
+
+    def _open_locked(self):
+        self._scanner = open_camera(
+            CAMERA_INDEX, FRAME_WIDTH, FRAME_HEIGHT,
+            threaded=CAPTURE_THREADED,
+            profile="search" if CAPTURE_PROFILES_ENABLED else None,
+        )
+        self.opens += 1
+
+    def _cancel_idle_locked(self):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def warm(self):
+        """Open the camera straight into standby, e.g. at startup."""
+        with self._lock:
+            if self.state == CLOSED:
+                self._open_locked()
+                self._standby_locked()
+
+    def acquire(self) -> BarcodeScanner:
+        """Return the scanner streaming at full rate, opening it if needed."""
+        t0 = time.monotonic()
+        with self._lock:
+            self._cancel_idle_locked()
+            if self.state == CLOSED:
+                self._open_locked()
+            else:
+                self._scanner.resume()
+            self.state = ACTIVE
+            self.last_acquire_s = time.monotonic() - t0
+            return self._scanner
+
+    def _standby_locked(self):
+        scanner = self._scanner
+        # Start the next session in the sweep profile; switching now hides the latency
+        if CAPTURE_PROFILES_ENABLED:
+            scanner.set_profile("search")
+        scanner.standby()
+        self.state = STANDBY
+        if self.idle_timeout_s is not None:
+            self._idle_timer = threading.Timer(self.idle_timeout_s, self._idle_expired)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+
+    def standby(self):
+        """End of a scan session: keep the device warm, and close it after the idle timeout."""
+        with self._lock:
+            if self.state != ACTIVE:
+                return
+            self._cancel_idle_locked()
+            self._standby_locked()
+
+    def _idle_expired(self):
+        with self._lock:
+            if self.state == STANDBY:
+                self._close_locked()
+
+    def _close_locked(self):
+        self._cancel_idle_locked()
+        if self._scanner is not None:
+            self._scanner.release()
+            self._scanner = None
+        self.state = CLOSED
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
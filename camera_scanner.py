@@ -1,12 +1,39 @@
 # camera_scanner.py
-# Webcam capture + barcode decoding using OpenCV and pyzbar.
+# Webcam capture + barcode decoding using OpenCV and a pluggable decoder (see decoders.py).
 
-from dataclasses import dataclass
-from typing import Optional, Tuple
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, Tuple, List
 import cv2
-from pyzbar.pyzbar import decode
 import numpy as np
-from config import CAMERA_INDEX, FRAME_WIDTH, FRAME_HEIGHT, BLUR_THRESHOLD
+from decoders import BarcodeDecoder, DecodedSymbol, make_decoder
+import metrics
+from config import (
+    CAMERA_INDEX,
+    FRAME_WIDTH,
+    FRAME_HEIGHT,
+    BLUR_THRESHOLD,
+    CAPTURE_RING_SIZE,
+    CAPTURE_PROFILES,
+    CAPTURE_FOURCC,
+    CAPTURE_DECODE_HOLD_S,
+    CAPTURE_EXPOSURE,
+    CAPTURE_FOCUS,
+    CAMERA_STANDBY_GRAB_INTERVAL_S,
+    CAMERA_STANDBY_FPS,
+    CAMERA_FLUSH_FRAMES,
+    DECODE_TRACKING,
+    DECODE_ROI_PAD,
+    DECODE_CANDIDATE_PAD,
+    DECODE_ROI_LOST_FRAMES,
+    DECODE_LOCATE_SCALE,
+    DECODE_FALLBACK_SCALE,
+    DECODE_WINDOW_CODE_PX,
+    DECODE_MAX_CANDIDATES,
+    DECODE_FALLBACK_EVERY,
+)
 
 
 @dataclass
@@ -18,36 +45,378 @@ class BarcodeFrameAnalysis:
     blur_score: float
     had_any_barcode: bool
     decoded: Optional[str]
+    codes: List[DecodedSymbol] = field(default_factory=list)   # every symbol in the frame
+    located: bool = False   # something barcode-like is in view, whether or not it was read
+
+    @property
+    def sharp(self) -> bool:
+        return self.blur_score >= blur_threshold(self.frame_w)
+
+
+def blur_threshold(frame_w: int) -> float:
+    """
+    BLUR_THRESHOLD is tuned for FRAME_WIDTH. Downscaling sharpens edges per
+    pixel, so the same blurred view scores higher at a smaller size: 4x or
+    more per halving on the replay corpus, hence the square of the ratio.
+    """
+    return BLUR_THRESHOLD * (FRAME_WIDTH / float(frame_w)) ** 2
+
+
+@dataclass
+class CapturedFrame:
+    frame: np.ndarray
+    seq: int
+    timestamp: float    # time.monotonic() when the frame was grabbed
+    dropped: int        # frames captured but never handed out since the last read
 
 
 class BarcodeScanner:
-    def __init__(self, camera_index: int, width: int, height: int):
+    """
+    Webcam wrapper. With threaded=True a capture thread drains the camera
+    continuously into a small ring of reused frame arrays, so consumers
+    always get the newest frame no matter how long they spend on each one.
+
+    Given a profile name from CAPTURE_PROFILES, the camera is opened in that
+    mode and set_profile() can switch modes later; with threading on, the
+    switch is applied by the capture thread between frames.
+    """
+
+    def __init__(self, camera_index: int, width: int, height: int,
+                 threaded: bool = False, ring_size: int = CAPTURE_RING_SIZE,
+                 profile: Optional[str] = None):
         self.cap = cv2.VideoCapture(camera_index)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.profile: Optional[str] = None
+        self.capture_format: Optional[Tuple[int, int, float, str]] = None
+        if profile is not None:
+            self._apply_profile(profile)
+        else:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self._lock_controls()
+
+        # One slot being written, one newest, one leased to the consumer
+        self._slots = [None] * max(3, int(ring_size))
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._newest = -1
+        self._leased = -1
+        self._seq = 0
+        self._newest_ts = 0.0
+        self._last_read_seq = 0
+        self.frames_captured = 0
+        self.frames_dropped = 0
+
+        self._pending_profile: Optional[Tuple[str, float]] = None
+        self._switch_requested_at: Optional[float] = None
+        self._frame_times = deque(maxlen=60)
+        self.switch_latencies = deque(maxlen=20)
+        self._standby_interval: Optional[float] = None
+        self._standby_fps_applied = False
+        self._resume_fps = 0.0   # device rate to restore when standby ends
+        self._flush_pending = False
+        self._wake = threading.Event()
+        if threaded:
+            self.start_capture()
+
+    def start_capture(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+
+    def _capture_loop(self):
+        while self._running:
+            if self._pending_profile is not None:
+                self._apply_pending_profile()
+            cap = self.cap
+            interval = self._standby_interval
+            if interval is not None:
+                # Standby: keep the stream and the camera's exposure loop running
+                # at a low frame rate, without retrieving (decoding) any frames
+                if cap is not None and cap.isOpened():
+                    if not self._standby_fps_applied:
+                        self._set_standby_fps(True)
+                    cap.grab()
+                self._wake.wait(interval)
+                self._wake.clear()
+                continue
+            if self._standby_fps_applied:
+                self._set_standby_fps(False)
+            if self._flush_pending:
+                self._flush_pending = False
+                self._flush_stale()
+            if cap is None or not cap.isOpened() or not cap.grab():
+                time.sleep(0.01)
+                continue
+            ts = time.monotonic()
+
+            with self._cond:
+                slot = next(i for i in range(len(self._slots))
+                            if i != self._newest and i != self._leased)
+
+            # The chosen slot is neither newest nor leased, so no reader can touch it
+            ok, frame = cap.retrieve(self._slots[slot])
+            if not ok or frame is None:
+                continue
+            self._note_frame(ts, frame)
+
+            with self._cond:
+                self._slots[slot] = frame
+                self._newest = slot
+                self._newest_ts = ts
+                self._seq += 1
+                self.frames_captured += 1
+                self._cond.notify_all()
+
+    def read_latest(self, timeout: float = 1.0) -> Optional[CapturedFrame]:
+        """
+        Return the newest frame not yet handed out, waiting up to timeout.
+        The array is reused by the ring: it stays valid until the next call.
+        """
+        if self._thread is None:
+            frame = self.read()
+            if frame is None:
+                return None
+            self._seq += 1
+            return CapturedFrame(frame=frame, seq=self._seq, timestamp=time.monotonic(), dropped=0)
+
+        started = time.monotonic()
+        deadline = started + timeout
+        with self._cond:
+            while self._seq <= self._last_read_seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    metrics.count("capture.read_timeout")
+                    return None
+                self._cond.wait(remaining)
+            dropped = self._seq - self._last_read_seq - 1
+            self._last_read_seq = self._seq
+            self.frames_dropped += dropped
+            self._leased = self._newest
+            captured = CapturedFrame(
+                frame=self._slots[self._leased],
+                seq=self._seq,
+                timestamp=self._newest_ts,
+                dropped=dropped,
+            )
+        metrics.observe("capture.read_wait", time.monotonic() - started)
+        metrics.count("capture.frames")
+        if dropped:
+            metrics.count("capture.dropped", dropped)
+        return captured
 
     def read(self):
-        if not self.cap.isOpened():
+        if self._thread is not None:
+            captured = self.read_latest()
+            return captured.frame if captured is not None else None
+        if self._pending_profile is not None:
+            self._apply_pending_profile()
+        if self.cap is None or not self.cap.isOpened():
             return None
         ok, frame = self.cap.read()
         if not ok:
             return None
+        self._note_frame(time.monotonic(), frame)
         return frame
 
+    # -- standby ---------------------------------------------------------
+
+    def standby(self, interval: float = CAMERA_STANDBY_GRAB_INTERVAL_S):
+        """
+        Keep the device open and streaming at CAMERA_STANDBY_FPS, but only
+        grab a frame every interval seconds.
+        """
+        self._standby_interval = interval
+        if self._thread is None:
+            self._set_standby_fps(True)
+        self._wake.set()
+
+    def resume(self):
+        """Leave standby; frames captured before this call are never handed out."""
+        if self._thread is None:
+            self._standby_interval = None
+            self._set_standby_fps(False)
+            self._flush_stale()
+            return
+        with self._cond:
+            self._last_read_seq = self._seq
+        self._flush_pending = True
+        self._standby_interval = None
+        self._wake.set()
+
+    @property
+    def in_standby(self) -> bool:
+        return self._standby_interval is not None
+
+    def _set_standby_fps(self, standby: bool):
+        """Lower the device frame rate for standby, or restore it; call only between frames."""
+        cap = self.cap
+        if CAMERA_STANDBY_FPS is None or cap is None or not cap.isOpened():
+            return
+        if standby:
+            self._resume_fps = cap.get(cv2.CAP_PROP_FPS)
+            cap.set(cv2.CAP_PROP_FPS, CAMERA_STANDBY_FPS)
+        elif self._resume_fps:
+            cap.set(cv2.CAP_PROP_FPS, self._resume_fps)
+        self._lock_controls()
+        self._frame_times.clear()
+        self._standby_fps_applied = standby
+
+    def _flush_stale(self):
+        """Drop frames the driver queued while nobody was reading."""
+        cap = self.cap
+        if cap is None or not cap.isOpened():
+            return
+        for _ in range(CAMERA_FLUSH_FRAMES):
+            t0 = time.monotonic()
+            if not cap.grab():
+                return
+            # A grab that had to wait got a fresh frame; the queue is empty now
+            if time.monotonic() - t0 > 0.005:
+                return
+
+    # -- capture profiles ------------------------------------------------
+
+    def _apply_profile(self, name: str):
+        """Negotiate pixel format, size and fps for a profile; call only between frames."""
+        width, height, fps = CAPTURE_PROFILES[name]
+        cap = self.cap
+        fourcc_used = ""
+        for fourcc in CAPTURE_FOURCC:
+            # V4L2 wants the pixel format before the size
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+            if _fourcc_str(cap.get(cv2.CAP_PROP_FOURCC)) == fourcc:
+                fourcc_used = fourcc
+                break
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        cap.set(cv2.CAP_PROP_FPS, fps)
+        self.profile = name
+        self.capture_format = (
+            int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            float(cap.get(cv2.CAP_PROP_FPS)),
+            fourcc_used or _fourcc_str(cap.get(cv2.CAP_PROP_FOURCC)),
+        )
+
+    def _lock_controls(self):
+        """Fix exposure and focus; some drivers reset them on a format change."""
+        cap = self.cap
+        if CAPTURE_EXPOSURE is not None:
+            cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, 1)      # V4L2: 1 = manual, 3 = aperture priority
+            cap.set(cv2.CAP_PROP_EXPOSURE, CAPTURE_EXPOSURE)
+        if CAPTURE_FOCUS is not None:
+            cap.set(cv2.CAP_PROP_AUTOFOCUS, 0)
+            cap.set(cv2.CAP_PROP_FOCUS, CAPTURE_FOCUS)
+
+    def _apply_pending_profile(self):
+        name, requested_at = self._pending_profile
+        self._pending_profile = None
+        if self.cap is None or name == self.profile:
+            return
+        self._apply_profile(name)
+        self._lock_controls()
+        self._frame_times.clear()
+        # The profile's own rate is in effect now; standby lowers it again if needed
+        self._standby_fps_applied = False
+        # Applied on the capture side, so the next frame is in the new mode
+        self._switch_requested_at = requested_at
+
+    def set_profile(self, name: str):
+        """Request a switch to another capture profile (no-op if already active)."""
+        if name not in CAPTURE_PROFILES:
+            return
+        if name == self.profile:
+            self._pending_profile = None
+            return
+        self._pending_profile = (name, time.monotonic())
+
+    def _note_frame(self, ts: float, frame):
+        self._frame_times.append(ts)
+        if self._switch_requested_at is not None:
+            self.switch_latencies.append(ts - self._switch_requested_at)
+            self._switch_requested_at = None
+
+    @property
+    def effective_fps(self) -> float:
+        """Frames actually delivered per second over the recent window."""
+        times = self._frame_times
+        if len(times) < 2:
+            return 0.0
+        span = times[-1] - times[0]
+        return (len(times) - 1) / span if span > 0 else 0.0
+
+    def capture_stats(self) -> dict:
+        lat = list(self.switch_latencies)
+        return {
+            "profile": self.profile,
+            "format": self.capture_format,
+            "effective_fps": self.effective_fps,
+            "frames_captured": self.frames_captured,
+            "frames_dropped": self.frames_dropped,
+            "switches": len(lat),
+            "switch_latency_ms_last": 1000.0 * lat[-1] if lat else None,
+            "switch_latency_ms_max": 1000.0 * max(lat) if lat else None,
+        }
+
     def release(self):
+        if self._thread is not None:
+            self._running = False
+            self._wake.set()
+            with self._cond:
+                self._cond.notify_all()
+            self._thread.join(timeout=1.0)
+            self._thread = None
         if self.cap is not None:
             self.cap.release()
             self.cap = None
 
 
-def analyze_frame(frame) -> BarcodeFrameAnalysis:
-    h, w = frame.shape[:2]
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    # Blur score via Laplacian (higher = sharper)
-    blur_score = cv2.Laplacian(gray, cv2.CV_64F).var()
+def _fourcc_str(value) -> str:
+    v = int(value)
+    return "".join(chr((v >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00")
+
 
-    codes = decode(gray)
-    had_any = len(codes) > 0
+class CaptureProfileController:
+    """
+    Switch the scanner to the decode profile as soon as a barcode is
+    located, and back to the search profile once none has been seen for
+    CAPTURE_DECODE_HOLD_S. Feed it BarcodeFrameAnalysis.located rather than
+    successful reads: a small or distant code is often found by the
+    locator but unreadable at search resolution, which is exactly when the
+    decode profile is needed.
+    """
+
+    def __init__(self, scanner: BarcodeScanner, hold_s: float = CAPTURE_DECODE_HOLD_S):
+        self.scanner = scanner
+        self.hold_s = hold_s
+        self._last_found = 0.0
+
+    def update(self, located: bool):
+        now = time.monotonic()
+        if located:
+            self._last_found = now
+            self.scanner.set_profile("decode")
+        elif self.scanner.profile == "decode" and now - self._last_found > self.hold_s:
+            self.scanner.set_profile("search")
+
+
+def _decode_region(decoder: BarcodeDecoder, gray, offset: Tuple[int, int] = (0, 0),
+                   scale: float = 1.0) -> List[DecodedSymbol]:
+    """Decode a (possibly cropped / downscaled) gray image, mapping rects back to the frame."""
+    ox, oy = offset
+    out = []
+    for c in decoder.decode(gray):
+        (x, y, bw, bh) = c.rect
+        c.rect = (ox + int(x / scale), oy + int(y / scale), int(bw / scale), int(bh / scale))
+        out.append(c)
+    return out
+
+
+def _build_analysis(w: int, h: int, blur_score: float, codes: List[DecodedSymbol],
+                    located: bool = False) -> BarcodeFrameAnalysis:
     decoded = None
     bbox_center = None
     bbox_w = 0
@@ -55,7 +424,7 @@ def analyze_frame(frame) -> BarcodeFrameAnalysis:
     if codes:
         # Take the first barcode
         c = codes[0]
-        decoded = c.data.decode("utf-8", errors="ignore") if c.data else None
+        decoded = c.data
         (x, y, bw, bh) = c.rect
         bbox_center = (x + bw // 2, y + bh // 2)
         bbox_w = bw
@@ -66,6 +435,205 @@ def analyze_frame(frame) -> BarcodeFrameAnalysis:
         bbox_center=bbox_center,
         bbox_w=bbox_w,
         blur_score=float(blur_score),
-        had_any_barcode=had_any,
+        had_any_barcode=len(codes) > 0,
         decoded=decoded,
+        codes=list(codes),
+        located=located or len(codes) > 0,
     )
+
+
+def laplacian_variance(gray, dst=None) -> float:
+    """
+    Blur score: variance of the Laplacian (higher = sharper). The 3x3
+    Laplacian of an 8-bit image always fits in int16, so CV_16S gives exactly
+    the CV_64F score with a quarter of the memory; pass dst to reuse a buffer.
+    """
+    lap = cv2.Laplacian(gray, cv2.CV_16S, dst=dst)
+    _, std = cv2.meanStdDev(lap)
+    return float(std[0, 0]) ** 2
+
+
+_default_decoder: Optional[BarcodeDecoder] = None
+
+
+def analyze_frame(frame, decoder: Optional[BarcodeDecoder] = None) -> BarcodeFrameAnalysis:
+    """Stateless full-frame analysis; see FrameAnalyzer for the tracking path."""
+    global _default_decoder
+    if decoder is None:
+        if _default_decoder is None:
+            _default_decoder = make_decoder()
+        decoder = _default_decoder
+    h, w = frame.shape[:2]
+    with metrics.span("analyze.preprocess"):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        blur_score = laplacian_variance(gray)
+    with metrics.span("analyze.decode"):
+        codes = _decode_region(decoder, gray)
+    return _build_analysis(w, h, blur_score, codes)
+
+
+class _FrameBuffers:
+    """Per-resolution scratch images reused across frames."""
+
+    def __init__(self, h: int, w: int):
+        self.gray = np.empty((h, w), np.uint8)
+        self.lap = np.empty((h, w), np.int16)
+        sh, sw = max(1, int(h * DECODE_LOCATE_SCALE)), max(1, int(w * DECODE_LOCATE_SCALE))
+        self.locate_size = (sw, sh)
+        self.small = np.empty((sh, sw), np.uint8)
+        self.sobel = np.empty((sh, sw), np.int16)
+        self.gx = np.empty((sh, sw), np.uint8)
+        self.gy = np.empty((sh, sw), np.uint8)
+        self.grad = np.empty((sh, sw), np.uint8)
+        self.mask = np.empty((sh, sw), np.uint8)
+        fh, fw = max(1, int(h * DECODE_FALLBACK_SCALE)), max(1, int(w * DECODE_FALLBACK_SCALE))
+        self.fallback_size = (fw, fh)
+        self.fallback = np.empty((fh, fw), np.uint8)
+
+
+_LOCATE_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (7, 7))
+
+
+class FrameAnalyzer:
+    """
+    Tracking version of analyze_frame, one per scan session.
+
+    Once a barcode has been read, following frames are decoded only in a
+    padded window around its last position. When the code is lost, a cheap
+    gradient search on a coarse pyramid level proposes candidate regions,
+    which are decoded at full resolution, together never more pixels than
+    one full-frame decode. A downscaled full-frame decode runs when nothing
+    was located, and every DECODE_FALLBACK_EVERY searches whose candidates
+    all failed: striped packaging art can out-rank the code in the locator,
+    and without the fallback it would hide the code for good. All
+    intermediate images live in buffers that are allocated once per
+    resolution.
+    """
+
+    def __init__(self, tracking: bool = DECODE_TRACKING, decoder: Optional[BarcodeDecoder] = None):
+        # Each analyzer owns its decoder; backend objects aren't shared across threads
+        self.decoder = decoder if decoder is not None else make_decoder()
+        self.tracking = tracking and self.decoder.reads_crops
+        self._roi: Optional[Tuple[int, int, int, int]] = None
+        self._misses = 0
+        self._failed_searches = 0   # consecutive searches whose candidates didn't decode
+        self._located = False   # whether the last _find_codes saw a tracked or candidate region
+        self._buf: Optional[_FrameBuffers] = None
+
+    def reset(self):
+        self._roi = None
+        self._misses = 0
+        self._failed_searches = 0
+
+    def analyze(self, frame) -> BarcodeFrameAnalysis:
+        h, w = frame.shape[:2]
+        if self._buf is None or self._buf.gray.shape != (h, w):
+            # New resolution: fresh buffers, and the tracked rect is in the wrong coordinates
+            self._buf = _FrameBuffers(h, w)
+            self.reset()
+        with metrics.span("analyze.preprocess"):
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._buf.gray)
+            blur_score = laplacian_variance(gray, dst=self._buf.lap)
+
+        self._located = False
+        with metrics.span("analyze.decode"):
+            codes = self._find_codes(gray) if self.tracking else _decode_region(self.decoder, gray)
+        return _build_analysis(w, h, blur_score, codes, located=self._located)
+
+    def _find_codes(self, gray) -> List[DecodedSymbol]:
+        if self._roi is not None:
+            codes = self._decode_padded(gray, self._roi)
+            if codes:
+                metrics.count("decode.roi_hit")
+                self._misses = 0
+                self._roi = codes[0].rect
+                return codes
+            self._misses += 1
+            if self._misses <= DECODE_ROI_LOST_FRAMES:
+                self._located = True
+                return []
+            self._roi = None
+
+        codes = self._search(gray)
+        if codes:
+            self._misses = 0
+            self._roi = codes[0].rect
+        return codes
+
+    def _decode_padded(self, gray, rect: Tuple[int, int, int, int],
+                       pad_frac: float = DECODE_ROI_PAD) -> List[DecodedSymbol]:
+        fh, fw = gray.shape[:2]
+        x, y, bw, bh = rect
+        pad = int(max(bw, bh) * pad_frac) + 16
+        x0, y0 = max(0, x - pad), max(0, y - pad)
+        x1, y1 = min(fw, x + bw + pad), min(fh, y + bh + pad)
+        if x1 - x0 < 8 or y1 - y0 < 8:
+            return []
+        window = gray[y0:y1, x0:x1]
+        # A close-up code has bars many pixels wide; a few pixels per module
+        # decode just as well and cost a fraction of the time
+        s = DECODE_WINDOW_CODE_PX / float(max(bw, bh))
+        if s < 0.9:
+            size = (max(8, int((x1 - x0) * s)), max(8, int((y1 - y0) * s)))
+            # INTER_AREA is several times slower at non-integer factors; bars survive linear
+            window = cv2.resize(window, size, interpolation=cv2.INTER_LINEAR)
+            return _decode_region(self.decoder, window, offset=(x0, y0), scale=s)
+        return _decode_region(self.decoder, window, offset=(x0, y0))
+
+    def _search(self, gray) -> List[DecodedSymbol]:
+        metrics.count("decode.search")
+        candidates = self._locate_candidates(gray)
+        self._located = bool(candidates)
+        budget = gray.shape[0] * gray.shape[1]
+        for rect in candidates:
+            pad = int(max(rect[2], rect[3]) * DECODE_CANDIDATE_PAD) + 16
+            budget -= (rect[2] + 2 * pad) * (rect[3] + 2 * pad)
+            codes = self._decode_padded(gray, rect, DECODE_CANDIDATE_PAD)
+            if codes:
+                self._failed_searches = 0
+                return codes
+            if budget <= 0:
+                break
+        if candidates:
+            self._failed_searches += 1
+            if self._failed_searches < DECODE_FALLBACK_EVERY:
+                return []
+            self._failed_searches = 0
+        metrics.count("decode.full_frame")
+        s = DECODE_FALLBACK_SCALE
+        if s >= 1.0:
+            return _decode_region(self.decoder, gray)
+        b = self._buf
+        small = cv2.resize(gray, b.fallback_size, dst=b.fallback, interpolation=cv2.INTER_AREA)
+        return _decode_region(self.decoder, small, scale=s)
+
+    def _locate_candidates(self, gray) -> List[Tuple[int, int, int, int]]:
+        """
+        Coarse barcode localisation: bars give strong gradients in one
+        direction only, so ||dI/dx| - |dI/dy|| lights up barcode areas.
+        Returns full-frame rects, largest first.
+        """
+        b = self._buf
+        scale = DECODE_LOCATE_SCALE
+        small = cv2.resize(gray, b.locate_size, dst=b.small, interpolation=cv2.INTER_AREA)
+        cv2.convertScaleAbs(cv2.Sobel(small, cv2.CV_16S, 1, 0, dst=b.sobel, ksize=3), dst=b.gx)
+        cv2.convertScaleAbs(cv2.Sobel(small, cv2.CV_16S, 0, 1, dst=b.sobel, ksize=3), dst=b.gy)
+        cv2.absdiff(b.gx, b.gy, dst=b.grad)
+        cv2.blur(b.grad, (5, 5), dst=b.gx)
+        cv2.threshold(b.gx, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU, dst=b.mask)
+        cv2.morphologyEx(b.mask, cv2.MORPH_CLOSE, _LOCATE_KERNEL, dst=b.grad)
+        cv2.erode(b.grad, None, dst=b.mask, iterations=2)
+        mask = cv2.dilate(b.mask, None, dst=b.grad, iterations=2)
+
+        contours = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[-2]
+        min_area = 0.002 * small.shape[0] * small.shape[1]
+        # A blob covering most of the frame is texture everywhere, not a
+        # location; the full-frame fallback covers that case
+        max_area = 0.6 * small.shape[0] * small.shape[1]
+        rects = [cv2.boundingRect(c) for c in contours]
+        rects = [r for r in rects if min_area <= r[2] * r[3] <= max_area]
+        rects.sort(key=lambda r: r[2] * r[3], reverse=True)
+        return [
+            (int(x / scale), int(y / scale), int(bw / scale), int(bh / scale))
+            for (x, y, bw, bh) in rects[:DECODE_MAX_CANDIDATES]
+        ]
@@ -0,0 +1,170 @@
+# category_nutrition.py
+# Category-average nutriments used as an instant local estimate for products
+# that have no nutrition facts. Built from an OFF export by
+# import_off_dump.py --categories, and filled in lazily from AI estimates.
+# Lookups walk a product's categories from most to least specific.
+
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+from config import CATEGORY_NUTRITION_PATH, CATEGORY_MIN_SAMPLES
+
+
+NUTRITION_KEYS = [
+    "energy-kcal_100g",
+    "proteins_100g",
+    "carbohydrates_100g",
+    "sugars_100g",
+    "fat_100g",
+    "saturated-fat_100g",
+    "fiber_100g",
+    "sodium_100g",
+]
+
+# Values outside these bounds are data-entry errors, not food
+_MAX_PER_100G = {"energy-kcal_100g": 1000.0}
+_DEFAULT_MAX_PER_100G = 100.0
+
+
+def _plausible(key: str, v) -> Optional[float]:
+    try:
+        v = float(v)
+    except (TypeError, ValueError):
+        return None
+    if v < 0 or v > _MAX_PER_100G.get(key, _DEFAULT_MAX_PER_100G):
+        return None
+    return v
+
+
+class CategoryAccumulator:
+    """Streaming per-category means over OFF records, for the importer."""
+
+    def __init__(self):
+        self._sums: Dict[str, Dict[str, float]] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._products: Dict[str, int] = {}
+
+    def add(self, record: Dict[str, Any]):
+        nutr = record.get("nutriments") or {}
+        values = {}
+        for k in NUTRITION_KEYS:
+            v = _plausible(k, nutr.get(k))
+            if v is not None:
+                values[k] = v
+        if not values:
+            return
+        # categories_tags already lists every ancestor, so parents get averages too
+        tags = record.get("categories_tags") or record.get("categories_hierarchy") or []
+        for tag in tags:
+            sums = self._sums.setdefault(tag, {})
+            counts = self._counts.setdefault(tag, {})
+            self._products[tag] = self._products.get(tag, 0) + 1
+            for k, v in values.items():
+                sums[k] = sums.get(k, 0.0) + v
+                counts[k] = counts.get(k, 0) + 1
+
+    def table(self, min_samples: int = CATEGORY_MIN_SAMPLES) -> Dict[str, Dict[str, Any]]:
+        out = {}
+        for tag, n in self._products.items():
+            if n < min_samples:
+                continue
+            sums, counts = self._sums[tag], self._counts[tag]
+            out[tag] = {
+                "n": n,
+                "source": "off",
+                "nutriments": {k: round(sums[k] / counts[k], 2) for k in sums},
+            }
+        return out
+
+
+class CategoryNutritionTable:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._categories: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._categories = json.load(f).get("categories") or {}
+        except (OSError, ValueError):
+            self._categories = {}
+
+    def __len__(self):
+        return len(self._categories)
+
+    def estimate(self, cats: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """
+        Return an estimate shaped like the AI one ({"nutriments": ...}) for
+        the most specific matching category, or None if nothing matches.
+        """
+        cats = list(cats or [])
+        with self._lock:
+            for tag in reversed(cats):
+                entry = self._categories.get(tag)
+                if entry and entry.get("nutriments"):
+                    est = {"nutriments": dict(entry["nutriments"]), "category": tag}
+                    if entry.get("serving_size"):
+                        est["serving_size"] = entry["serving_size"]
+                    return est
+        return None
+
+    def record(self, cats: Iterable[str], estimate: Dict[str, Any]):
+        """Remember an AI estimate under the product's most specific category."""
+        cats = [c for c in (cats or []) if c]
+        if not cats:
+            return
+        nutr = {}
+        for k in NUTRITION_KEYS:
+            v = _plausible(k, (estimate.get("nutriments") or {}).get(k))
+            if v is not None:
+                nutr[k] = v
+        if not nutr:
+            return
+        tag = cats[-1]
+        with self._lock:
+            if tag in self._categories:
+                return
+            self._categories[tag] = {
+                "n": 1,
+                "source": "ai",
+                "nutriments": nutr,
+                "serving_size": estimate.get("serving_size") or None,
+            }
+            self._save_locked()
+
+    def replace(self, categories: Dict[str, Dict[str, Any]], keep_ai: bool = True):
+        """Install a freshly built table, keeping AI-filled categories it lacks."""
+        with self._lock:
+            if keep_ai:
+                for tag, entry in self._categories.items():
+                    if entry.get("source") == "ai" and tag not in categories:
+                        categories[tag] = entry
+            self._categories = categories
+            self._save_locked()
+
+    def _save_locked(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "categories": self._categories}, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+_table: Optional[CategoryNutritionTable] = None
+_table_lock = threading.Lock()
+
+
+def get_category_table() -> Optional[CategoryNutritionTable]:
+    """Return the shared table, or None if disabled."""
+    global _table
+    if not CATEGORY_NUTRITION_PATH:
+        return None
+    with _table_lock:
+        if _table is None:
+            _table = CategoryNutritionTable(CATEGORY_NUTRITION_PATH)
+        return _table
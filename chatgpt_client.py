@@ -2,48 +2,46 @@
 # Turn product data (including nutriments) into a speech string.
 # Focus on serving size, calories, protein, and sugar.
 
-import os
-from config import OPENAI_API_KEY_ENV, OPENAI_MODEL
+import re
+import threading
+import time
+from queue import Queue, Empty
+from typing import Callable, List, Optional, Tuple
+from ai_client import get_ai_client, cached_response_text, store_response_text
+import metrics
+from config import (
+    OPENAI_MODEL,
+    LLM_FIRST_TOKEN_DEADLINE_S,
+    LLM_STREAM_STALL_S,
+)
 
 
 def get_openai_client():
-    key = os.getenv(OPENAI_API_KEY_ENV)
-    if not key:
-        return None
-    try:
-        from openai import OpenAI
-        return OpenAI(api_key=key)
-    except Exception:
-        return None
+    return get_ai_client()
 
 
-def generate_product_speech(barcode: str, product_info: dict | None) -> str:
-    """
-    Generate a short, speech-friendly summary focused on serving size,
-    calories, protein, and sugar.
-    """
-    def first_nonempty(*xs):
-        for x in xs:
-            if isinstance(x, str) and x.strip():
-                return x.strip()
-        return None
+def _first_nonempty(*xs):
+    for x in xs:
+        if isinstance(x, str) and x.strip():
+            return x.strip()
+    return None
 
-    if product_info is None:
-        return f"I scanned barcode {barcode}. I couldn't identify the product."
 
-    name = first_nonempty(
+def _speech_prompt(barcode: str, product_info: dict) -> Tuple[str, str]:
+    """Return (LLM prompt, deterministic local fallback text) for a product."""
+    name = _first_nonempty(
         product_info.get("name"),
         product_info.get("product_name"),
         product_info.get("generic_name_en"),
         product_info.get("generic_name"),
     )
-    brand = first_nonempty(
+    brand = _first_nonempty(
         product_info.get("brand"),
         product_info.get("brands"),
     )
 
     nutr = product_info.get("nutriments") or {}
-    serving = first_nonempty(
+    serving = _first_nonempty(
         product_info.get("serving_size"),
         product_info.get("serving_size_prepared"),
     )
@@ -72,7 +70,6 @@ def generate_product_speech(barcode: str, product_info: dict | None) -> str:
     "<Brand> <Name>. Serving size <serving>. Calories <value>. Protein <value>. Sugar <value>."
 
     Product data:
-    Barcode: {barcode}
     Brand: {brand or "unknown"}
     Name: {name or "unknown"}
     Serving size: {serving or "unknown"}
@@ -82,16 +79,6 @@ def generate_product_speech(barcode: str, product_info: dict | None) -> str:
     Estimation note: {est_note}
     """
 
-    try:
-        client = get_openai_client()
-        if client:
-            resp = client.responses.create(model=OPENAI_MODEL, input=prompt)
-            txt = (resp.output_text or "").strip()
-            if txt:
-                return txt
-    except Exception:
-        pass
-
     # Deterministic local fallback (no AI)
     title = " ".join(x for x in [brand, name] if x) or "Product"
     parts = []
@@ -109,4 +96,161 @@ def generate_product_speech(barcode: str, product_info: dict | None) -> str:
         parts.append(f"Protein {protein} grams.")
     if sugars is not None:
         parts.append(f"Sugar {sugars} grams.")
-    return " ".join(parts) or "Product details unavailable."
+    return prompt, " ".join(parts) or "Product details unavailable."
+
+
+def generate_product_speech(barcode: str, product_info: dict | None) -> str:
+    """
+    Generate a short, speech-friendly summary focused on serving size,
+    calories, protein, and sugar.
+    """
+    if product_info is None:
+        return f"I scanned barcode {barcode}. I couldn't identify the product."
+
+    prompt, fallback = _speech_prompt(barcode, product_info)
+    txt = cached_response_text(OPENAI_MODEL, prompt)
+    if txt:
+        metrics.count("llm.cache_hit")
+        return txt
+    try:
+        client = get_openai_client()
+        if client:
+            with metrics.span("llm.summary"):
+                resp = client.responses.create(model=OPENAI_MODEL, input=prompt)
+            txt = (resp.output_text or "").strip()
+            if txt:
+                store_response_text(OPENAI_MODEL, prompt, txt)
+                return txt
+    except Exception:
+        metrics.count("llm.error")
+
+    metrics.count("llm.fallback")
+    return fallback
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _split_sentences(buf: str) -> Tuple[List[str], str]:
+    """Split off complete sentences; the unfinished tail stays in the buffer."""
+    pieces = _SENTENCE_END.split(buf)
+    done = [p.strip() for p in pieces[:-1] if p.strip()]
+    return done, pieces[-1]
+
+
+# Lead words of the local fallback's fact sentences (see _speech_prompt)
+_FACT_WORDS = ("estimated", "serving", "calories", "protein", "sugar")
+
+
+def _uncovered_facts(fallback: str, spoken: List[str]) -> str:
+    """Fallback sentences for the facts a cut-short summary never mentioned."""
+    heard = " ".join(spoken).lower()
+    rest = []
+    for sentence in _SENTENCE_END.split(fallback):
+        first = sentence.split(" ", 1)[0].lower()
+        word = next((w for w in _FACT_WORDS if first.startswith(w)), None)
+        # The title always comes first, so it was heard if anything was
+        if word is not None and word.rstrip("s") not in heard:
+            rest.append(sentence.strip())
+    return " ".join(rest)
+
+
+def stream_product_speech(
+    barcode: str,
+    product_info: dict | None,
+    on_sentence: Callable[[str], None],
+    first_token_deadline_s: float = LLM_FIRST_TOKEN_DEADLINE_S,
+) -> str:
+    """
+    Streaming variant of generate_product_speech: each complete sentence is
+    passed to on_sentence as soon as the model produces it. If no token
+    arrives within first_token_deadline_s, the local fallback is used
+    instead. Returns everything that was handed to on_sentence.
+    """
+    if product_info is None:
+        text = f"I scanned barcode {barcode}. I couldn't identify the product."
+        on_sentence(text)
+        return text
+
+    prompt, fallback = _speech_prompt(barcode, product_info)
+    cached = cached_response_text(OPENAI_MODEL, prompt)
+    if cached:
+        metrics.count("llm.cache_hit")
+        done, tail = _split_sentences(cached)
+        for sentence in done + ([tail.strip()] if tail.strip() else []):
+            on_sentence(sentence)
+        return cached
+
+    client = get_openai_client()
+    if not client:
+        metrics.count("llm.fallback")
+        on_sentence(fallback)
+        return fallback
+
+    sentences: "Queue[Optional[str]]" = Queue()
+    first_token = threading.Event()
+    failed = threading.Event()
+
+    # The consumer always reads the stream to the end so the full answer is
+    # cached for next time, even if we stopped waiting for it here
+    def consume():
+        buf = ""
+        full = []
+        t0 = time.perf_counter()
+        try:
+            stream = client.responses.create(model=OPENAI_MODEL, input=prompt, stream=True)
+            for event in stream:
+                if getattr(event, "type", "") != "response.output_text.delta":
+                    continue
+                if not first_token.is_set():
+                    metrics.observe("llm.first_token", time.perf_counter() - t0)
+                first_token.set()
+                full.append(event.delta or "")
+                done, buf = _split_sentences(buf + (event.delta or ""))
+                for sentence in done:
+                    sentences.put(sentence)
+            if buf.strip():
+                sentences.put(buf.strip())
+            store_response_text(OPENAI_MODEL, prompt, "".join(full).strip())
+            metrics.observe("llm.stream_total", time.perf_counter() - t0)
+        except Exception:
+            metrics.count("llm.error")
+            failed.set()
+        finally:
+            first_token.set()
+            sentences.put(None)
+
+    threading.Thread(target=consume, daemon=True).start()
+
+    if not first_token.wait(first_token_deadline_s):
+        metrics.count("llm.first_token_deadline")
+        on_sentence(fallback)
+        return fallback
+
+    spoken = []
+    cut_short = False
+    while True:
+        try:
+            sentence = sentences.get(timeout=LLM_STREAM_STALL_S)
+        except Empty:
+            metrics.count("llm.stream_stall")
+            cut_short = True
+            break
+        if sentence is None:
+            cut_short = failed.is_set()
+            break
+        on_sentence(sentence)
+        spoken.append(sentence)
+
+    if not spoken:
+        metrics.count("llm.fallback")
+        on_sentence(fallback)
+        return fallback
+    if cut_short:
+        # Finish the summary locally rather than leave facts unsaid
+        rest = _uncovered_facts(fallback, spoken)
+        if rest:
+            metrics.count("llm.fallback_partial")
+            on_sentence(rest)
+            spoken.append(rest)
+    return " ".join(spoken)
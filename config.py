@@ -5,6 +5,35 @@
 CAMERA_INDEX = 0
 FRAME_WIDTH = 1280
 FRAME_HEIGHT = 720
+CAPTURE_THREADED = True    # drain the camera on a background thread
+CAPTURE_RING_SIZE = 3      # reused frame buffers (minimum 3)
+
+# Capture profiles: sweep at low resolution and high fps, switch to the
+# decode profile once a barcode is located. (width, height, fps)
+CAPTURE_PROFILES_ENABLED = True
+CAPTURE_PROFILES = {
+    "search": (640, 360, 60),
+    "decode": (FRAME_WIDTH, FRAME_HEIGHT, 30),
+}
+CAPTURE_FOURCC = ("MJPG", "YUYV")   # pixel formats to try, in order
+CAPTURE_DECODE_HOLD_S = 2.0         # drop back to search after this long without a barcode
+# Fixed exposure keeps shutter times short while the hand moves; None leaves it automatic.
+# V4L2 units of 100 us, so 80 = 8 ms.
+CAPTURE_EXPOSURE = 80
+CAPTURE_FOCUS = None                # fixed focus position, or None to leave autofocus on
+
+# Camera lifecycle (camera_manager.CameraManager): closed -> standby <-> active
+CAMERA_WARM_STANDBY = True          # open the camera at startup and keep it warm between scans
+CAMERA_STANDBY_GRAB_INTERVAL_S = 0.5   # one frame grabbed this often in standby keeps exposure converged
+CAMERA_STANDBY_FPS = 5              # device frame rate in standby; None keeps streaming at the profile rate
+CAMERA_FLUSH_FRAMES = 4             # stale driver buffers dropped when a scan starts
+CAMERA_IDLE_TIMEOUT_S = 300         # close the camera after this long in standby to save battery
+
+# Hardware backend: "rpi", or "sim" for the simulated devices in sim_hardware.py
+# (the SCANNER_HARDWARE environment variable overrides this)
+HARDWARE_BACKEND = "rpi"
+SIM_CAMERA_PATH = "sim_frames"   # folder or video replayed as the camera in simulation
+SIM_CAMERA_FPS = 30.0
 
 # GPIO pins (BCM numbering)
 BUTTON_PIN = 17        # trigger button (with pull-up)
@@ -12,30 +41,122 @@ VIBRATOR_PIN = 27      # vibration motor via transistor
 US_TRIG_PIN = 23       # ultrasonic trigger
 US_ECHO_PIN = 24       # ultrasonic echo
 
+# Trigger button gestures (button.ButtonInput)
+BUTTON_DEBOUNCE_MS = 30        # edges closer together than this are contact bounce
+BUTTON_LONG_PRESS_S = 1.0      # hold this long to cancel a scan
+BUTTON_DOUBLE_PRESS_S = 0.35   # press again within this of releasing to repeat the last result
+
 # Guidance parameters
 CENTER_TOLERANCE_PX = 80
 MIN_BARCODE_WIDTH_PX = 320
 BLUR_THRESHOLD = 120.0
 GUIDANCE_COOLDOWN_S = 1.5
 
+# Barcode decoder backend: "pyzbar", "opencv", "zxing" or "cascade"
+DECODER_BACKEND = "pyzbar"
+DECODER_CASCADE = ("opencv", "pyzbar")   # cheapest first; used when DECODER_BACKEND = "cascade"
+DECODER_SYMBOLOGIES = ("EAN13", "EAN8", "UPCA", "UPCE")   # None = everything the backend knows
+
+# Tracking decode (camera_scanner.FrameAnalyzer)
+DECODE_TRACKING = True
+DECODE_ROI_PAD = 0.5           # padding around the last bbox, as a fraction of its size
+DECODE_CANDIDATE_PAD = 0.1     # padding around a located candidate (quiet zone, not motion)
+DECODE_ROI_LOST_FRAMES = 3     # misses tolerated before searching the whole frame again
+DECODE_LOCATE_SCALE = 0.25     # coarse pyramid level used to locate candidates
+DECODE_FALLBACK_SCALE = 0.5    # full-frame decode scale when no candidate decodes
+DECODE_MAX_CANDIDATES = 3      # located regions tried per search, within one frame's worth of pixels
+DECODE_FALLBACK_EVERY = 3      # searches whose candidates all fail before a full-frame decode runs anyway
+DECODE_WINDOW_CODE_PX = 400    # ROI / candidate windows are downscaled so the code is at most this wide
+DECODE_WORKERS = 3             # parallel decode threads; 0 analyses inline on the scan thread
+
+# Frame scheduler (frame_scheduler.FrameScheduler); cheap checks before each decode
+FRAME_SCHEDULING = True
+SCHED_SIZE = (160, 120)        # size of the frame copy the checks run on
+SCHED_MIN_SHARPNESS = 60.0     # Laplacian variance at SCHED_SIZE; below this the frame is motion-blurred
+SCHED_STILL_MOTION = 1.5       # mean abs gray-level change; below this the view hasn't changed
+SCHED_STILL_RECHECK_S = 0.5    # decode an unchanged, empty view at most this often
+SCHED_SEARCH_FPS = 12          # decode rate cap while nothing has been found
+SCHED_BOOST_S = 1.5            # uncapped decoding for this long after a barcode is seen
+SCHED_MAX_SKIP_S = 0.5         # force a decode after this long without one
+
+# Multi-frame confirmation (barcode_tracker.BarcodeTracker)
+TRACKER_CONFIRM_VOTES = 2      # agreeing frames needed when a single clean read isn't enough
+TRACKER_MAX_MISSES = 8         # frames a code may vanish before its track is dropped
+TRACKER_MATCH_IOU = 0.2        # bbox overlap that counts as the same code
+
 # Distance ranges (cm)
 MIN_DISTANCE_CM = 10
 MAX_DISTANCE_CM = 60
 
+# Background ultrasonic sampling
+US_SAMPLE_INTERVAL_S = 0.06        # HC-SR04 needs ~60 ms between pings
+US_HISTORY = 5                     # readings in the median filter
+US_MAX_SAMPLE_AGE_S = 0.5          # ignore readings older than this
+US_VALID_RANGE_CM = (2.0, 400.0)   # sensor's physical range; outside is noise
+
 # Vibration timing (milliseconds)
 BUZZ_MS_SHORT = 120
 BUZZ_GAP_MS = 120
+HAPTIC_PWM_HZ = 200                       # GPIO.PWM carrier for intensity control
+HAPTIC_DISTANCE_FEEDBACK = True           # pulse faster as the shelf gets closer while scanning
+HAPTIC_PROXIMITY_PULSE_MS = 40
+HAPTIC_PROXIMITY_INTERVAL_MS = (150, 900)  # gap at MIN_DISTANCE_CM and at MAX_DISTANCE_CM or beyond
 
 # OpenAI / OpenFoodFacts
 OPENAI_API_KEY_ENV = "OPENAI_API_KEY"
 OPENAI_MODEL = "gpt-4o-mini"
+LLM_STREAMING = True              # speak the summary sentence by sentence as it streams
+LLM_FIRST_TOKEN_DEADLINE_S = 1.5  # use the local summary if the model is slower than this
+LLM_STREAM_STALL_S = 5.0          # a stream that stops mid-summary is finished from the local summary
+AI_CACHE_PATH = "ai_cache.sqlite3"   # summaries/estimates keyed by hash(model, prompt); "" disables
+AI_CACHE_MAX_ENTRIES = 2000
+AI_CACHE_MAX_BYTES = 4 * 1024 * 1024
 OPENFOODFACTS_BASE = "https://world.openfoodfacts.org/api/v2/product"
 
+# OpenFoodFacts transport (http_transport.PooledHttpClient)
+OFF_POOL_SIZE = 2                 # keep-alive connections kept open
+OFF_LATENCY_BUDGET_S = 3.0        # overall time allowed per lookup, hedge included
+OFF_HEDGE_AFTER_S = 0.8           # start a second request if the first is this slow
+OFF_BREAKER_THRESHOLD = 3         # consecutive failures before failing fast
+OFF_BREAKER_BACKOFF_S = 2.0       # first open period; doubles up to the max
+OFF_BREAKER_BACKOFF_MAX_S = 60.0
+
 # Text-to-speech
 TTS_ENGINE = "espeak-ng"
 TTS_WPM = "170"
 TTS_VOICE = "en-us"
+TTS_BACKEND = "persistent"     # "persistent" (libespeak-ng + one aplay) or "subprocess"
+TTS_PLAYER = ("aplay", "-q", "-t", "raw", "-f", "S16_LE", "-c", "1")
+TTS_PHRASE_CACHE_SIZE = 64     # recently spoken dynamic phrases kept as PCM
+TTS_GUIDANCE_TTL_S = 2.0       # guidance not started within this is dropped as stale
 
 # Scan timing
 SCAN_TIMEOUT_S = 30
-POST_DECODE_PAUSE_S = 1.5
+
+# Product cache (SQLite); set the path to "" to disable
+PRODUCT_CACHE_PATH = "product_cache.sqlite3"
+PRODUCT_CACHE_MAX_ENTRIES = 5000
+PRODUCT_CACHE_TTL_S = 7 * 24 * 3600
+PRODUCT_CACHE_NEGATIVE_TTL_S = 24 * 3600
+
+# Offline OpenFoodFacts extract built by import_off_dump.py; "" disables
+OFFLINE_INDEX_DIR = "offline_off"
+
+# Category-average nutrition table (JSON), used before asking the AI; "" disables
+CATEGORY_NUTRITION_PATH = "category_nutrition.json"
+CATEGORY_MIN_SAMPLES = 20      # products needed before an OFF-built category average is kept
+
+# Instrumentation (metrics.py): stage latency histograms and counters
+METRICS_ENABLED = True
+METRICS_PATH = "metrics.json"   # snapshot rewritten every METRICS_FLUSH_S; "" disables
+METRICS_FLUSH_S = 10.0
+METRICS_HTTP_PORT = None        # e.g. 8787 serves /metrics and /profile-next on 127.0.0.1
+PROFILE_DIR = "profiles"        # folded stacks from single-session sampling profiles
+PROFILE_INTERVAL_S = 0.005
+
+# Scan-session telemetry (telemetry.py); one JSON line per session, "" disables
+TELEMETRY_PATH = "telemetry.jsonl"
+TELEMETRY_FLUSH_S = 2.0            # writer batches records for this long before appending
+TELEMETRY_QUEUE_MAX = 256          # records waiting beyond this are dropped, never blocking a scan
+TELEMETRY_MAX_BYTES = 8 * 1024 * 1024   # then rotated to telemetry.jsonl.1
+TELEMETRY_SPEECH_WAIT_S = 5.0      # session waits this long for its result to start speaking
@@ -0,0 +1,140 @@
+# decode_pipeline.py
+# Spread frame analysis over several cores. cv2 and pyzbar (via ctypes)
+# release the GIL while they work, so a pool of threads decodes in parallel
+# without pickling frames between processes: each worker owns a frame
+# buffer that submitted frames are copied into, plus its own FrameAnalyzer.
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, List
+
+import numpy as np
+
+from camera_scanner import BarcodeFrameAnalysis, FrameAnalyzer
+from config import DECODE_WORKERS
+
+
+@dataclass
+class DecodeResult:
+    seq: int
+    timestamp: float     # capture time of the analysed frame
+    analysis: BarcodeFrameAnalysis
+
+
+class _Worker:
+    def __init__(self, pipeline: "DecodePipeline", index: int):
+        self.pipeline = pipeline
+        self.analyzer = FrameAnalyzer()
+        self.frame: Optional[np.ndarray] = None
+        self.seq = 0
+        self.timestamp = 0.0
+        self.busy = False
+        self.wake = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"decode-{index}", daemon=True)
+
+    def load(self, frame: np.ndarray, seq: int, timestamp: float):
+        if self.frame is None or self.frame.shape != frame.shape:
+            self.frame = np.empty_like(frame)
+        np.copyto(self.frame, frame)
+        self.seq = seq
+        self.timestamp = timestamp
+        self.busy = True
+        self.wake.set()
+
+    def _run(self):
+        p = self.pipeline
+        while True:
+            self.wake.wait()
+            self.wake.clear()
+            if not p._running:
+                return
+            try:
+                analysis = self.analyzer.analyze(self.frame)
+            except Exception:
+                analysis = None
+            p._finish(self, analysis)
+
+
+class DecodePipeline:
+    """
+    Submit frames tagged with their capture sequence number; poll() hands
+    back only results newer than anything already delivered, so a slow
+    worker finishing late never rewinds the scan loop to an old frame.
+    """
+
+    def __init__(self, workers: int = DECODE_WORKERS):
+        self._cond = threading.Condition()
+        self._running = True
+        self._workers = [_Worker(self, i) for i in range(max(1, int(workers)))]
+        self._results: List[DecodeResult] = []
+        self._delivered_seq = 0
+        self.submitted = 0
+        self.decoded = 0
+        self.dropped_busy = 0
+        self.discarded_late = 0
+        self._started_at = time.monotonic()
+        for w in self._workers:
+            w.thread.start()
+
+    def has_idle_worker(self) -> bool:
+        with self._cond:
+            return any(not w.busy for w in self._workers)
+
+    def submit(self, frame: np.ndarray, seq: int, timestamp: float) -> bool:
+        """Copy the frame to an idle worker. Returns False if all are busy (frame dropped)."""
+        with self._cond:
+            worker = next((w for w in self._workers if not w.busy), None)
+            if worker is None:
+                self.dropped_busy += 1
+                return False
+            worker.busy = True
+        worker.load(frame, seq, timestamp)
+        self.submitted += 1
+        return True
+
+    def _finish(self, worker: _Worker, analysis: Optional[BarcodeFrameAnalysis]):
+        with self._cond:
+            worker.busy = False
+            if analysis is not None:
+                self.decoded += 1
+                self._results.append(DecodeResult(worker.seq, worker.timestamp, analysis))
+            self._cond.notify_all()
+
+    def poll(self, timeout: float = 0.0) -> Optional[DecodeResult]:
+        """Return the newest undelivered result, waiting up to timeout for one."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                fresh = [r for r in self._results if r.seq > self._delivered_seq]
+                self.discarded_late += len(self._results) - len(fresh)
+                self._results = []
+                if fresh:
+                    newest = max(fresh, key=lambda r: r.seq)
+                    self.discarded_late += len(fresh) - 1
+                    self._delivered_seq = newest.seq
+                    return newest
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    return None
+                self._cond.wait(remaining)
+
+    def stats(self) -> dict:
+        elapsed = max(1e-6, time.monotonic() - self._started_at)
+        return {
+            "workers": len(self._workers),
+            "submitted": self.submitted,
+            "decoded": self.decoded,
+            "dropped_busy": self.dropped_busy,
+            "discarded_late": self.discarded_late,
+            "decoded_per_s": self.decoded / elapsed,
+        }
+
+    def close(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for w in self._workers:
+            w.wake.set()
+        for w in self._workers:
+            w.thread.join(timeout=1.0)
@@ -0,0 +1,189 @@
+# decoders.py
+# Pluggable barcode decoder backends used by camera_scanner.
+# pyzbar is the baseline; OpenCV's barcode module and zxing-cpp are optional.
+
+from dataclasses import dataclass
+from typing import Optional, Tuple, List, Sequence
+
+import cv2
+import numpy as np
+
+from config import DECODER_BACKEND, DECODER_CASCADE, DECODER_SYMBOLOGIES
+
+
+@dataclass
+class DecodedSymbol:
+    data: Optional[str]               # None when a backend located a code but couldn't read it
+    rect: Tuple[int, int, int, int]   # x, y, w, h in full-frame pixels
+    symbology: str = ""               # normalised: EAN13, EAN8, UPCA, UPCE, ...
+
+
+def _norm_symbology(name) -> str:
+    return str(name or "").upper().replace("_", "").replace("-", "")
+
+
+def _decoded_first(codes: List[DecodedSymbol]) -> List[DecodedSymbol]:
+    return sorted(codes, key=lambda c: c.data is None)
+
+
+class BarcodeDecoder:
+    """Decode an 8-bit grayscale image into symbols with image-space rects."""
+
+    name = "base"
+    # False for backends that miss codes in tight crops; FrameAnalyzer then
+    # decodes whole frames instead of tracking a region
+    reads_crops = True
+
+    def decode(self, gray: np.ndarray) -> List[DecodedSymbol]:
+        raise NotImplementedError
+
+
+class PyzbarDecoder(BarcodeDecoder):
+    name = "pyzbar"
+
+    def __init__(self, symbologies: Optional[Sequence[str]] = DECODER_SYMBOLOGIES):
+        from pyzbar.pyzbar import decode, ZBarSymbol
+        self._decode = decode
+        # Restricting zbar to retail symbologies skips the other scanners entirely
+        self._symbols = [getattr(ZBarSymbol, s) for s in symbologies] if symbologies else None
+
+    def decode(self, gray):
+        out = []
+        for c in self._decode(gray, symbols=self._symbols):
+            out.append(DecodedSymbol(
+                data=c.data.decode("utf-8", errors="ignore") if c.data else None,
+                rect=tuple(c.rect),
+                symbology=_norm_symbology(c.type),
+            ))
+        return out
+
+
+class OpenCVDecoder(BarcodeDecoder):
+    """
+    cv2.barcode.BarcodeDetector (OpenCV >= 4.5.3). Also reports located-but-
+    unread codes. Its detector window sizes are relative to the image, so it
+    does best on whole (or downscaled) frames rather than tight ROI crops.
+    """
+
+    name = "opencv"
+    reads_crops = False
+
+    def __init__(self, symbologies: Optional[Sequence[str]] = DECODER_SYMBOLOGIES):
+        self._det = cv2.barcode.BarcodeDetector()
+        self._symbologies = {_norm_symbology(s) for s in symbologies} if symbologies else None
+
+    def decode(self, gray):
+        if hasattr(self._det, "detectAndDecodeWithType"):
+            ok, infos, types, points = self._det.detectAndDecodeWithType(gray)
+        else:
+            ok, infos, types, points = self._det.detectAndDecode(gray)
+        if not ok or points is None:
+            return []
+
+        out = []
+        for info, typ, pts in zip(infos, types, points):
+            sym = _norm_symbology(typ)
+            if info and self._symbologies and sym not in self._symbologies:
+                continue
+            x, y, w, h = cv2.boundingRect(np.asarray(pts, dtype=np.float32))
+            out.append(DecodedSymbol(data=info or None, rect=(x, y, w, h), symbology=sym))
+        return _decoded_first(out)
+
+
+class ZXingDecoder(BarcodeDecoder):
+    name = "zxing"
+
+    def __init__(self, symbologies: Optional[Sequence[str]] = DECODER_SYMBOLOGIES):
+        import zxingcpp
+        self._zx = zxingcpp
+        self._formats = None
+        if symbologies:
+            fmt = None
+            for s in symbologies:
+                f = getattr(zxingcpp.BarcodeFormat, s)
+                fmt = f if fmt is None else fmt | f
+            self._formats = fmt
+
+    def decode(self, gray):
+        if self._formats is not None:
+            results = self._zx.read_barcodes(gray, formats=self._formats)
+        else:
+            results = self._zx.read_barcodes(gray)
+        out = []
+        for r in results:
+            p = r.position
+            pts = np.array(
+                [[p.top_left.x, p.top_left.y], [p.top_right.x, p.top_right.y],
+                 [p.bottom_right.x, p.bottom_right.y], [p.bottom_left.x, p.bottom_left.y]],
+                dtype=np.float32,
+            )
+            out.append(DecodedSymbol(
+                data=r.text or None,
+                rect=cv2.boundingRect(pts),
+                symbology=_norm_symbology(getattr(r.format, "name", r.format)),
+            ))
+        return _decoded_first(out)
+
+
+class CascadeDecoder(BarcodeDecoder):
+    """Try cheap backends first and escalate only when nothing was read."""
+
+    name = "cascade"
+
+    def __init__(self, backends: Sequence[BarcodeDecoder]):
+        self.backends = list(backends)
+        self.reads_crops = all(b.reads_crops for b in self.backends)
+
+    def decode(self, gray):
+        located: List[DecodedSymbol] = []
+        for b in self.backends:
+            codes = b.decode(gray)
+            if any(c.data for c in codes):
+                return codes
+            if codes and not located:
+                located = codes
+        return located
+
+
+_BACKENDS = {
+    "pyzbar": PyzbarDecoder,
+    "opencv": OpenCVDecoder,
+    "zxing": ZXingDecoder,
+}
+
+
+def available_backends() -> List[str]:
+    names = []
+    for name, cls in _BACKENDS.items():
+        try:
+            cls()
+        except Exception:
+            continue
+        names.append(name)
+    return names
+
+
+def make_decoder(name: str = DECODER_BACKEND) -> BarcodeDecoder:
+    """
+    Build a decoder by config name. Optional backends that aren't installed
+    are skipped in a cascade and fall back to pyzbar on their own.
+    """
+    if name == "cascade":
+        backends = []
+        for n in DECODER_CASCADE:
+            try:
+                backends.append(_BACKENDS[n]())
+            except KeyError:
+                raise ValueError(f"Unknown decoder backend: {n}")
+            except Exception:
+                continue
+        return CascadeDecoder(backends or [PyzbarDecoder()])
+
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown decoder backend: {name}")
+    try:
+        return _BACKENDS[name]()
+    except Exception:
+        if name == "pyzbar":
+            raise
+        return PyzbarDecoder()
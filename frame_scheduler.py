@@ -0,0 +1,113 @@
+# frame_scheduler.py
+# Decide, per captured frame, whether the full decode is worth running.
+# Two cheap measurements on a small grayscale copy come first: sharpness
+# (Laplacian variance) and motion energy (mean absolute difference from the
+# previous frame). Motion-blurred frames are skipped, an unchanged scene is
+# re-checked only occasionally, and the search is rate-capped until a
+# barcode candidate shows up, at which point every usable frame is decoded.
+
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from camera_scanner import BarcodeFrameAnalysis, laplacian_variance
+from config import (
+    SCHED_SIZE,
+    SCHED_MIN_SHARPNESS,
+    SCHED_STILL_MOTION,
+    SCHED_STILL_RECHECK_S,
+    SCHED_SEARCH_FPS,
+    SCHED_BOOST_S,
+    SCHED_MAX_SKIP_S,
+)
+
+
+@dataclass
+class FrameGate:
+    decode: bool
+    reason: str         # "boost", "search", "blur", "still", "throttle" or "forced"
+    sharpness: float    # Laplacian variance of the small frame
+    motion: float       # mean absolute difference from the previous small frame
+
+
+class FrameScheduler:
+    """
+    One per scan session. Call assess() on each captured frame and decode
+    only when it says so; pass every analysis that comes back to
+    note_result() so a found barcode raises the decode rate.
+    """
+
+    def __init__(self):
+        w, h = SCHED_SIZE
+        self._small = np.empty((h, w, 3), np.uint8)
+        self._gray = np.empty((h, w), np.uint8)
+        self._prev = np.empty((h, w), np.uint8)
+        self._diff = np.empty((h, w), np.uint8)
+        self._lap = np.empty((h, w), np.int16)
+        self._have_prev = False
+        self._last_decode = 0.0
+        self._boost_until = 0.0
+        self._last_found = False
+        self.stats = {"assessed": 0, "decode": 0, "blur": 0, "still": 0, "throttle": 0}
+
+    def reset(self):
+        self._have_prev = False
+        self._boost_until = 0.0
+        self._last_found = False
+
+    def boost(self, seconds: float = SCHED_BOOST_S):
+        """Decode every usable frame for a while, e.g. once a candidate is tracked."""
+        self._boost_until = max(self._boost_until, time.monotonic() + seconds)
+
+    def note_result(self, analysis: Optional[BarcodeFrameAnalysis]):
+        if analysis is None:
+            return
+        self._last_found = analysis.had_any_barcode
+        if analysis.had_any_barcode:
+            self.boost()
+
+    def assess(self, frame: np.ndarray) -> FrameGate:
+        now = time.monotonic()
+        self.stats["assessed"] += 1
+
+        # Shrink first, then convert: the colour conversion runs on ~1/16 of the pixels
+        cv2.resize(frame, (self._gray.shape[1], self._gray.shape[0]), dst=self._small,
+                   interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        sharpness = laplacian_variance(gray, dst=self._lap)
+        if self._have_prev:
+            cv2.absdiff(gray, self._prev, dst=self._diff)
+            motion = float(cv2.mean(self._diff)[0])
+        else:
+            motion = float("inf")
+        # Swap rather than copy; _gray is overwritten next frame
+        self._prev, self._gray = self._gray, self._prev
+        self._have_prev = True
+
+        since_decode = now - self._last_decode
+        if sharpness < SCHED_MIN_SHARPNESS:
+            reason = "blur"
+        elif now < self._boost_until:
+            reason = "boost"
+        elif motion < SCHED_STILL_MOTION and not self._last_found and since_decode < SCHED_STILL_RECHECK_S:
+            # Same view as a frame that already decoded to nothing
+            reason = "still"
+        elif since_decode < 1.0 / SCHED_SEARCH_FPS:
+            reason = "throttle"
+        else:
+            reason = "search"
+
+        decode = reason in ("boost", "search")
+        # Never go quiet for long: guidance needs a fresh analysis now and then
+        if not decode and since_decode >= SCHED_MAX_SKIP_S:
+            decode, reason = True, "forced"
+
+        if decode:
+            self._last_decode = now
+            self.stats["decode"] += 1
+        else:
+            self.stats[reason] += 1
+        return FrameGate(decode, reason, sharpness, motion)
@@ -0,0 +1,128 @@
+# frame_sources.py
+# Recorded frames behind the BarcodeScanner interface, so the vision
+# pipeline can be replayed without a camera: a folder of images or a video
+# file, played back as fast as it is consumed or at the recorded frame rate.
+
+import glob
+import os
+import time
+from typing import List, Optional
+
+import cv2
+
+from camera_scanner import CapturedFrame
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class FileFrameSource:
+    """
+    Drop-in for BarcodeScanner (read, read_latest, release, set_profile,
+    standby/resume, capture_stats). With realtime=False every frame is handed out in order;
+    with realtime=True frames follow a wall clock at fps, and frames the
+    consumer was too slow for are dropped just as with a live camera.
+    """
+
+    def __init__(self, path: str, fps: float = 30.0, realtime: bool = False, loop: bool = False):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.profile = None
+        self._images: Optional[List[str]] = None
+        self._video = None
+        if os.path.isdir(path):
+            self._images = sorted(
+                p for p in glob.glob(os.path.join(path, "*"))
+                if p.lower().endswith(IMAGE_EXTENSIONS)
+            )
+            self.fps = fps
+        else:
+            self._video = cv2.VideoCapture(path)
+            self.fps = self._video.get(cv2.CAP_PROP_FPS) or fps
+        self._index = 0          # next frame to decode from the source
+        self._seq = 0
+        self._started_at: Optional[float] = None
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.exhausted = False
+        self.in_standby = False
+
+    def __len__(self):
+        if self._images is not None:
+            return len(self._images)
+        return int(self._video.get(cv2.CAP_PROP_FRAME_COUNT)) if self._video is not None else 0
+
+    def _load(self, index: int):
+        count = len(self)
+        if self.loop and count:
+            index %= count
+        if self._images is not None:
+            if index >= count:
+                return None
+            return cv2.imread(self._images[index], cv2.IMREAD_COLOR)
+        if self._video is None:
+            return None
+        if index != int(self._video.get(cv2.CAP_PROP_POS_FRAMES)):
+            self._video.set(cv2.CAP_PROP_POS_FRAMES, index)
+        ok, frame = self._video.read()
+        return frame if ok else None
+
+    def read_latest(self, timeout: float = 1.0) -> Optional[CapturedFrame]:
+        if self.exhausted:
+            return None
+        now = time.monotonic()
+        if self._started_at is None:
+            self._started_at = now
+        index = self._index
+        if self.realtime:
+            due = int((now - self._started_at) * self.fps)
+            if due < index:
+                # Next frame isn't "captured" yet; wait for it like a camera would
+                wait = (index / self.fps) - (now - self._started_at)
+                if wait > timeout:
+                    time.sleep(timeout)
+                    return None
+                time.sleep(max(0.0, wait))
+            else:
+                index = due
+        frame = self._load(index)
+        if frame is None:
+            self.exhausted = True
+            return None
+        dropped = index - self._index
+        self.frames_dropped += dropped
+        self._index = index + 1
+        self._seq += 1
+        self.frames_captured += 1
+        return CapturedFrame(frame=frame, seq=self._seq, timestamp=time.monotonic(), dropped=dropped)
+
+    def read(self):
+        captured = self.read_latest()
+        return captured.frame if captured is not None else None
+
+    def set_profile(self, name: str):
+        pass
+
+    # Standby API of BarcodeScanner; a resumed session replays from the first frame
+    def standby(self, interval: Optional[float] = None):
+        self.in_standby = True
+
+    def resume(self):
+        self.in_standby = False
+        self._index = 0
+        self._started_at = None
+        self.exhausted = False
+
+    def capture_stats(self) -> dict:
+        return {
+            "profile": None,
+            "format": None,
+            "effective_fps": self.fps,
+            "frames_captured": self.frames_captured,
+            "frames_dropped": self.frames_dropped,
+        }
+
+    def release(self):
+        if self._video is not None:
+            self._video.release()
+            self._video = None
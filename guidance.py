@@ -6,13 +6,25 @@ from dataclasses import dataclass
 from typing import Optional, Tuple
 from config import (
     CENTER_TOLERANCE_PX,
+    FRAME_WIDTH,
     MIN_BARCODE_WIDTH_PX,
-    BLUR_THRESHOLD,
     GUIDANCE_COOLDOWN_S,
     MIN_DISTANCE_CM,
     MAX_DISTANCE_CM,
 )
 from camera_scanner import BarcodeFrameAnalysis
+import metrics
+
+
+# Messages that never vary, so the TTS engine can render them ahead of time
+FIXED_PHRASES = (
+    "I can't see the barcode. Hold steady for a moment.",
+    "Sweep slowly until I see the barcode.",
+    "Move slightly to the left.",
+    "Move slightly to the right.",
+    "Hold very still, I'm trying to read the barcode.",
+    "Hold that position, reading the barcode.",
+)
 
 
 @dataclass
@@ -25,8 +37,10 @@ def _centering_phrase(frame_w: int, bbox_center: Tuple[int, int]) -> Optional[st
     cx, cy = bbox_center
     center_x = frame_w // 2
     dx = cx - center_x
+    # The tolerance is tuned for FRAME_WIDTH; capture profiles may use other sizes
+    tolerance = CENTER_TOLERANCE_PX * frame_w / FRAME_WIDTH
 
-    if abs(dx) <= CENTER_TOLERANCE_PX:
+    if abs(dx) <= tolerance:
         return "Horizontally centered."
     if dx < 0:
         return "Move slightly to the left."
@@ -50,9 +64,14 @@ def _distance_phrase(distance_cm: Optional[float]) -> Optional[str]:
 
 
 def guidance_message(analysis: BarcodeFrameAnalysis, distance_cm: Optional[float]) -> str:
+    with metrics.span("guidance.message"):
+        return _guidance_message(analysis, distance_cm)
+
+
+def _guidance_message(analysis: BarcodeFrameAnalysis, distance_cm: Optional[float]) -> str:
     # No barcode at all
     if not analysis.had_any_barcode:
-        if analysis.blur_score < BLUR_THRESHOLD:
+        if not analysis.sharp:
             return "I can't see the barcode. Hold steady for a moment."
         return "Sweep slowly until I see the barcode."
 
@@ -69,7 +88,7 @@ def guidance_message(analysis: BarcodeFrameAnalysis, distance_cm: Optional[float
 
     # If nothing specific, encourage stability
     if not parts:
-        if analysis.blur_score < BLUR_THRESHOLD:
+        if not analysis.sharp:
             return "Hold very still, I'm trying to read the barcode."
         return "Hold that position, reading the barcode."
 
@@ -81,7 +100,9 @@ def maybe_say(msg: str, state: GuidanceState, speak_func):
     if not msg:
         return
     if state.last_message == msg and now - state.last_spoken_time < GUIDANCE_COOLDOWN_S:
+        metrics.count("guidance.suppressed")
         return
     state.last_message = msg
     state.last_spoken_time = now
+    metrics.count("guidance.spoken")
     speak_func(msg)
@@ -0,0 +1,38 @@
+# hardware.py
+# Single place that decides between the real Raspberry Pi peripherals and
+# the simulated ones in sim_hardware.py. Set SCANNER_HARDWARE=sim (or
+# HARDWARE_BACKEND in config.py) to run the full scanner off-device.
+
+import os
+
+from config import HARDWARE_BACKEND, SIM_CAMERA_PATH, SIM_CAMERA_FPS
+
+SIMULATED = os.getenv("SCANNER_HARDWARE", HARDWARE_BACKEND) == "sim"
+
+if SIMULATED:
+    from sim_hardware import SimGPIO, SpeechSink
+    GPIO = SimGPIO()
+else:
+    import RPi.GPIO as GPIO
+
+_speech_sink = None
+
+
+def open_camera(camera_index: int, width: int, height: int, threaded: bool, profile=None):
+    """The webcam, or in simulation a looping file source replayed in real time."""
+    if SIMULATED:
+        from frame_sources import FileFrameSource
+        path = os.getenv("SCANNER_SIM_CAMERA", SIM_CAMERA_PATH)
+        return FileFrameSource(path, fps=SIM_CAMERA_FPS, realtime=True, loop=True)
+    from camera_scanner import BarcodeScanner
+    return BarcodeScanner(camera_index, width, height, threaded=threaded, profile=profile)
+
+
+def speech_sink():
+    """The recording TTS sink used in simulation, or None on real hardware."""
+    global _speech_sink
+    if not SIMULATED:
+        return None
+    if _speech_sink is None:
+        _speech_sink = SpeechSink()
+    return _speech_sink
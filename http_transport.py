@@ -0,0 +1,189 @@
+# http_transport.py
+# Keep-alive HTTP(S) client for product lookups over weak store Wi-Fi:
+# pooled persistent connections, one overall latency budget per request,
+# a hedged second attempt when the first is slow, and a circuit breaker
+# with exponential backoff so an unreachable server fails fast.
+
+import http.client
+import ssl
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional, Tuple
+
+
+class TransportError(Exception):
+    pass
+
+
+class CircuitOpenError(TransportError):
+    """Raised without touching the network while the breaker is open."""
+
+
+class PooledHttpClient:
+    def __init__(
+        self,
+        pool_size: int = 2,
+        hedge_after_s: Optional[float] = 0.8,
+        failure_threshold: int = 3,
+        backoff_s: float = 2.0,
+        backoff_max_s: float = 60.0,
+        ssl_context: Optional[ssl.SSLContext] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.pool_size = max(1, int(pool_size))
+        self.hedge_after_s = hedge_after_s
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.backoff_s = backoff_s
+        self.backoff_max_s = backoff_max_s
+        self.ssl_context = ssl_context
+        self.headers = dict(headers or {})
+
+        self._idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        # Two attempts per request can be in flight at once when hedging
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size * 2, thread_name_prefix="http")
+
+        self._failures = 0
+        self._open_until = 0.0
+        self._next_backoff = backoff_s
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "failures": 0,
+                      "short_circuited": 0, "connections_opened": 0}
+
+    # -- connection pool -------------------------------------------------
+
+    def _acquire(self, origin: Tuple[str, str, int], timeout: float) -> http.client.HTTPConnection:
+        with self._lock:
+            idle = self._idle.get(origin)
+            conn = idle.pop() if idle else None
+        if conn is None:
+            scheme, host, port = origin
+            if scheme == "https":
+                conn = http.client.HTTPSConnection(host, port, timeout=timeout, context=self.ssl_context)
+            else:
+                conn = http.client.HTTPConnection(host, port, timeout=timeout)
+            self.stats["connections_opened"] += 1
+        else:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+        return conn
+
+    def _release(self, origin, conn: http.client.HTTPConnection, reusable: bool):
+        if not reusable:
+            conn.close()
+            return
+        with self._lock:
+            idle = self._idle.setdefault(origin, [])
+            if len(idle) < self.pool_size:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _attempt(self, origin, target: str, deadline: float) -> Tuple[int, bytes]:
+        timeout = max(0.05, deadline - time.monotonic())
+        conn = self._acquire(origin, timeout)
+        try:
+            try:
+                conn.request("GET", target, headers=self.headers)
+                resp = conn.getresponse()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # A pooled connection the server already closed; retry once on a fresh one
+                conn.close()
+                conn = self._acquire(origin, max(0.05, deadline - time.monotonic()))
+                conn.request("GET", target, headers=self.headers)
+                resp = conn.getresponse()
+            body = resp.read()
+        except Exception:
+            conn.close()
+            raise
+        self._release(origin, conn, not resp.will_close)
+        return resp.status, body
+
+    # -- circuit breaker -------------------------------------------------
+
+    def _check_breaker(self):
+        if time.monotonic() < self._open_until:
+            self.stats["short_circuited"] += 1
+            raise CircuitOpenError("server marked unreachable; backing off")
+
+    def _record(self, ok: bool):
+        with self._lock:
+            if ok:
+                self._failures = 0
+                self._next_backoff = self.backoff_s
+                return
+            self.stats["failures"] += 1
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._open_until = time.monotonic() + self._next_backoff
+                self._next_backoff = min(self.backoff_max_s, self._next_backoff * 2)
+
+    @property
+    def circuit_open(self) -> bool:
+        return time.monotonic() < self._open_until
+
+    # -- public API ------------------------------------------------------
+
+    def get(self, url: str, budget_s: float) -> Tuple[int, bytes]:
+        """
+        GET url within budget_s seconds overall. Returns (status, body) for
+        any response below 500; raises TransportError otherwise.
+        """
+        self._check_breaker()
+        self.stats["requests"] += 1
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        origin = (scheme, parts.hostname, port)
+        target = parts.path + ("?" + parts.query if parts.query else "")
+        deadline = time.monotonic() + budget_s
+
+        pending = {self._executor.submit(self._attempt, origin, target, deadline)}
+        hedged = False
+        first = next(iter(pending))
+        last_error: Optional[BaseException] = None
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wait_for = remaining
+            if not hedged and self.hedge_after_s is not None:
+                wait_for = min(remaining, max(0.0, self.hedge_after_s - (budget_s - remaining)))
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for fut in done:
+                try:
+                    status, body = fut.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if status >= 500:
+                    last_error = TransportError(f"HTTP {status}")
+                    continue
+                if fut is not first:
+                    self.stats["hedge_wins"] += 1
+                self._record(True)
+                return status, body
+
+            # First attempt slow (or failed fast): race a second connection
+            if not hedged and self.hedge_after_s is not None and deadline - time.monotonic() > 0:
+                if not done or not pending:
+                    hedged = True
+                    self.stats["hedged"] += 1
+                    pending.add(self._executor.submit(self._attempt, origin, target, deadline))
+
+        self._record(False)
+        if last_error is not None:
+            raise TransportError(str(last_error)) from last_error
+        raise TransportError(f"no response within {budget_s:.1f}s")
+
+    def close(self):
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for c in conns:
+            c.close()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,240 @@
+# import_off_dump.py
+# Stream an OpenFoodFacts JSONL or CSV export into the offline barcode index
+# read by offline_index.py. Records are processed one at a time and index
+# entries are sorted in bounded runs, so memory use stays flat.
+#
+# Full import:   python import_off_dump.py openfoodfacts-products.jsonl.gz
+# Delta update:  python import_off_dump.py --delta off-delta.jsonl.gz
+# Add --categories on a full import to rebuild the category nutrition table.
+
+import argparse
+import csv
+import gzip
+import heapq
+import json
+import os
+import sys
+import tempfile
+from typing import Optional, Dict, Any, Iterator, Iterable, Tuple, List
+
+from config import OFFLINE_INDEX_DIR
+from offline_index import (
+    INDEX_MAGIC,
+    HEADER,
+    ENTRY,
+    DATA_NAME,
+    INDEX_NAME,
+    index_key,
+    encode_record,
+    iter_index_entries,
+)
+from product_lookup import _FIELDS
+from category_nutrition import CategoryAccumulator, get_category_table
+
+
+RUN_SIZE = 250_000
+_LIST_FIELDS = {"categories_hierarchy", "categories_tags", "allergens_tags"}
+_NUTRIMENT_SUFFIXES = ("_100g", "_serving")
+_NUTRIMENT_PLAIN = {"energy-kcal"}
+
+
+def _open_text(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="ignore")
+    return open(path, "r", encoding="utf-8", errors="ignore")
+
+
+def _keep_nutriment(key: str) -> bool:
+    return key.endswith(_NUTRIMENT_SUFFIXES) or key in _NUTRIMENT_PLAIN
+
+
+def _as_number(v):
+    if isinstance(v, (int, float)):
+        return v
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def slim_record(rec: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Keep only the fields product_lookup asks OFF for."""
+    out: Dict[str, Any] = {}
+    for f in _FIELDS:
+        v = rec.get(f)
+        if v in (None, "", [], {}):
+            continue
+        if f == "nutriments":
+            if not isinstance(v, dict):
+                continue
+            nutr = {}
+            for k, n in v.items():
+                n = _as_number(n)
+                if n is not None and _keep_nutriment(k):
+                    nutr[k] = n
+            if not nutr:
+                continue
+            v = nutr
+        out[f] = v
+    return out if out.get("code") else None
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    with _open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except Exception:
+                continue
+            if isinstance(rec, dict):
+                yield rec
+
+
+def iter_csv(path: str) -> Iterator[Dict[str, Any]]:
+    """OFF CSV exports are tab-separated with nutriments flattened to columns."""
+    csv.field_size_limit(sys.maxsize)
+    with _open_text(path) as f:
+        for row in csv.DictReader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+            rec: Dict[str, Any] = {}
+            nutr: Dict[str, Any] = {}
+            for k, v in row.items():
+                if not k or not v:
+                    continue
+                if _keep_nutriment(k):
+                    nutr[k] = v
+                elif k in _LIST_FIELDS:
+                    rec[k] = [t for t in v.split(",") if t]
+                else:
+                    rec[k] = v
+            rec["nutriments"] = nutr
+            yield rec
+
+
+def _write_run(entries: List[Tuple[bytes, int, int]], tmpdir: str) -> str:
+    entries.sort()
+    fd, path = tempfile.mkstemp(prefix="run-", suffix=".idx", dir=tmpdir)
+    with os.fdopen(fd, "wb") as f:
+        f.write(HEADER.pack(INDEX_MAGIC, len(entries)))
+        for e in entries:
+            f.write(ENTRY.pack(*e))
+    return path
+
+
+def _merge_latest(runs: Iterable[Iterator[Tuple[bytes, int, int]]]) -> Iterator[Tuple[bytes, int, int]]:
+    """Merge sorted runs; for duplicate keys the highest data offset (newest) wins."""
+    prev = None
+    for entry in heapq.merge(*runs):
+        if prev is not None and prev[0] != entry[0]:
+            yield prev
+        prev = entry
+    if prev is not None:
+        yield prev
+
+
+def _write_index(entries: Iterator[Tuple[bytes, int, int]], path: str) -> int:
+    count = 0
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(INDEX_MAGIC, 0))
+        for e in entries:
+            f.write(ENTRY.pack(*e))
+            count += 1
+        f.seek(0)
+        f.write(HEADER.pack(INDEX_MAGIC, count))
+        f.flush()
+        os.fsync(f.fileno())
+    return count
+
+
+def import_dump(records: Iterable[Dict[str, Any]], out_dir: str, delta: bool = False) -> int:
+    """
+    Write records into out_dir. A full import replaces the existing extract;
+    a delta appends changed records and merges them into the existing index.
+    Returns the number of records written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    data_path = os.path.join(out_dir, DATA_NAME)
+    index_path = os.path.join(out_dir, INDEX_NAME)
+    delta = delta and os.path.exists(data_path) and os.path.exists(index_path)
+
+    # Full imports go to a temp file so readers never see a half-written extract
+    data_tmp = data_path if delta else data_path + ".tmp"
+    runs: List[str] = []
+    written = 0
+
+    with tempfile.TemporaryDirectory(dir=out_dir) as tmpdir:
+        with open(data_tmp, "ab" if delta else "wb") as dat:
+            offset = dat.tell()
+            pending: List[Tuple[bytes, int, int]] = []
+            for rec in records:
+                slim = slim_record(rec)
+                key = index_key(slim["code"]) if slim else None
+                if key is None:
+                    continue
+                blob = encode_record(slim)
+                dat.write(blob)
+                pending.append((key, offset, len(blob)))
+                offset += len(blob)
+                written += 1
+                if len(pending) >= RUN_SIZE:
+                    runs.append(_write_run(pending, tmpdir))
+                    pending = []
+                if written % 100_000 == 0:
+                    print(f"{written} records...", file=sys.stderr)
+            if pending:
+                runs.append(_write_run(pending, tmpdir))
+            dat.flush()
+            os.fsync(dat.fileno())
+
+        sources = [iter_index_entries(p) for p in runs]
+        if delta:
+            sources.append(iter_index_entries(index_path))
+        index_tmp = index_path + ".tmp"
+        count = _write_index(_merge_latest(sources), index_tmp)
+
+    if not delta:
+        os.replace(data_tmp, data_path)
+    os.replace(index_tmp, index_path)
+    print(f"Wrote {written} records; index holds {count} barcodes.", file=sys.stderr)
+    return written
+
+
+def _tee(records: Iterable[Dict[str, Any]], sink) -> Iterator[Dict[str, Any]]:
+    for rec in records:
+        sink(rec)
+        yield rec
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build the offline OpenFoodFacts barcode index.")
+    ap.add_argument("dump", help="OFF export (.jsonl, .csv, optionally .gz)")
+    ap.add_argument("--out", default=OFFLINE_INDEX_DIR, help="index directory")
+    ap.add_argument("--format", choices=["jsonl", "csv"], help="default: guessed from file name")
+    ap.add_argument("--delta", action="store_true", help="merge into the existing index")
+    ap.add_argument("--categories", action="store_true",
+                    help="also rebuild the category nutrition table (full imports only)")
+    args = ap.parse_args(argv)
+    if args.categories and args.delta:
+        ap.error("--categories needs a full export; a delta would skew the averages")
+
+    fmt = args.format or ("csv" if ".csv" in os.path.basename(args.dump) else "jsonl")
+    records = iter_csv(args.dump) if fmt == "csv" else iter_jsonl(args.dump)
+
+    acc = CategoryAccumulator() if args.categories else None
+    if acc is not None:
+        records = _tee(records, acc.add)
+    import_dump(records, args.out, delta=args.delta)
+
+    if acc is not None:
+        table = get_category_table()
+        if table is None:
+            print("CATEGORY_NUTRITION_PATH is empty; table not written.", file=sys.stderr)
+            return
+        table.replace(acc.table())
+        print(f"Category table holds {len(table)} categories.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,84 +3,291 @@
 
 import time
 import threading
-import RPi.GPIO as GPIO
+from concurrent.futures import ThreadPoolExecutor
+from hardware import GPIO
 
 from config import (
-    CAMERA_INDEX,
-    FRAME_WIDTH,
-    FRAME_HEIGHT,
     BUTTON_PIN,
+    CAPTURE_PROFILES_ENABLED,
+    CAMERA_WARM_STANDBY,
+    HAPTIC_DISTANCE_FEEDBACK,
+    DECODE_WORKERS,
+    FRAME_SCHEDULING,
     SCAN_TIMEOUT_S,
-    POST_DECODE_PAUSE_S,
+    LLM_STREAMING,
+    TELEMETRY_SPEECH_WAIT_S,
+)
+from tts import speak, speak_guidance, prerender_phrases, CONFIRMATION
+from button import ButtonInput, PRESS, DOUBLE, LONG
+from motor import init_motor, play as haptic, set_proximity
+from sensors import init_ultrasonic, start_distance_sampler, stop_distance_sampler, latest_distance
+from camera_scanner import FrameAnalyzer, CaptureProfileController
+from camera_manager import CameraManager
+from decode_pipeline import DecodePipeline
+from barcode_tracker import BarcodeTracker
+from frame_scheduler import FrameScheduler
+from guidance import GuidanceState, guidance_message, maybe_say, FIXED_PHRASES
+from product_lookup import lookup_product, last_lookup_source
+from chatgpt_client import generate_product_speech, stream_product_speech
+import metrics
+from telemetry import SessionRecorder, get_telemetry_store, CAPTURED, FAILED, CANCELLED, ERROR
+
+# Fixed session messages, pre-rendered at startup along with guidance phrases
+SESSION_PHRASES = (
+    "Starting scan. Sweep slowly.",
+    "Barcode captured.",
+    "I could not read the barcode.",
+    "Ready.",
+    "Scan cancelled.",
+    "Nothing to repeat yet.",
 )
-from tts import speak
-from motor import init_motor, buzz
-from sensors import init_ultrasonic, get_distance_cm
-from camera_scanner import BarcodeScanner, analyze_frame
-from guidance import GuidanceState, guidance_message, maybe_say
-from product_lookup import lookup_product
-from chatgpt_client import generate_product_speech
 
 # Global scan state
 _scanning_lock = threading.Lock()
 _scanning_flag = False
+_cancel_scan = threading.Event()
+# The running session was started by the latest PRESS; a DOUBLE or LONG of that
+# same press means it was never wanted
+_scan_from_last_press = False
+# Set when a session is aborted that way; it leaves no telemetry record
+_discard_scan = threading.Event()
+
+# Text of the last spoken product summary, for the repeat gesture
+_last_result = None
+
+# main() sleeps on this; nothing polls
+_shutdown = threading.Event()
 
+# The camera stays open between sessions (see camera_manager.py)
+_camera = CameraManager()
 
-def button_pressed(channel):
-    """Start a scan session if one isn't already running."""
+# Lookup + speech generation run here so they overlap the confirmation cues
+_post_decode = ThreadPoolExecutor(max_workers=1, thread_name_prefix="post-decode")
+
+
+def button_pressed(channel) -> bool:
+    """Start a scan session if one isn't already running; True if this call started one."""
     global _scanning_flag
     if _scanning_lock.acquire(blocking=False):
         try:
             if not _scanning_flag:
                 _scanning_flag = True
+                _cancel_scan.clear()
+                _discard_scan.clear()
                 threading.Thread(target=run_scan_session, daemon=True).start()
+                return True
         finally:
             _scanning_lock.release()
+    return False
+
+
+def _abort_own_scan():
+    """Stop a session the current press started by accident, leaving no telemetry record."""
+    if _scan_from_last_press and _scanning_flag and not _cancel_scan.is_set():
+        _discard_scan.set()
+        _cancel_scan.set()
+
+
+def _on_gesture(gesture: str):
+    """
+    Button gestures: press scans, long press cancels, double press repeats
+    the last result. The scan starts on the down edge; a long or double
+    press then cancels the scan its own first press started.
+    """
+    global _scan_from_last_press
+    if gesture == PRESS:
+        _scan_from_last_press = button_pressed(None)
+    elif gesture == LONG:
+        if _scanning_flag and not _cancel_scan.is_set():
+            if _scan_from_last_press:
+                _abort_own_scan()
+            else:
+                _cancel_scan.set()
+            speak("Scan cancelled.", CONFIRMATION)
+            haptic("cancelled")
+    elif gesture == DOUBLE:
+        _abort_own_scan()
+        speak(_last_result or "Nothing to repeat yet.", CONFIRMATION)
+
+
+def _next_analysis(scanner, analyzer, pipeline, scheduler=None):
+    """
+    Analyse the next frame inline, or feed the decode pool and take its
+    newest result. With a scheduler, frames it rejects are never decoded.
+    """
+    if pipeline is None:
+        frame = scanner.read()
+        if frame is None or (scheduler is not None and not scheduler.assess(frame).decode):
+            return None
+        analysis = analyzer.analyze(frame)
+    else:
+        if pipeline.has_idle_worker():
+            captured = scanner.read_latest(timeout=0.1)
+            if captured is not None and (scheduler is None or scheduler.assess(captured.frame).decode):
+                pipeline.submit(captured.frame, captured.seq, captured.timestamp)
+        # Only wait for a result once every worker has a frame to chew on
+        result = pipeline.poll(timeout=0.0 if pipeline.has_idle_worker() else 0.05)
+        analysis = result.analysis if result is not None else None
+
+    if scheduler is not None:
+        scheduler.note_result(analysis)
+    return analysis
+
+
+def _speak_product(barcode: str, recorder: SessionRecorder):
+    """Look the product up and speak its summary, sentence by sentence when streaming."""
+    global _last_result
+    t0 = time.perf_counter()
+    info = lookup_product(barcode)
+    recorder.lookup(last_lookup_source(), time.perf_counter() - t0, info)
+    spoken = []
+    started = threading.Event()
+
+    def first_started():
+        recorder.result_spoken()
+        started.set()
+
+    def say(text: str):
+        # Timed by the speech worker, not here: the result queues behind "Barcode captured."
+        speak(text, on_start=None if spoken else first_started)
+        spoken.append(text)
+
+    if LLM_STREAMING:
+        stream_product_speech(barcode, info, say)
+    else:
+        say(generate_product_speech(barcode, info))
+    metrics.observe("session.lookup_and_summary", time.perf_counter() - t0)
+    if spoken:
+        _last_result = " ".join(spoken)
+        # The session record is written when this returns
+        started.wait(TELEMETRY_SPEECH_WAIT_S)
+
+
+def _release_camera():
+    if CAMERA_WARM_STANDBY:
+        _camera.standby()
+    else:
+        _camera.close()
 
 
 def run_scan_session():
     """Read camera frames, guide user, decode barcode, speak result."""
+    # Sampled only when a profile was requested for this session
+    with metrics.maybe_profile("session"), metrics.span("session.total"):
+        _run_scan_session()
+
+
+def _run_scan_session():
     global _scanning_flag
 
-    speak("Starting scan. Sweep slowly.")
-    scanner = BarcodeScanner(CAMERA_INDEX, FRAME_WIDTH, FRAME_HEIGHT)
-    guidance_state = GuidanceState()
-    have_announced_in_frame = False
-    decoded_barcode = None
-    start_time = time.time()
+    recorder = SessionRecorder()
+    outcome = ERROR
+    pipeline = None
+
+    def say_guidance(msg: str):
+        recorder.guidance(msg)
+        speak_guidance(msg)
 
+    # Everything after this point may raise (e.g. the camera failing to
+    # open); the finally block must still clear _scanning_flag
     try:
-        while time.time() - start_time < SCAN_TIMEOUT_S:
-            frame = scanner.read()
-            if frame is None:
+        speak("Starting scan. Sweep slowly.", CONFIRMATION)
+        session_start = time.perf_counter()
+        with metrics.span("session.camera_acquire"):
+            scanner = _camera.acquire()
+        recorder.set(camera_acquire_s=round(_camera.last_acquire_s or 0.0, 4))
+        frames_at_start = scanner.capture_stats()
+        profiles = CaptureProfileController(scanner) if CAPTURE_PROFILES_ENABLED else None
+        analyzer = FrameAnalyzer()
+        pipeline = DecodePipeline(DECODE_WORKERS) if DECODE_WORKERS > 0 else None
+        tracker = BarcodeTracker()
+        scheduler = FrameScheduler() if FRAME_SCHEDULING else None
+        guidance_state = GuidanceState()
+        have_announced_in_frame = False
+        decoded_barcode = None
+        start_time = time.time()
+
+        # The ultrasonic sensor only pings while a session needs distances
+        start_distance_sampler()
+        while time.time() - start_time < SCAN_TIMEOUT_S and not _cancel_scan.is_set():
+            analysis = _next_analysis(scanner, analyzer, pipeline, scheduler)
+            if analysis is None:
                 continue
+            recorder.frame(analysis.had_any_barcode)
 
-            analysis = analyze_frame(frame)
-            distance_cm = get_distance_cm()
+            reading = latest_distance()
+            distance_cm = reading[0] if reading is not None else None
+            if HAPTIC_DISTANCE_FEEDBACK:
+                set_proximity(distance_cm)
 
             msg = guidance_message(analysis, distance_cm)
-            maybe_say(msg, guidance_state, speak)
+            maybe_say(msg, guidance_state, say_guidance)
 
             if analysis.had_any_barcode and not have_announced_in_frame:
-                buzz(1)
+                haptic("detected")
                 have_announced_in_frame = True
 
-            if analysis.decoded:
-                decoded_barcode = analysis.decoded
-                buzz(2)
-                speak("Barcode captured.")
+            # Only a validated, confirmed code goes on to the lookup
+            confirmed = tracker.update(analysis)
+            candidate = tracker.candidate()
+            if scheduler is not None and candidate:
+                scheduler.boost()
+            # Located, even if unread: move to the high-resolution decode profile
+            if profiles is not None:
+                profiles.update(analysis.located or candidate is not None)
+            if confirmed:
+                decoded_barcode = confirmed
+                metrics.observe("session.time_to_capture", time.perf_counter() - session_start)
+                recorder.decoded(decoded_barcode)
+                # The cues don't block, so queue them first: a fast (cached) result
+                # must not be preempted, and lost, by its own confirmation
+                set_proximity(None)
+                speak("Barcode captured.", CONFIRMATION)
+                haptic("captured")
+                pending_result = _post_decode.submit(_speak_product, decoded_barcode, recorder)
                 break
 
+        stats = scanner.capture_stats()
+        recorder.set(
+            frames_captured=stats["frames_captured"] - frames_at_start["frames_captured"],
+            frames_dropped=stats["frames_dropped"] - frames_at_start["frames_dropped"],
+            scheduler=dict(scheduler.stats) if scheduler is not None else None,
+            rejected_reads=tracker.rejected_reads,
+        )
+
+        # Free the camera, decode workers and sensor while the lookup is in flight
+        stop_distance_sampler()
+        if pipeline is not None:
+            pipeline.close()
+            pipeline = None
+        _release_camera()
+
         if not decoded_barcode:
-            speak("I could not read the barcode.")
+            if _cancel_scan.is_set():
+                outcome = CANCELLED
+                if not _discard_scan.is_set():
+                    metrics.count("session.cancelled")
+            else:
+                outcome = FAILED
+                metrics.count("session.failed")
+                speak("I could not read the barcode.")
             return
+        metrics.count("session.captured")
 
-        info = lookup_product(decoded_barcode)
-        speech = generate_product_speech(decoded_barcode, info)
-        time.sleep(POST_DECODE_PAUSE_S)
-        speak(speech)
+        # Queued behind "Barcode captured." and spoken as soon as it's ready
+        pending_result.result()
+        outcome = CAPTURED
     finally:
-        scanner.release()
+        stop_distance_sampler()
+        store = get_telemetry_store()
+        if _discard_scan.is_set():
+            metrics.count("session.discarded")
+        elif store is not None:
+            store.record(recorder.finish(outcome))
+        if pipeline is not None:
+            pipeline.close()
+        _release_camera()
+        set_proximity(None)
         _scanning_flag = False
         speak("Ready.")
 
@@ -93,22 +300,28 @@ def main():
     GPIO.setup(BUTTON_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)
     init_motor()
     init_ultrasonic()
+    if CAMERA_WARM_STANDBY:
+        _camera.warm()
+    prerender_phrases(FIXED_PHRASES + SESSION_PHRASES)
 
+    metrics.start_metrics_exporter()
     speak("Scanner ready. Press the trigger to begin.")
 
-    # Polling loop for button
-    prev = GPIO.input(BUTTON_PIN)
+    # Edge-triggered: the main thread sleeps until shutdown
+    button = ButtonInput(BUTTON_PIN, _on_gesture)
+    button.start()
     try:
-        while True:
-            cur = GPIO.input(BUTTON_PIN)
-            if prev == 1 and cur == 0:
-                button_pressed(None)
-            prev = cur
-            time.sleep(0.02)
+        _shutdown.wait()
     except KeyboardInterrupt:
         pass
     finally:
+        button.stop()
+        _camera.close()
         GPIO.cleanup()
+        metrics.flush()
+        store = get_telemetry_store()
+        if store is not None:
+            store.close()
 
 
 if __name__ == "__main__":
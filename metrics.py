@@ -0,0 +1,290 @@
+# metrics.py
+# Lightweight in-process instrumentation: monotonic-clock spans, per-stage
+# latency histograms (p50/p95/p99 from fixed log-spaced buckets, so memory
+# and cost per sample are constant), counters and gauges. Cheap enough to
+# leave on: a span is two perf_counter() calls, a log() and a locked add.
+#
+# The data is exposed as JSON, flushed to METRICS_PATH periodically and,
+# if METRICS_HTTP_PORT is set, served on 127.0.0.1 at /metrics. A sampling
+# profiler can be armed for the next scan session (request_profile(), the
+# /profile-next endpoint, or SCANNER_PROFILE_SESSION=1 at startup).
+
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from config import (
+    METRICS_ENABLED,
+    METRICS_PATH,
+    METRICS_FLUSH_S,
+    METRICS_HTTP_PORT,
+    PROFILE_DIR,
+    PROFILE_INTERVAL_S,
+)
+
+# Buckets grow by 10% from 1 us; 240 of them reach past 10 minutes
+_BUCKET_BASE = 1e-6
+_BUCKET_GROWTH = 1.1
+_BUCKET_COUNT = 240
+_LOG_GROWTH = math.log(_BUCKET_GROWTH)
+
+
+class Histogram:
+    __slots__ = ("_lock", "_buckets", "count", "total", "max")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = [0] * _BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        if seconds <= _BUCKET_BASE:
+            i = 0
+        else:
+            i = min(_BUCKET_COUNT - 1, int(math.log(seconds / _BUCKET_BASE) / _LOG_GROWTH) + 1)
+        with self._lock:
+            self._buckets[i] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper edge of the bucket holding the q-quantile (within 10%)."""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q * self.count
+            seen = 0
+            for i, n in enumerate(self._buckets):
+                seen += n
+                if seen >= rank and n:
+                    return min(self.max, _BUCKET_BASE * _BUCKET_GROWTH ** i)
+            return self.max
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        ms = lambda v: None if v is None else round(1000.0 * v, 3)
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.total / self.count) if self.count else None,
+            "p50_ms": ms(self.percentile(0.50)),
+            "p95_ms": ms(self.percentile(0.95)),
+            "p99_ms": ms(self.percentile(0.99)),
+            "max_ms": ms(self.max) if self.count else None,
+        }
+
+
+_registry_lock = threading.Lock()
+_histograms: Dict[str, Histogram] = {}
+_counters: Counter = Counter()
+_gauges: Dict[str, float] = {}
+_started_at = time.time()
+
+
+def _histogram(name: str) -> Histogram:
+    h = _histograms.get(name)
+    if h is None:
+        with _registry_lock:
+            h = _histograms.setdefault(name, Histogram())
+    return h
+
+
+def observe(name: str, seconds: float):
+    """Record a duration measured elsewhere (e.g. queue wait)."""
+    if METRICS_ENABLED:
+        _histogram(name).observe(seconds)
+
+
+def count(name: str, n: int = 1):
+    if METRICS_ENABLED:
+        with _registry_lock:
+            _counters[name] += n
+
+
+def gauge(name: str, value: float):
+    if METRICS_ENABLED:
+        _gauges[name] = value
+
+
+@contextmanager
+def span(name: str):
+    """Time the enclosed block into the histogram called name."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _histogram(name).observe(time.perf_counter() - t0)
+
+
+def snapshot() -> dict:
+    with _registry_lock:
+        counters = dict(_counters)
+        names = list(_histograms)
+    return {
+        "time": time.time(),
+        "uptime_s": time.time() - _started_at,
+        "counters": counters,
+        "gauges": dict(_gauges),
+        "histograms": {n: _histograms[n].summary() for n in sorted(names)},
+    }
+
+
+def reset():
+    with _registry_lock:
+        _histograms.clear()
+        _counters.clear()
+        _gauges.clear()
+
+
+# -- export ------------------------------------------------------------
+
+def flush(path: str = METRICS_PATH):
+    if not path:
+        return
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w") as f:
+            json.dump(snapshot(), f, indent=1)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+_exporter_started = False
+
+
+def start_metrics_exporter():
+    """Flush to METRICS_PATH every METRICS_FLUSH_S and serve METRICS_HTTP_PORT if set."""
+    global _exporter_started
+    if not METRICS_ENABLED or _exporter_started:
+        return
+    _exporter_started = True
+
+    if METRICS_PATH and METRICS_FLUSH_S:
+        def flusher():
+            while True:
+                time.sleep(METRICS_FLUSH_S)
+                flush()
+        threading.Thread(target=flusher, name="metrics-flush", daemon=True).start()
+
+    if METRICS_HTTP_PORT:
+        try:
+            _start_http(METRICS_HTTP_PORT)
+        except OSError:
+            pass
+
+    if os.getenv("SCANNER_PROFILE_SESSION") == "1":
+        request_profile()
+
+
+def _start_http(port: int):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics"):
+                body = json.dumps(snapshot(), indent=1).encode("utf-8")
+            elif self.path.startswith("/profile-next"):
+                request_profile()
+                body = b'{"profile": "armed for the next scan session"}'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+
+
+# -- sampling profiler -------------------------------------------------
+
+class SamplingProfiler:
+    """
+    Samples every thread's Python stack at a fixed interval and counts
+    collapsed stacks ("a;b;c N" lines, the flamegraph.pl input format).
+    """
+
+    def __init__(self, interval_s: float = PROFILE_INTERVAL_S):
+        self.interval_s = interval_s
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval_s):
+            for t in threading.enumerate():
+                names[t.ident] = t.name
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                parts.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(parts))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def write(self, path: str):
+        with open(path, "w") as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+
+
+_profile_requested = threading.Event()
+
+
+def request_profile():
+    """Profile the next scan session only."""
+    _profile_requested.set()
+
+
+@contextmanager
+def maybe_profile(label: str):
+    """Run the block under the sampling profiler if one was requested."""
+    if not _profile_requested.is_set():
+        yield None
+        return
+    _profile_requested.clear()
+    profiler = SamplingProfiler()
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            profiler.write(os.path.join(PROFILE_DIR, f"{label}-{int(time.time())}.folded"))
+        except OSError:
+            pass
@@ -1,25 +1,193 @@
 # motor.py
 # Drive the vibration motor using a single GPIO pin.
+# A worker thread plays haptic patterns so callers never sleep: patterns are
+# lists of (intensity, ms) steps played through GPIO.PWM, queued by priority,
+# and a higher-priority pattern cuts off whatever is playing. When nothing
+# is queued, an optional proximity pulse follows the distance to the shelf.
+# Software PWM runs a busy thread, so it is only started while the worker
+# has something to play.
 
+import heapq
+import itertools
+import threading
 import time
-import RPi.GPIO as GPIO
-from config import VIBRATOR_PIN, BUZZ_MS_SHORT, BUZZ_GAP_MS
+from typing import Dict, List, Optional, Tuple
+
+from hardware import GPIO
+from config import (
+    VIBRATOR_PIN,
+    BUZZ_MS_SHORT,
+    BUZZ_GAP_MS,
+    HAPTIC_PWM_HZ,
+    HAPTIC_PROXIMITY_PULSE_MS,
+    HAPTIC_PROXIMITY_INTERVAL_MS,
+    MIN_DISTANCE_CM,
+    MAX_DISTANCE_CM,
+)
+
+Step = Tuple[float, int]    # (intensity 0..1, duration ms)
+
+
+def _pulses(n: int, ms: int = BUZZ_MS_SHORT, gap_ms: int = BUZZ_GAP_MS, level: float = 1.0) -> List[Step]:
+    steps: List[Step] = []
+    for i in range(n):
+        steps.append((level, ms))
+        if i < n - 1:
+            steps.append((0.0, gap_ms))
+    return steps
+
+
+def ramp(start: float, end: float, ms: int, steps: int = 8) -> List[Step]:
+    """Linear intensity ramp split into PWM steps."""
+    steps = max(1, steps)
+    return [(start + (end - start) * (i + 1) / steps, ms // steps) for i in range(steps)]
+
+
+# Named patterns: (priority, steps). Higher priority preempts lower.
+PATTERNS: Dict[str, Tuple[int, List[Step]]] = {
+    "detected": (1, _pulses(1, ms=80)),
+    "captured": (2, _pulses(2)),
+    "error": (2, _pulses(3, ms=60, gap_ms=60)),
+    "cancelled": (2, ramp(1.0, 0.0, 400)),
+    "ready": (1, ramp(0.2, 1.0, 300)),
+}
+
+_cond = threading.Condition()
+_queue: list = []
+_order = itertools.count()
+_current_priority: Optional[int] = None
+_preempt = False
+_worker: Optional[threading.Thread] = None
+_pwm = None
+_pwm_running = False
+_proximity_cm: Optional[float] = None
 
 
 def init_motor():
+    global _worker
     GPIO.setup(VIBRATOR_PIN, GPIO.OUT, initial=GPIO.LOW)
+    with _cond:
+        if _worker is None:
+            _worker = threading.Thread(target=_haptic_worker, name="haptics", daemon=True)
+            _worker.start()
 
 
-def _pulse(ms: int):
-    GPIO.output(VIBRATOR_PIN, GPIO.HIGH)
-    time.sleep(ms / 1000.0)
+def _pwm_start():
+    """Start the PWM carrier (creating it on first use) before a pattern plays."""
+    global _pwm, _pwm_running
+    if _pwm_running:
+        return
+    try:
+        if _pwm is None:
+            _pwm = GPIO.PWM(VIBRATOR_PIN, HAPTIC_PWM_HZ)
+        _pwm.start(0)
+        _pwm_running = True
+    except Exception:
+        # No PWM: any non-zero intensity is just "on"
+        _pwm = None
+
+
+def _pwm_stop():
+    """Stop the PWM carrier once nothing is left to play."""
+    global _pwm_running
+    if not _pwm_running:
+        return
+    try:
+        _pwm.stop()
+    except Exception:
+        pass
+    _pwm_running = False
     GPIO.output(VIBRATOR_PIN, GPIO.LOW)
 
 
+def _set_level(level: float):
+    if _pwm_running:
+        _pwm.ChangeDutyCycle(max(0.0, min(1.0, level)) * 100.0)
+    else:
+        GPIO.output(VIBRATOR_PIN, GPIO.HIGH if level > 0 else GPIO.LOW)
+
+
+def _proximity_steps(distance_cm: float) -> List[Step]:
+    """One short pulse followed by a gap that shrinks as the shelf gets closer."""
+    lo, hi = HAPTIC_PROXIMITY_INTERVAL_MS
+    span = max(1.0, MAX_DISTANCE_CM - MIN_DISTANCE_CM)
+    t = max(0.0, min(1.0, (distance_cm - MIN_DISTANCE_CM) / span))
+    return [(1.0, HAPTIC_PROXIMITY_PULSE_MS), (0.0, int(lo + (hi - lo) * t))]
+
+
+def _next_pattern() -> Tuple[int, List[Step]]:
+    global _current_priority, _preempt
+    with _cond:
+        if not _queue and _proximity_cm is None:
+            _pwm_stop()
+        while not _queue and _proximity_cm is None:
+            _cond.wait()
+        _preempt = False
+        if _queue:
+            prio, _, steps = heapq.heappop(_queue)
+            _current_priority = -prio
+            return -prio, steps
+        _current_priority = -1
+        return -1, _proximity_steps(_proximity_cm)
+
+
+def _haptic_worker():
+    global _current_priority
+    while True:
+        _, steps = _next_pattern()
+        try:
+            _pwm_start()
+            for level, ms in steps:
+                _set_level(level)
+                # Wait on the condition so a preempting pattern cuts in immediately
+                deadline = time.monotonic() + ms / 1000.0
+                with _cond:
+                    while not _preempt:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        _cond.wait(remaining)
+                    if _preempt:
+                        break
+        except Exception:
+            pass
+        finally:
+            try:
+                _set_level(0.0)
+            except Exception:
+                pass
+            with _cond:
+                _current_priority = None
+
+
+def play(pattern, priority: Optional[int] = None):
+    """
+    Queue a named pattern (or a list of steps) and return immediately.
+    A pattern with higher priority than the one playing interrupts it.
+    """
+    global _preempt
+    if isinstance(pattern, str):
+        default_prio, steps = PATTERNS[pattern]
+    else:
+        default_prio, steps = 1, list(pattern)
+    prio = default_prio if priority is None else priority
+    with _cond:
+        heapq.heappush(_queue, (-prio, next(_order), steps))
+        if _current_priority is not None and prio > _current_priority:
+            _preempt = True
+        _cond.notify_all()
+
+
+def set_proximity(distance_cm: Optional[float]):
+    """Follow distance with background pulses (faster when closer); None stops them."""
+    global _proximity_cm, _preempt
+    with _cond:
+        _proximity_cm = float(distance_cm) if distance_cm is not None else None
+        if _proximity_cm is None and _current_priority == -1:
+            _preempt = True
+        _cond.notify_all()
+
+
 def buzz(times: int = 1):
-    """Buzz the motor 'times' times with a short gap."""
-    times = max(1, int(times))
-    for i in range(times):
-        _pulse(BUZZ_MS_SHORT)
-        if i < times - 1:
-            time.sleep(BUZZ_GAP_MS / 1000.0)
+    """Buzz the motor 'times' times with a short gap, without blocking the caller."""
+    play(_pulses(max(1, int(times))))
@@ -0,0 +1,160 @@
+# offline_index.py
+# Read-only, memory-mapped barcode index over a local OpenFoodFacts extract.
+#
+# On-disk layout (written by import_off_dump.py):
+#   products.dat  concatenated zlib-compressed JSON records
+#   products.idx  header + entries sorted by key, each entry being a
+#                 14-byte zero-padded GTIN, a uint64 offset and a uint32
+#                 length into products.dat
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Optional, Dict, Any, Iterator, Tuple
+
+from config import OFFLINE_INDEX_DIR
+
+
+INDEX_MAGIC = b"OFFIDX1\0"
+HEADER = struct.Struct("<8sQ")      # magic, entry count
+ENTRY = struct.Struct("<14sQI")     # key, data offset, data length
+KEY_LEN = 14
+
+DATA_NAME = "products.dat"
+INDEX_NAME = "products.idx"
+
+# How often the shared index checks whether an importer replaced the files
+_RELOAD_CHECK_S = 60.0
+
+
+def index_key(barcode) -> Optional[bytes]:
+    """Canonical index key: digits only, zero-padded to GTIN-14."""
+    code = str(barcode or "").strip()
+    if not code.isdigit() or len(code) > KEY_LEN:
+        return None
+    return code.zfill(KEY_LEN).encode("ascii")
+
+
+def encode_record(record: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(record, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def decode_record(blob: bytes) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(zlib.decompress(blob).decode("utf-8"))
+    except Exception:
+        return None
+
+
+def iter_index_entries(path: str) -> Iterator[Tuple[bytes, int, int]]:
+    """Stream (key, offset, length) entries from an index file in key order."""
+    with open(path, "rb") as f:
+        magic, count = HEADER.unpack(f.read(HEADER.size))
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"{path} is not an offline product index")
+        remaining = count
+        while remaining:
+            n = min(remaining, 65536)
+            yield from ENTRY.iter_unpack(f.read(n * ENTRY.size))
+            remaining -= n
+
+
+class OfflineIndex:
+    """Binary search over a memory-mapped, sorted barcode index."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.index_path = os.path.join(directory, INDEX_NAME)
+        self.data_path = os.path.join(directory, DATA_NAME)
+        self._files = []
+        self._idx = None
+        self._dat = None
+        self.count = 0
+        self.signature = None
+        self._open()
+
+    def _open(self):
+        st = os.stat(self.index_path)
+        idx_f = open(self.index_path, "rb")
+        dat_f = open(self.data_path, "rb")
+        self._files = [idx_f, dat_f]
+        self._idx = mmap.mmap(idx_f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._dat = mmap.mmap(dat_f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self._idx, 0)
+        if magic != INDEX_MAGIC:
+            self.close()
+            raise ValueError(f"{self.index_path} is not an offline product index")
+        self.count = count
+        self.signature = (st.st_ino, st.st_mtime_ns)
+
+    def _key_at(self, i: int) -> bytes:
+        start = HEADER.size + i * ENTRY.size
+        return self._idx[start:start + KEY_LEN]
+
+    def get(self, barcode) -> Optional[Dict[str, Any]]:
+        """Return the stored product record for a barcode, or None."""
+        key = index_key(barcode)
+        if key is None or self._idx is None:
+            return None
+
+        try:
+            lo, hi = 0, self.count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._key_at(mid) < key:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo >= self.count or self._key_at(lo) != key:
+                return None
+
+            _, offset, length = ENTRY.unpack_from(self._idx, HEADER.size + lo * ENTRY.size)
+            raw = self._dat[offset:offset + length]
+        except (ValueError, TypeError):
+            # Closed under us by a reload (see get_offline_index); treat as a miss
+            return None
+        return decode_record(raw)
+
+    def close(self):
+        for m in (self._idx, self._dat):
+            if m is not None:
+                m.close()
+        for f in self._files:
+            f.close()
+        self._idx = self._dat = None
+        self._files = []
+
+
+_index: Optional[OfflineIndex] = None
+_index_checked_at = 0.0
+_index_lock = threading.Lock()
+
+
+def get_offline_index() -> Optional[OfflineIndex]:
+    """Return the shared index, reopening it if an importer replaced the files."""
+    global _index, _index_checked_at
+    if not OFFLINE_INDEX_DIR:
+        return None
+    now = time.monotonic()
+    with _index_lock:
+        if _index is not None and now - _index_checked_at < _RELOAD_CHECK_S:
+            return _index
+        _index_checked_at = now
+        try:
+            st = os.stat(os.path.join(OFFLINE_INDEX_DIR, INDEX_NAME))
+        except OSError:
+            return _index
+        if _index is None or _index.signature != (st.st_ino, st.st_mtime_ns):
+            try:
+                fresh = OfflineIndex(OFFLINE_INDEX_DIR)
+            except Exception:
+                return _index
+            # Release the replaced files' maps and handles, or every reload leaks them
+            stale, _index = _index, fresh
+            if stale is not None:
+                stale.close()
+        return _index
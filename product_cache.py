@@ -0,0 +1,163 @@
+# product_cache.py
+# Persistent on-device cache of normalized product dicts, keyed by barcode.
+# SQLite-backed with TTL refresh, LRU eviction and negative caching.
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any, Tuple
+
+from config import (
+    PRODUCT_CACHE_PATH,
+    PRODUCT_CACHE_MAX_ENTRIES,
+    PRODUCT_CACHE_TTL_S,
+    PRODUCT_CACHE_NEGATIVE_TTL_S,
+)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    barcode     TEXT PRIMARY KEY,
+    payload     TEXT,
+    stored_at   REAL NOT NULL,
+    last_access REAL NOT NULL
+)
+"""
+
+
+class ProductCache:
+    """
+    Disk-backed barcode -> product cache.
+
+    A stored payload of NULL is a negative entry ("OFF has no such product")
+    and expires after the shorter negative TTL.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl_s: float, negative_ttl_s: float):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = float(ttl_s)
+        self.negative_ttl_s = float(negative_ttl_s)
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_SCHEMA)
+        self._db.execute("CREATE INDEX IF NOT EXISTS products_lru ON products(last_access)")
+
+    def get(self, barcode: str, allow_stale: bool = False) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Return (hit, product). product is None for a cached negative entry.
+        Expired entries count as misses unless allow_stale is set.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload, stored_at FROM products WHERE barcode = ?", (barcode,)
+            ).fetchone()
+            if row is None:
+                if not allow_stale:
+                    self.misses += 1
+                return False, None
+
+            payload, stored_at = row
+            ttl = self.ttl_s if payload is not None else self.negative_ttl_s
+            if now - stored_at > ttl and not allow_stale:
+                self.misses += 1
+                return False, None
+
+            self._db.execute(
+                "UPDATE products SET last_access = ? WHERE barcode = ?", (now, barcode)
+            )
+            if allow_stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+
+        if payload is None:
+            return True, None
+        try:
+            return True, json.loads(payload)
+        except Exception:
+            return False, None
+
+    def peek(self, barcode: str) -> Optional[Dict[str, Any]]:
+        """Stored product regardless of age, without touching counters or LRU order."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload FROM products WHERE barcode = ?", (barcode,)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        try:
+            return json.loads(row[0])
+        except Exception:
+            return None
+
+    def put(self, barcode: str, product: Optional[Dict[str, Any]]):
+        """Store a product dict, or None to record a negative entry."""
+        payload = None if product is None else json.dumps(product, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO products (barcode, payload, stored_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (barcode, payload, now, now),
+            )
+            self._evict_locked()
+
+    def _evict_locked(self):
+        (count,) = self._db.execute("SELECT COUNT(*) FROM products").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        self._db.execute(
+            "DELETE FROM products WHERE barcode IN "
+            "(SELECT barcode FROM products ORDER BY last_access ASC LIMIT ?)",
+            (excess,),
+        )
+        self.evictions += excess
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM products").fetchone()
+            return {
+                "entries": count,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "evictions": self.evictions,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_cache: Optional[ProductCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_product_cache() -> Optional[ProductCache]:
+    """Return the process-wide cache, or None if disabled or unavailable."""
+    global _cache
+    if not PRODUCT_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = ProductCache(
+                    PRODUCT_CACHE_PATH,
+                    PRODUCT_CACHE_MAX_ENTRIES,
+                    PRODUCT_CACHE_TTL_S,
+                    PRODUCT_CACHE_NEGATIVE_TTL_S,
+                )
+            except Exception:
+                return None
+        return _cache
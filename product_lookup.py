@@ -3,13 +3,28 @@
 # optionally estimate typical values via OpenAI.
 
 import json
-import os
 import ssl
-import urllib.request
+import threading
 import urllib.parse
-from typing import Optional, Dict, Any, List
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
 
-from config import OPENFOODFACTS_BASE, OPENAI_API_KEY_ENV, OPENAI_MODEL
+from config import (
+    OPENFOODFACTS_BASE,
+    OPENAI_MODEL,
+    OFF_POOL_SIZE,
+    OFF_LATENCY_BUDGET_S,
+    OFF_HEDGE_AFTER_S,
+    OFF_BREAKER_THRESHOLD,
+    OFF_BREAKER_BACKOFF_S,
+    OFF_BREAKER_BACKOFF_MAX_S,
+)
+from http_transport import PooledHttpClient
+from ai_client import get_ai_client, cached_response_text, store_response_text
+from product_cache import get_product_cache
+from offline_index import get_offline_index
+from category_nutrition import NUTRITION_KEYS, get_category_table
+import metrics
 
 
 _ssl_ctx = ssl.create_default_context()
@@ -41,20 +56,53 @@ def _build_off_url(barcode: str) -> str:
     return f"{OPENFOODFACTS_BASE}/{barcode}.json?{qs}"
 
 
-def _http_get_json(url: str, timeout: float = 8.0) -> Optional[Dict[str, Any]]:
-    req = urllib.request.Request(
-        url,
-        headers={
-            "User-Agent": "ASU-Assistive-Scanner/1.1 (edu project)",
-            "Accept": "application/json",
-        },
-    )
-    with urllib.request.urlopen(req, timeout=timeout, context=_ssl_ctx) as r:
-        data = r.read().decode("utf-8", "ignore")
+# Runs the AI estimate alongside the OFF fetch when it will probably be needed
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="lookup")
+
+_transport: Optional[PooledHttpClient] = None
+# Where this thread's last lookup_product answer came from (see last_lookup_source)
+_last_source = threading.local()
+_transport_lock = threading.Lock()
+
+
+def _off_transport() -> PooledHttpClient:
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = PooledHttpClient(
+                pool_size=OFF_POOL_SIZE,
+                hedge_after_s=OFF_HEDGE_AFTER_S,
+                failure_threshold=OFF_BREAKER_THRESHOLD,
+                backoff_s=OFF_BREAKER_BACKOFF_S,
+                backoff_max_s=OFF_BREAKER_BACKOFF_MAX_S,
+                ssl_context=_ssl_ctx,
+                headers={
+                    "User-Agent": "ASU-Assistive-Scanner/1.1 (edu project)",
+                    "Accept": "application/json",
+                },
+            )
+        return _transport
+
+
+def _fetch_off_product(barcode: str) -> Tuple[Dict[str, Any], bool]:
+    """Return (raw OFF product or {}, whether OFF actually answered)."""
     try:
-        return json.loads(data)
+        status, body = _off_transport().get(_build_off_url(barcode), budget_s=OFF_LATENCY_BUDGET_S)
     except Exception:
-        return None
+        # Unreachable, over budget, or the circuit breaker is open
+        return {}, False
+    if status == 404:
+        # OFF answers unknown barcodes with a 404 and a JSON status body
+        return {}, True
+    if status != 200:
+        return {}, False
+    try:
+        data = json.loads(body.decode("utf-8", "ignore"))
+    except Exception:
+        return {}, False
+    if not isinstance(data, dict):
+        return {}, False
+    return data.get("product") or {}, True
 
 
 def _normalize_off_product(p: Dict[str, Any]) -> Dict[str, Any]:
@@ -68,21 +116,20 @@ def _normalize_off_product(p: Dict[str, Any]) -> Dict[str, Any]:
 
 
 def _ai_client_or_none():
-    key = os.getenv(OPENAI_API_KEY_ENV)
-    if not key:
-        return None
+    return get_ai_client()
+
+
+def _parse_estimate(raw: str) -> Optional[Dict[str, Any]]:
     try:
-        from openai import OpenAI
-        return OpenAI(api_key=key)
+        obj = json.loads(raw)
     except Exception:
         return None
+    if not isinstance(obj, dict) or "nutriments" not in obj or not isinstance(obj["nutriments"], dict):
+        return None
+    return obj
 
 
 def _estimate_nutrition_with_ai(name: str | None, brand: str | None, cats: list[str]) -> Optional[Dict[str, Any]]:
-    client = _ai_client_or_none()
-    if not client:
-        return None
-
     cats_text = ", ".join(c.replace("en:", "").replace("-", " ") for c in (cats or [])) or "unknown category"
     title = " ".join(x for x in [brand, name] if x) or "Unknown product"
 
@@ -115,47 +162,94 @@ def _estimate_nutrition_with_ai(name: str | None, brand: str | None, cats: list[
     }}
     """
 
+    prompt = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+    # Same title and categories -> same prompt -> reuse the earlier answer
+    raw = cached_response_text(OPENAI_MODEL, prompt)
+    if raw is not None:
+        metrics.count("lookup.ai_estimate.cached")
+        return _parse_estimate(raw)
+
+    client = _ai_client_or_none()
+    if not client:
+        return None
     try:
-        resp = client.responses.create(
-            model=OPENAI_MODEL,
-            input=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": user},
-            ],
-        )
+        with metrics.span("lookup.ai_estimate"):
+            resp = client.responses.create(model=OPENAI_MODEL, input=prompt)
         raw = (resp.output_text or "").strip()
-        obj = json.loads(raw)
-        if not isinstance(obj, dict) or "nutriments" not in obj or not isinstance(obj["nutriments"], dict):
-            return None
-        return obj
     except Exception:
+        metrics.count("lookup.ai_estimate.error")
         return None
+    obj = _parse_estimate(raw)
+    if obj is not None:
+        store_response_text(OPENAI_MODEL, prompt, raw)
+    return obj
 
 
 def _has_real_nutrition(p: Dict[str, Any]) -> bool:
     n = p.get("nutriments") or {}
-    keys = [
-        "energy-kcal_100g",
-        "proteins_100g",
-        "carbohydrates_100g",
-        "sugars_100g",
-        "fat_100g",
-        "saturated-fat_100g",
-        "fiber_100g",
-        "sodium_100g",
-    ]
-    return any(k in n and n[k] not in (None, "", 0) for k in keys)
+    return any(k in n and n[k] not in (None, "", 0) for k in NUTRITION_KEYS)
 
 
-def lookup_product(barcode: str) -> Optional[Dict[str, Any]]:
-    """Return a normalized product dict, possibly with estimated nutriments."""
-    # 1) Try OpenFoodFacts
-    try:
-        data = _http_get_json(_build_off_url(barcode))
-    except Exception:
-        data = None
+def _category_estimate(cats: List[str]) -> Optional[Dict[str, Any]]:
+    """Category-average nutriments for the most specific known category, if any."""
+    table = get_category_table()
+    return table.estimate(cats) if table is not None and cats else None
+
+
+def _nutrition_likely_missing(barcode: str, hint: Optional[Dict[str, Any]]) -> bool:
+    """Guess, before OFF answers, whether we'll end up estimating nutrition."""
+    if hint is not None:
+        return bool(hint.get("estimated")) or not _has_real_nutrition(hint)
+    code = barcode.strip()
+    # Restricted-circulation GTINs (EAN-13 prefix 2x, UPC-A number systems 2 and 4,
+    # which are 02x / 04x once written as EAN-13) are store-internal codes OFF never has
+    if len(code) == 12:
+        code = "0" + code
+    return len(code) == 13 and (code[0] == "2" or code[:2] in ("02", "04"))
+
+
+def _estimate_key(name: Optional[str], brand: Optional[str], cats: List[str]) -> Tuple:
+    """What an AI estimate was asked about; see _complete_product."""
+    return (name or None, brand or None, tuple(cats or ()))
+
+
+def _complete_product(barcode: str, product: Dict[str, Any],
+                      early_estimate: Optional[Tuple[Tuple, Future]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Normalize a raw OFF product and fill in estimated nutrition if needed.
+    early_estimate is (_estimate_key, future) for an AI estimate already
+    started in parallel with the OFF fetch. It is only used if it was asked
+    about the same name, brand and categories as the product OFF returned;
+    otherwise it is discarded and the AI is asked about this product.
+    The category table is consulted first; the AI is only asked when no
+    category matches, and its answer then seeds the table.
+    """
+    def estimate(name, brand, cats):
+        est = _category_estimate(cats)
+        if est is not None:
+            metrics.count("lookup.category_estimate")
+            return est
+        if early_estimate is not None and early_estimate[0] == _estimate_key(name, brand, cats):
+            try:
+                est = early_estimate[1].result()
+            except Exception:
+                est = None
+        else:
+            if early_estimate is not None:
+                # Built from a stale hint; its answer is about some other product
+                early_estimate[1].cancel()
+                metrics.count("lookup.early_estimate.discarded")
+            est = _estimate_nutrition_with_ai(name=name, brand=brand, cats=cats)
+        # est was asked about exactly these categories, so it may seed them
+        table = get_category_table()
+        if est and cats and table is not None:
+            table.record(cats, est)
+        return est
 
-    product = (data or {}).get("product") or {}
     if product:
         product = _normalize_off_product(product)
 
@@ -165,7 +259,7 @@ def lookup_product(barcode: str) -> Optional[Dict[str, Any]]:
         return product
 
     if product and not _has_real_nutrition(product):
-        est = _estimate_nutrition_with_ai(
+        est = estimate(
             name=product.get("name"),
             brand=product.get("brand"),
             cats=product.get("categories_tags") or product.get("categories_hierarchy") or [],
@@ -189,8 +283,8 @@ def lookup_product(barcode: str) -> Optional[Dict[str, Any]]:
         product["estimation_note"] = "No nutrition facts found."
         return product
 
-    # 2) No OFF record at all; optionally estimate a generic shell
-    est = _estimate_nutrition_with_ai(name=None, brand=None, cats=[])
+    # No OFF record at all; optionally estimate a generic shell
+    est = estimate(name=None, brand=None, cats=[])
     if est:
         shell = {
             "code": barcode,
@@ -206,5 +300,72 @@ def lookup_product(barcode: str) -> Optional[Dict[str, Any]]:
         }
         return shell
 
-    # 3) Total failure
+    # Total failure
     return None
+
+
+def lookup_product(barcode: str) -> Optional[Dict[str, Any]]:
+    """Return a normalized product dict, possibly with estimated nutriments."""
+    with metrics.span("lookup.total"):
+        result, _last_source.value = _lookup_product(barcode)
+    return result
+
+
+def last_lookup_source() -> Optional[str]:
+    """
+    Source of the calling thread's most recent lookup_product result:
+    "cache", "offline", "network", "stale" (expired cache entry while OFF
+    was unreachable) or "unreachable".
+    """
+    return getattr(_last_source, "value", None)
+
+
+def _lookup_product(barcode: str) -> Tuple[Optional[Dict[str, Any]], str]:
+    cache = get_product_cache()
+
+    # 1) Fresh cache entry: whatever the first scan answered, including the
+    # estimated shell for a barcode OFF doesn't know. A negative entry means
+    # there was nothing to say at all (no record and no estimate).
+    if cache is not None:
+        hit, cached = cache.get(barcode)
+        if hit:
+            metrics.count("lookup.source.cache")
+            return cached, "cache"
+
+    # 2) Local OFF extract, then the network for barcodes it doesn't have
+    index = get_offline_index()
+    product = index.get(barcode) if index is not None else None
+    early_estimate = None
+    if product:
+        metrics.count("lookup.source.offline")
+        reached = True
+        source = "offline"
+    else:
+        # Overlap the AI estimate with the network fetch when it looks needed
+        hint = cache.peek(barcode) if cache is not None else None
+        if _nutrition_likely_missing(barcode, hint):
+            hint = hint or {}
+            cats = hint.get("categories_tags") or hint.get("categories_hierarchy") or []
+            # A category match answers locally; no need to race the AI
+            if _category_estimate(cats) is None:
+                early_estimate = (
+                    _estimate_key(hint.get("name"), hint.get("brand"), cats),
+                    _executor.submit(_estimate_nutrition_with_ai, hint.get("name"), hint.get("brand"), cats),
+                )
+        with metrics.span("lookup.off_fetch"):
+            product, reached = _fetch_off_product(barcode)
+        source = "network" if reached else "unreachable"
+        metrics.count("lookup.source.network" if reached else "lookup.off_unreachable")
+
+    # 3) OFF unreachable: fall back to an expired entry rather than nothing
+    if not reached and cache is not None:
+        hit, cached = cache.get(barcode, allow_stale=True)
+        if hit and cached is not None:
+            metrics.count("lookup.stale_fallback")
+            return cached, "stale"
+
+    result = _complete_product(barcode, product, early_estimate)
+    if cache is not None and reached:
+        # Store the answer as given so a repeat scan says the same thing
+        cache.put(barcode, result)
+    return result, source
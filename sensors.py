@@ -1,9 +1,21 @@
 # sensors.py
 # Ultrasonic distance measurement for HC-SR04-style sensor.
 
+import statistics
+import threading
 import time
-import RPi.GPIO as GPIO
-from config import US_TRIG_PIN, US_ECHO_PIN
+from collections import deque
+from typing import Optional, Tuple
+from hardware import GPIO
+import metrics
+from config import (
+    US_TRIG_PIN,
+    US_ECHO_PIN,
+    US_SAMPLE_INTERVAL_S,
+    US_HISTORY,
+    US_MAX_SAMPLE_AGE_S,
+    US_VALID_RANGE_CM,
+)
 
 
 def init_ultrasonic():
@@ -12,7 +24,15 @@ def init_ultrasonic():
 
 
 def get_distance_cm(timeout: float = 0.04):
-    """Return distance in cm, or None if timeout."""
+    """
+    Return distance in cm, or None if timeout. Blocks the caller for up to
+    ~130 ms; the scan loop uses DistanceSampler / latest_distance() instead.
+    """
+    with metrics.span("sensor.blocking_read"):
+        return _read_distance_cm(timeout)
+
+
+def _read_distance_cm(timeout: float):
     # Settle
     GPIO.output(US_TRIG_PIN, GPIO.LOW)
     time.sleep(0.05)
@@ -37,3 +57,132 @@ def get_distance_cm(timeout: float = 0.04):
     # Speed of sound ~34300 cm/s
     distance = (duration * 34300) / 2.0
     return distance
+
+
+class DistanceSampler:
+    """
+    Background ultrasonic sampler. Pings on its own thread, times the echo
+    from GPIO edge callbacks instead of spinning on the pin, and keeps a
+    short history so readers get a median-filtered distance without waiting.
+    Runs only while a scan session needs it (start/stop).
+    """
+
+    def __init__(self, interval_s: float = US_SAMPLE_INTERVAL_S,
+                 history: int = US_HISTORY, timeout: float = 0.04):
+        self.interval_s = interval_s
+        self.timeout = timeout
+        self._history = deque(maxlen=max(1, int(history)))
+        self._lock = threading.Lock()
+        self._echo_done = threading.Event()
+        self._stop = threading.Event()
+        self._triggered_at = float("inf")
+        self._rise: Optional[float] = None
+        self._fall: Optional[float] = None
+        self._running = False
+        self._thread = None
+        self.samples = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    def _on_edge(self, channel):
+        now = time.perf_counter()
+        # Read the level instead of assuming edges alternate: a late echo from
+        # the previous ping must not be timed as the start of this one
+        if GPIO.input(US_ECHO_PIN) == GPIO.HIGH:
+            if now >= self._triggered_at and self._rise is None:
+                self._rise = now
+        elif self._rise is not None and self._fall is None:
+            self._fall = now
+            self._echo_done.set()
+
+    def _ping(self) -> Optional[float]:
+        self._rise = self._fall = None
+        self._echo_done.clear()
+        self._triggered_at = time.perf_counter()
+        GPIO.output(US_TRIG_PIN, GPIO.HIGH)
+        time.sleep(10e-6)
+        GPIO.output(US_TRIG_PIN, GPIO.LOW)
+
+        if not self._echo_done.wait(self.timeout * 2):
+            return None
+        return ((self._fall - self._rise) * 34300) / 2.0
+
+    def _loop(self):
+        while self._running:
+            started = time.monotonic()
+            distance = self._ping()
+            metrics.observe("sensor.ping", time.monotonic() - started)
+            with self._lock:
+                if distance is None:
+                    self.timeouts += 1
+                    metrics.count("sensor.timeout")
+                elif US_VALID_RANGE_CM[0] <= distance <= US_VALID_RANGE_CM[1]:
+                    self._history.append((time.monotonic(), distance))
+                    self.samples += 1
+                    metrics.count("sensor.sample")
+                else:
+                    self.rejected += 1
+                    metrics.count("sensor.rejected")
+            # Leave time for stray echoes to die out before the next ping
+            self._stop.wait(max(0.0, self.interval_s - (time.monotonic() - started)))
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            # Readings from the previous session describe a different scene
+            self._history.clear()
+        GPIO.output(US_TRIG_PIN, GPIO.LOW)
+        GPIO.add_event_detect(US_ECHO_PIN, GPIO.BOTH, callback=self._on_edge)
+        self._stop.clear()
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._running = False
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+        GPIO.remove_event_detect(US_ECHO_PIN)
+
+    def latest_distance(self) -> Optional[Tuple[float, float]]:
+        """Return (median distance in cm, age of newest sample in s), or None."""
+        now = time.monotonic()
+        with self._lock:
+            recent = [d for (t, d) in self._history if now - t <= US_MAX_SAMPLE_AGE_S]
+            newest = self._history[-1][0] if self._history else None
+        if not recent:
+            return None
+        return statistics.median(recent), now - newest
+
+
+_sampler: Optional[DistanceSampler] = None
+_sampler_lock = threading.Lock()
+
+
+def start_distance_sampler() -> DistanceSampler:
+    """Start (or restart) the shared background sampler; call after init_ultrasonic."""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = DistanceSampler()
+        _sampler.start()
+        return _sampler
+
+
+def stop_distance_sampler():
+    """Stop pinging, e.g. when a scan session ends, so the idle device stays quiet."""
+    with _sampler_lock:
+        if _sampler is not None:
+            _sampler.stop()
+
+
+def latest_distance() -> Optional[Tuple[float, float]]:
+    """Non-blocking (distance_cm, age_s) from the shared sampler, or None."""
+    sampler = _sampler
+    if sampler is None:
+        return None
+    return sampler.latest_distance()
@@ -0,0 +1,258 @@
+# sim_hardware.py
+# Simulated hardware for running the scanner off-device: a GPIO stand-in
+# with the subset of the RPi.GPIO API the scanner uses, plus devices wired
+# to its pins (scripted button, ultrasonic sensor following a distance
+# trace, vibration motor recorder) and a TTS sink that logs utterances.
+# Selected through hardware.py with SCANNER_HARDWARE=sim.
+
+import bisect
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from config import TTS_WPM
+
+
+class SimPWM:
+    def __init__(self, gpio: "SimGPIO", pin: int, frequency: float):
+        self.gpio = gpio
+        self.pin = pin
+        self.frequency = frequency
+        self.duty = 0.0
+
+    def start(self, duty: float):
+        self.ChangeDutyCycle(duty)
+
+    def ChangeDutyCycle(self, duty: float):
+        self.duty = float(duty)
+        self.gpio._notify_output(self.pin, self.duty / 100.0)
+
+    def ChangeFrequency(self, frequency: float):
+        self.frequency = frequency
+
+    def stop(self):
+        self.ChangeDutyCycle(0.0)
+
+
+class SimGPIO:
+    """The RPi.GPIO calls used by this project, backed by in-memory pin levels."""
+
+    BCM = 11
+    BOARD = 10
+    IN = 1
+    OUT = 0
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._levels: Dict[int, int] = {}
+        self._callbacks: Dict[int, Tuple[int, Callable[[int], None]]] = {}
+        self._output_hooks: Dict[int, List[Callable[[int, float], None]]] = {}
+
+    # -- RPi.GPIO API ----------------------------------------------------
+
+    def setwarnings(self, flag):
+        pass
+
+    def setmode(self, mode):
+        pass
+
+    def setup(self, pin, direction, pull_up_down=None, initial=None):
+        with self._lock:
+            if initial is not None:
+                self._levels[pin] = int(initial)
+            elif pin not in self._levels:
+                self._levels[pin] = self.HIGH if pull_up_down == self.PUD_UP else self.LOW
+
+    def input(self, pin) -> int:
+        return self._levels.get(pin, self.LOW)
+
+    def output(self, pin, value):
+        value = int(bool(value))
+        with self._lock:
+            self._levels[pin] = value
+        self._notify_output(pin, float(value))
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        with self._lock:
+            self._callbacks[pin] = (edge, callback)
+
+    def remove_event_detect(self, pin):
+        with self._lock:
+            self._callbacks.pop(pin, None)
+
+    def PWM(self, pin, frequency):
+        return SimPWM(self, pin, frequency)
+
+    def cleanup(self, *args):
+        with self._lock:
+            self._callbacks.clear()
+
+    # -- device side -----------------------------------------------------
+
+    def on_output(self, pin: int, hook: Callable[[int, float], None]):
+        """Call hook(pin, level 0..1) whenever the scanner drives pin (PWM duty included)."""
+        self._output_hooks.setdefault(pin, []).append(hook)
+
+    def _notify_output(self, pin: int, level: float):
+        for hook in self._output_hooks.get(pin, ()):
+            hook(pin, level)
+
+    def drive(self, pin: int, level: int):
+        """A device sets an input pin; edge callbacks fire on the caller's thread."""
+        level = int(bool(level))
+        with self._lock:
+            old = self._levels.get(pin, self.LOW)
+            self._levels[pin] = level
+            edge, callback = self._callbacks.get(pin, (None, None))
+        if callback is None or old == level:
+            return
+        if edge == self.BOTH or (edge == self.RISING and level) or (edge == self.FALLING and not level):
+            callback(pin)
+
+
+class SimButton:
+    def __init__(self, gpio: SimGPIO, pin: int):
+        self.gpio = gpio
+        self.pin = pin
+        self.presses: List[float] = []   # monotonic time of each press
+
+    def press(self, hold_s: float = 0.08, bounce: int = 0):
+        """Press and release (blocking for hold_s); bounce adds contact chatter."""
+        self.presses.append(time.monotonic())
+        for _ in range(bounce):
+            self.gpio.drive(self.pin, SimGPIO.LOW)
+            time.sleep(0.001)
+            self.gpio.drive(self.pin, SimGPIO.HIGH)
+            time.sleep(0.001)
+        self.gpio.drive(self.pin, SimGPIO.LOW)
+        time.sleep(hold_s)
+        self.gpio.drive(self.pin, SimGPIO.HIGH)
+
+
+class DistanceTrace:
+    """
+    Distance over time from (seconds, cm) keyframes, linearly interpolated
+    and repeated; a cm of None means no echo. Optional gaussian noise.
+    """
+
+    def __init__(self, keyframes: Sequence[Tuple[float, Optional[float]]], noise_cm: float = 0.0):
+        self.times = [t for t, _ in keyframes]
+        self.values = [d for _, d in keyframes]
+        self.noise_cm = noise_cm
+        self.period = self.times[-1] if self.times[-1] > 0 else 1.0
+        self.started_at = time.monotonic()
+
+    def restart(self):
+        self.started_at = time.monotonic()
+
+    def __call__(self) -> Optional[float]:
+        t = (time.monotonic() - self.started_at) % self.period
+        i = bisect.bisect_right(self.times, t) - 1
+        i = max(0, min(i, len(self.times) - 2))
+        a, b = self.values[i], self.values[i + 1]
+        if a is None or b is None:
+            return None
+        t0, t1 = self.times[i], self.times[i + 1]
+        f = (t - t0) / (t1 - t0) if t1 > t0 else 0.0
+        d = a + (b - a) * f
+        return d + random.gauss(0.0, self.noise_cm) if self.noise_cm else d
+
+
+class SimUltrasonic:
+    """HC-SR04 stand-in: a falling trigger edge produces an echo pulse of 2 * d / c."""
+
+    def __init__(self, gpio: SimGPIO, trig_pin: int, echo_pin: int, trace: Callable[[], Optional[float]]):
+        self.gpio = gpio
+        self.echo_pin = echo_pin
+        self.trace = trace
+        self.pings = 0
+        self._trig_level = 0.0
+        gpio.on_output(trig_pin, self._on_trig)
+
+    def _on_trig(self, pin: int, level: float):
+        falling = self._trig_level > 0 and level == 0
+        self._trig_level = level
+        if falling:
+            self.pings += 1
+            threading.Thread(target=self._echo, args=(self.trace(),), daemon=True).start()
+
+    def _echo(self, distance_cm: Optional[float]):
+        if distance_cm is None:
+            return
+        time.sleep(0.0005)   # the sensor's burst before the echo line rises
+        self.gpio.drive(self.echo_pin, SimGPIO.HIGH)
+        time.sleep(2.0 * distance_cm / 34300.0)
+        self.gpio.drive(self.echo_pin, SimGPIO.LOW)
+
+
+class SimMotor:
+    """Records what the scanner asks the vibration motor to do."""
+
+    def __init__(self, gpio: SimGPIO, pin: int):
+        self.log: List[Tuple[float, float]] = []   # (monotonic time, intensity 0..1)
+        gpio.on_output(pin, self._on_level)
+
+    def _on_level(self, pin: int, level: float):
+        if not self.log or self.log[-1][1] != level:
+            self.log.append((time.monotonic(), level))
+
+    def pulses_since(self, t: float) -> int:
+        count, prev = 0, 0.0
+        for ts, level in self.log:
+            if ts >= t and level > 0 and prev == 0:
+                count += 1
+            prev = level
+        return count
+
+
+@dataclass
+class SpokenUtterance:
+    text: str
+    started: float       # monotonic
+    ended: float
+    interrupted: bool
+
+
+class SpeechSink:
+    """
+    Replaces SpeechEngine: "speaks" for as long as espeak-ng would at TTS_WPM
+    (scaled by speed) and logs every utterance with its timestamps.
+    """
+
+    def __init__(self, speed: float = 1.0):
+        self.speed = speed
+        self.log: List[SpokenUtterance] = []
+        self._lock = threading.Lock()
+
+    def prerender(self, phrases):
+        pass
+
+    def duration(self, text: str) -> float:
+        words = max(1, len(text.split()))
+        return words * 60.0 / float(TTS_WPM) / self.speed
+
+    def speak(self, text: str, should_stop=None):
+        started = time.monotonic()
+        end = started + self.duration(text)
+        interrupted = False
+        while time.monotonic() < end:
+            if should_stop is not None and should_stop():
+                interrupted = True
+                break
+            time.sleep(0.01)
+        with self._lock:
+            self.log.append(SpokenUtterance(text, started, time.monotonic(), interrupted))
+
+    def utterances_since(self, t: float) -> List[SpokenUtterance]:
+        with self._lock:
+            return [u for u in self.log if u.started >= t]
@@ -0,0 +1,197 @@
+# speech_engine.py
+# Long-lived speech synthesis for tts.py: libespeak-ng loaded once through
+# ctypes renders text to PCM in-process, and a single persistent aplay
+# process plays raw PCM from memory. Fixed phrases are rendered up front.
+# PCM is written at playback speed, so speak() returns when the audio has
+# been heard and an interrupt silences it within a chunk.
+
+import ctypes
+import ctypes.util
+import shutil
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+from config import TTS_VOICE, TTS_WPM, TTS_PLAYER, TTS_PHRASE_CACHE_SIZE
+
+
+_AUDIO_OUTPUT_SYNCHRONOUS = 2
+_POS_CHARACTER = 1
+_espeakRATE = 1
+_espeakCHARS_UTF8 = 1
+_espeakENDPAUSE = 0x1000
+
+_SYNTH_CALLBACK = ctypes.CFUNCTYPE(
+    ctypes.c_int, ctypes.POINTER(ctypes.c_short), ctypes.c_int, ctypes.c_void_p
+)
+
+# Playback granularity: small enough that an interrupt takes effect quickly
+_CHUNK_S = 0.05
+# How far writes may run ahead of what is being heard. Anything more sits in
+# the pipe and ALSA buffer (~2 s of audio) where an interrupt can't reach it.
+_LEAD_S = _CHUNK_S
+
+
+class EspeakSynth:
+    """In-process libespeak-ng synthesizer producing 16-bit mono PCM."""
+
+    def __init__(self, voice: str = TTS_VOICE, wpm: str = TTS_WPM):
+        path = ctypes.util.find_library("espeak-ng") or "libespeak-ng.so.1"
+        self._lib = ctypes.CDLL(path)
+        self._lib.espeak_Initialize.restype = ctypes.c_int
+        self._lib.espeak_Initialize.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_char_p, ctypes.c_int]
+        self._lib.espeak_Synth.argtypes = [
+            ctypes.c_void_p, ctypes.c_size_t, ctypes.c_uint, ctypes.c_int,
+            ctypes.c_uint, ctypes.c_uint, ctypes.c_void_p, ctypes.c_void_p,
+        ]
+        self.sample_rate = self._lib.espeak_Initialize(_AUDIO_OUTPUT_SYNCHRONOUS, 0, None, 0)
+        if self.sample_rate <= 0:
+            raise RuntimeError("espeak_Initialize failed")
+
+        self._chunks = []
+        self._lock = threading.Lock()
+        # Keep a reference: ctypes callbacks are freed if garbage-collected
+        self._callback = _SYNTH_CALLBACK(self._on_audio)
+        self._lib.espeak_SetSynthCallback(self._callback)
+        self._lib.espeak_SetVoiceByName(voice.encode("utf-8"))
+        self._lib.espeak_SetParameter(_espeakRATE, int(wpm), 0)
+
+    def _on_audio(self, wav, numsamples, events):
+        if wav and numsamples > 0:
+            self._chunks.append(ctypes.string_at(wav, numsamples * 2))
+        return 0
+
+    def render(self, text: str) -> bytes:
+        data = text.encode("utf-8") + b"\0"
+        with self._lock:
+            self._chunks = []
+            self._lib.espeak_Synth(
+                data, len(data), 0, _POS_CHARACTER, 0,
+                _espeakCHARS_UTF8 | _espeakENDPAUSE, None, None,
+            )
+            pcm = b"".join(self._chunks)
+            self._chunks = []
+        return pcm
+
+
+class PcmPlayer:
+    """One persistent aplay process fed raw PCM on stdin, paced to real time."""
+
+    def __init__(self, sample_rate: int):
+        if shutil.which(TTS_PLAYER[0]) is None:
+            raise RuntimeError(f"{TTS_PLAYER[0]} not found")
+        self.sample_rate = sample_rate
+        self.chunk_bytes = int(sample_rate * _CHUNK_S) * 2
+        self._proc: Optional[subprocess.Popen] = None
+        # Monotonic time at which everything written so far will have been heard
+        self._heard_at = 0.0
+
+    def _ensure_proc(self):
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                list(TTS_PLAYER) + ["-r", str(self.sample_rate)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        return self._proc
+
+    @staticmethod
+    def _wait_until(t: float, should_stop: Optional[Callable[[], bool]]) -> bool:
+        """Sleep until monotonic time t; False if should_stop() fired first."""
+        while True:
+            if should_stop is not None and should_stop():
+                return False
+            remaining = t - time.monotonic()
+            if remaining <= 0:
+                return True
+            time.sleep(min(remaining, 0.01))
+
+    def _drop(self):
+        """Discard audio already handed to aplay by killing it; the next play restarts it."""
+        if self._proc is not None:
+            try:
+                self._proc.kill()
+                self._proc.wait(timeout=1)
+            except Exception:
+                pass
+            self._proc = None
+        self._heard_at = 0.0
+
+    def play(self, pcm: bytes, should_stop: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Play PCM, returning once it has been heard; returns False if
+        should_stop() cut it short, in which case buffered audio is dropped.
+        """
+        proc = self._ensure_proc()
+        bytes_per_s = 2.0 * self.sample_rate
+        view = memoryview(pcm)
+        self._heard_at = max(self._heard_at, time.monotonic())
+        for i in range(0, len(view), self.chunk_bytes):
+            if not self._wait_until(self._heard_at - _LEAD_S, should_stop):
+                self._drop()
+                return False
+            chunk = view[i:i + self.chunk_bytes]
+            try:
+                proc.stdin.write(chunk)
+                proc.stdin.flush()
+            except (BrokenPipeError, OSError):
+                self._proc = None
+                self._heard_at = 0.0
+                return False
+            self._heard_at += len(chunk) / bytes_per_s
+        if not self._wait_until(self._heard_at, should_stop):
+            self._drop()
+            return False
+        return True
+
+    def close(self):
+        if self._proc is not None:
+            try:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=2)
+            except Exception:
+                self._proc.kill()
+            self._proc = None
+
+
+class SpeechEngine:
+    """Synthesizer + player + phrase cache (pre-rendered phrases never expire)."""
+
+    def __init__(self):
+        self.synth = EspeakSynth()
+        self.player = PcmPlayer(self.synth.sample_rate)
+        self._pinned = {}
+        self._recent: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def prerender(self, phrases: Iterable[str]):
+        for text in phrases:
+            if text and text not in self._pinned:
+                self._pinned[text] = self.synth.render(text)
+
+    def pcm_for(self, text: str) -> bytes:
+        with self._lock:
+            pcm = self._pinned.get(text)
+            if pcm is None:
+                pcm = self._recent.get(text)
+                if pcm is not None:
+                    self._recent.move_to_end(text)
+            if pcm is not None:
+                self.cache_hits += 1
+                return pcm
+            self.cache_misses += 1
+
+        pcm = self.synth.render(text)
+        with self._lock:
+            self._recent[text] = pcm
+            while len(self._recent) > TTS_PHRASE_CACHE_SIZE:
+                self._recent.popitem(last=False)
+        return pcm
+
+    def speak(self, text: str, should_stop: Optional[Callable[[], bool]] = None) -> bool:
+        return self.player.play(self.pcm_for(text), should_stop)
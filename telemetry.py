@@ -0,0 +1,217 @@
+# telemetry.py
+# Per-session scan telemetry, appended to a local JSONL file (one compact
+# record per run_scan_session). The scan thread only builds a dict and
+# drops it on a queue; a background writer batches records into a single
+# append + flush every TELEMETRY_FLUSH_S. Analyse with telemetry_report.py.
+
+import json
+import os
+import threading
+import time
+from queue import Queue, Empty, Full
+from typing import Any, Dict, List, Optional
+
+from config import (
+    TELEMETRY_PATH,
+    TELEMETRY_FLUSH_S,
+    TELEMETRY_QUEUE_MAX,
+    TELEMETRY_MAX_BYTES,
+    DECODER_BACKEND,
+    DECODE_WORKERS,
+    DECODE_TRACKING,
+    FRAME_SCHEDULING,
+    CAPTURE_PROFILES_ENABLED,
+    CAMERA_WARM_STANDBY,
+    LLM_STREAMING,
+)
+
+# Bump when record fields change meaning
+SCHEMA_VERSION = 1
+
+# Outcomes
+CAPTURED = "captured"
+FAILED = "failed"       # timed out without a confirmed code
+CANCELLED = "cancelled"
+ERROR = "error"         # the session raised
+
+
+def tuning_snapshot() -> Dict[str, Any]:
+    """The settings that scan-time tuning changes touch, stored with each record."""
+    return {
+        "decoder": DECODER_BACKEND,
+        "decode_workers": DECODE_WORKERS,
+        "tracking": DECODE_TRACKING,
+        "scheduling": FRAME_SCHEDULING,
+        "capture_profiles": CAPTURE_PROFILES_ENABLED,
+        "warm_standby": CAMERA_WARM_STANDBY,
+        "llm_streaming": LLM_STREAMING,
+    }
+
+
+class SessionRecorder:
+    """
+    Collects one scan session's measurements. Times are seconds from
+    start on the monotonic clock; only started_at is wall-clock.
+    """
+
+    def __init__(self):
+        self._t0 = time.monotonic()
+        self._lock = threading.Lock()   # result speech is noted from the post-decode thread
+        self.rec: Dict[str, Any] = {
+            "v": SCHEMA_VERSION,
+            "started_at": round(time.time(), 3),
+            "outcome": None,
+            "barcode": None,
+            "frames_analyzed": 0,
+            "frames_with_barcode": 0,
+            "first_detection_s": None,
+            "decode_s": None,
+            "first_result_speech_s": None,
+            "duration_s": None,
+            "guidance": [],
+            "lookup_source": None,
+            "lookup_s": None,
+            "estimated": None,
+            "found": None,
+            "tuning": tuning_snapshot(),
+        }
+
+    def elapsed(self) -> float:
+        return round(time.monotonic() - self._t0, 4)
+
+    def frame(self, had_barcode: bool):
+        self.rec["frames_analyzed"] += 1
+        if had_barcode:
+            self.rec["frames_with_barcode"] += 1
+            if self.rec["first_detection_s"] is None:
+                self.rec["first_detection_s"] = self.elapsed()
+
+    def guidance(self, msg: str):
+        self.rec["guidance"].append([self.elapsed(), msg])
+
+    def decoded(self, barcode: str):
+        self.rec["barcode"] = barcode
+        self.rec["decode_s"] = self.elapsed()
+
+    def lookup(self, source: Optional[str], seconds: float, product: Optional[Dict[str, Any]]):
+        with self._lock:
+            self.rec["lookup_source"] = source
+            self.rec["lookup_s"] = round(seconds, 4)
+            self.rec["found"] = product is not None
+            self.rec["estimated"] = bool(product.get("estimated")) if product else None
+
+    def result_spoken(self):
+        with self._lock:
+            if self.rec["first_result_speech_s"] is None:
+                self.rec["first_result_speech_s"] = self.elapsed()
+
+    def set(self, **fields):
+        self.rec.update(fields)
+
+    def finish(self, outcome: str) -> Dict[str, Any]:
+        with self._lock:
+            self.rec["outcome"] = outcome
+            self.rec["duration_s"] = self.elapsed()
+            return dict(self.rec)
+
+
+class TelemetryStore:
+    """Append-only JSONL file fed by a background batch writer."""
+
+    def __init__(self, path: str, flush_s: float = TELEMETRY_FLUSH_S,
+                 queue_max: int = TELEMETRY_QUEUE_MAX, max_bytes: int = TELEMETRY_MAX_BYTES):
+        self.path = path
+        self.flush_s = flush_s
+        self.max_bytes = max_bytes
+        self._queue: "Queue[Optional[Dict[str, Any]]]" = Queue(maxsize=max(1, int(queue_max)))
+        self.written = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def record(self, rec: Dict[str, Any]):
+        """Never blocks: if the writer has fallen this far behind, the record is dropped."""
+        try:
+            self._queue.put_nowait(rec)
+        except Full:
+            self.dropped += 1
+
+    def _drain(self, first: Optional[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        batch = [first]
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except Empty:
+                return batch
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_s)
+            except Empty:
+                continue
+            # Let the rest of a burst arrive so it goes out in one write
+            if first is not None:
+                time.sleep(self.flush_s)
+            batch = self._drain(first)
+            records = [r for r in batch if r is not None]
+            if records:
+                self._write(records)
+            if None in batch:
+                return
+
+    def _write(self, records: List[Dict[str, Any]]):
+        lines = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+        try:
+            if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                # Keep one previous generation; the report reads both
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            self.written += len(records)
+        except OSError:
+            self.dropped += len(records)
+
+    def close(self, timeout: float = 5.0):
+        """Write whatever is queued and stop the writer."""
+        try:
+            self._queue.put(None, timeout=timeout)
+        except Full:
+            return
+        self._thread.join(timeout=timeout)
+
+
+_store: Optional[TelemetryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_telemetry_store() -> Optional[TelemetryStore]:
+    """Return the process-wide store, or None if TELEMETRY_PATH is empty."""
+    global _store
+    if not TELEMETRY_PATH:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = TelemetryStore(TELEMETRY_PATH)
+        return _store
+
+
+def read_records(path: str = TELEMETRY_PATH) -> List[Dict[str, Any]]:
+    """All records, the rotated generation first; torn or foreign lines are skipped."""
+    out = []
+    for p in (path + ".1", path):
+        try:
+            f = open(p, "r", encoding="utf-8", errors="ignore")
+        except OSError:
+            continue
+        with f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(rec, dict) and "outcome" in rec:
+                    out.append(rec)
+    return out
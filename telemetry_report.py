@@ -0,0 +1,128 @@
+# telemetry_report.py
+# Summarise the scan-session telemetry written by telemetry.py: outcome and
+# failure breakdowns, time-to-result distributions, lookup sources, and the
+# guidance that failing sessions heard. Group by a tuning setting (or by day)
+# to compare configurations.
+#
+#   python telemetry_report.py [--path telemetry.jsonl] [--since-days 7]
+#                              [--group-by decoder|scheduling|...|day] [--json]
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+from config import TELEMETRY_PATH
+from telemetry import read_records, CAPTURED, FAILED, CANCELLED, ERROR
+
+# Time-to-result stages, in session order
+STAGES = ("camera_acquire_s", "first_detection_s", "decode_s", "lookup_s", "first_result_speech_s")
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    v = sorted(values)
+    pick = lambda q: round(v[min(len(v) - 1, int(round(q * (len(v) - 1))))], 3) if v else None
+    return {"n": len(v), "p50": pick(0.5), "p90": pick(0.9), "p95": pick(0.95), "max": pick(1.0)}
+
+
+def _failure_reason(rec: Dict[str, Any]) -> str:
+    """Why a session didn't end in spoken product facts."""
+    outcome = rec.get("outcome")
+    if outcome == FAILED:
+        if rec.get("first_detection_s") is None:
+            return "barcode never seen"
+        if rec.get("rejected_reads"):
+            return "seen, reads failed validation"
+        return "seen, never confirmed"
+    if outcome == CAPTURED and rec.get("found") is False:
+        return "product unknown"
+    return outcome or "unknown"
+
+
+def _group_key(rec: Dict[str, Any], group_by: Optional[str]) -> str:
+    if not group_by:
+        return "all"
+    if group_by == "day":
+        return time.strftime("%Y-%m-%d", time.localtime(rec.get("started_at", 0)))
+    value = (rec.get("tuning") or {}).get(group_by, rec.get(group_by))
+    return f"{group_by}={value}"
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    outcomes = Counter(r.get("outcome") for r in records)
+    captured = [r for r in records if r.get("outcome") == CAPTURED]
+    failures = Counter(_failure_reason(r) for r in records
+                       if r.get("outcome") in (FAILED, ERROR) or r.get("found") is False)
+    sources = defaultdict(list)
+    for r in captured:
+        if r.get("lookup_s") is not None:
+            sources[r.get("lookup_source") or "unknown"].append(r["lookup_s"])
+    failed_guidance = Counter(msg for r in records if r.get("outcome") == FAILED
+                              for _, msg in r.get("guidance") or [])
+    return {
+        "sessions": len(records),
+        "outcomes": {k: outcomes.get(k, 0) for k in (CAPTURED, FAILED, CANCELLED, ERROR)},
+        "success_rate": round(len(captured) / len(records), 3) if records else None,
+        "failures": dict(failures.most_common()),
+        "time_to_result_s": {
+            stage: _percentiles([r[stage] for r in captured if r.get(stage) is not None])
+            for stage in STAGES
+        },
+        "frames_analyzed": _percentiles([r["frames_analyzed"] for r in captured if "frames_analyzed" in r]),
+        "lookup_sources": {src: _percentiles(v) for src, v in sorted(sources.items())},
+        "estimated_rate": (round(sum(1 for r in captured if r.get("estimated")) / len(captured), 3)
+                           if captured else None),
+        "guidance_in_failed_sessions": dict(failed_guidance.most_common(5)),
+    }
+
+
+def _print_summary(name: str, s: Dict[str, Any]):
+    fmt = lambda p: (f"p50 {p['p50']:.2f}s  p90 {p['p90']:.2f}s  max {p['max']:.2f}s  (n={p['n']})"
+                     if p["n"] else "-")
+    print(f"== {name}: {s['sessions']} sessions, success {s['success_rate']}")
+    print("   outcomes: " + ", ".join(f"{k} {v}" for k, v in s["outcomes"].items()))
+    for reason, n in s["failures"].items():
+        print(f"   failure: {reason}: {n}")
+    for stage, p in s["time_to_result_s"].items():
+        print(f"   {stage:<22} {fmt(p)}")
+    for src, p in s["lookup_sources"].items():
+        print(f"   lookup via {src:<11} {fmt(p)}")
+    if s["estimated_rate"] is not None:
+        print(f"   nutrition estimated in {100 * s['estimated_rate']:.0f}% of captured scans")
+    for msg, n in s["guidance_in_failed_sessions"].items():
+        print(f"   heard when failing ({n}x): {msg}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Report on recorded scan sessions.")
+    ap.add_argument("--path", default=TELEMETRY_PATH, help="telemetry JSONL (rotated .1 is read too)")
+    ap.add_argument("--since-days", type=float, help="only sessions from the last N days")
+    ap.add_argument("--group-by", help="tuning key (decoder, scheduling, decode_workers, ...) or 'day'")
+    ap.add_argument("--json", action="store_true", help="print JSON instead of text")
+    args = ap.parse_args(argv)
+
+    records = read_records(args.path)
+    if args.since_days is not None:
+        cutoff = time.time() - args.since_days * 86400
+        records = [r for r in records if r.get("started_at", 0) >= cutoff]
+    if not records:
+        print(f"No sessions recorded in {args.path}.", file=sys.stderr)
+        return 1
+
+    groups = defaultdict(list)
+    for r in records:
+        groups[_group_key(r, args.group_by)].append(r)
+    report = {name: summarize(recs) for name, recs in sorted(groups.items())}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for name, s in report.items():
+            _print_summary(name, s)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+# tests/test_barcode_tracker.py
+# Check-digit validation and canonical keys used by BarcodeTracker.
+
+import pytest
+
+from barcode_tracker import gs1_check_digit_ok, expand_upce, canonical_code
+
+
+@pytest.mark.parametrize("digits", ["4006381333931", "036000291452", "96385074", "00036000291452"])
+def test_check_digit_accepts_valid_codes(digits):
+    assert gs1_check_digit_ok(digits)
+
+
+@pytest.mark.parametrize("digits", ["4006381333932", "036000291453", "96385075", "", "7", "40063813a3931"])
+def test_check_digit_rejects_bad_codes(digits):
+    assert not gs1_check_digit_ok(digits)
+
+
+@pytest.mark.parametrize("upce, upca", [
+    ("04252614", "042100005264"),   # last digit 0-2: manufacturer code ends in 00000 + digit
+    ("01234133", "012300000413"),   # last digit 3
+    ("01234146", "012340000016"),   # last digit 4
+    ("06543257", "065432000057"),   # last digit 5-9: item code is that digit
+])
+def test_expand_upce(upce, upca):
+    assert expand_upce(upce) == upca
+
+
+@pytest.mark.parametrize("code", ["4252614", "24252614", "0425261a"])
+def test_expand_upce_rejects_non_upce(code):
+    assert expand_upce(code) is None
+
+
+def test_canonical_code_folds_upc_forms_onto_ean13():
+    assert canonical_code("036000291452") == "0036000291452"
+    assert canonical_code("00036000291452") == "0036000291452"
+    assert canonical_code("04252614", "UPCE") == "0042100005264"
+    assert canonical_code("042100005264") == canonical_code("04252614", "UPCE")
+
+
+def test_canonical_code_keeps_ean8_and_ean13():
+    assert canonical_code("96385074", "EAN8") == "96385074"
+    assert canonical_code(" 4006381333931 ") == "4006381333931"
+
+
+def test_canonical_code_rejects_misreads():
+    assert canonical_code("4006381333932") is None
+    assert canonical_code("12345") is None
+    assert canonical_code(None) is None
+    assert canonical_code("10036000291452") is None   # GTIN-14 with a packaging indicator
@@ -0,0 +1,104 @@
+# tests/test_http_transport.py
+# PooledHttpClient against a local stand-in for OpenFoodFacts.
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_transport import PooledHttpClient, TransportError, CircuitOpenError
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits += 1
+            hit = server.hits
+        delay = server.delays.get(hit, server.delay)
+        if delay:
+            time.sleep(delay)
+        body = f"hit {hit}".encode()
+        self.send_response(server.status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.daemon_threads = True
+    srv.lock = threading.Lock()
+    srv.hits = 0
+    srv.status = 200
+    srv.delay = 0.0
+    srv.delays = {}      # request number -> delay for that request only
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    srv.url = f"http://127.0.0.1:{srv.server_address[1]}/api/v2/product/4006381333931.json"
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_connections_are_reused(server):
+    client = PooledHttpClient(hedge_after_s=None)
+    assert client.get(server.url, budget_s=2.0) == (200, b"hit 1")
+    assert client.get(server.url, budget_s=2.0) == (200, b"hit 2")
+    assert client.stats["connections_opened"] == 1
+    client.close()
+
+
+def test_slow_first_attempt_is_hedged(server):
+    server.delays = {1: 1.5}
+    client = PooledHttpClient(hedge_after_s=0.1)
+    t0 = time.monotonic()
+    status, body = client.get(server.url, budget_s=3.0)
+    assert (status, body) == (200, b"hit 2")
+    assert time.monotonic() - t0 < 1.0
+    assert client.stats["hedged"] == 1 and client.stats["hedge_wins"] == 1
+    client.close()
+
+
+def test_budget_bounds_a_slow_server(server):
+    server.delay = 1.0
+    client = PooledHttpClient(hedge_after_s=None)
+    t0 = time.monotonic()
+    with pytest.raises(TransportError):
+        client.get(server.url, budget_s=0.3)
+    assert time.monotonic() - t0 < 0.8
+    client.close()
+
+
+def test_breaker_opens_after_failures_and_recovers(server):
+    server.status = 503
+    client = PooledHttpClient(hedge_after_s=None, failure_threshold=2, backoff_s=0.3)
+    for _ in range(2):
+        with pytest.raises(TransportError):
+            client.get(server.url, budget_s=1.0)
+    assert client.circuit_open
+
+    hits = server.hits
+    with pytest.raises(CircuitOpenError):
+        client.get(server.url, budget_s=1.0)
+    assert server.hits == hits and client.stats["short_circuited"] == 1
+
+    server.status = 200
+    time.sleep(0.35)
+    assert client.get(server.url, budget_s=1.0)[0] == 200
+    assert not client.circuit_open
+    client.close()
+
+
+def test_client_errors_are_answers_not_failures(server):
+    server.status = 404
+    client = PooledHttpClient(hedge_after_s=None, failure_threshold=1)
+    assert client.get(server.url, budget_s=1.0)[0] == 404
+    assert not client.circuit_open
+    client.close()
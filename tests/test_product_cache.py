@@ -0,0 +1,74 @@
+# tests/test_product_cache.py
+# ProductCache: hits and misses, TTL expiry, negative entries and LRU eviction.
+
+import pytest
+
+import product_cache
+from product_cache import ProductCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = FakeClock()
+    monkeypatch.setattr(product_cache.time, "time", c)
+    return c
+
+
+def make_cache(tmp_path, max_entries=10, ttl_s=100.0, negative_ttl_s=10.0):
+    return ProductCache(str(tmp_path / "products.sqlite3"), max_entries, ttl_s, negative_ttl_s)
+
+
+def test_hit_and_miss_counters(tmp_path, clock):
+    cache = make_cache(tmp_path)
+    assert cache.get("4006381333931") == (False, None)
+    cache.put("4006381333931", {"name": "Pencil", "estimated": False})
+    assert cache.get("4006381333931") == (True, {"name": "Pencil", "estimated": False})
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_entries_expire_after_ttl_but_serve_stale(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl_s=100.0)
+    cache.put("4006381333931", {"name": "Pencil"})
+    clock.now += 101
+    assert cache.get("4006381333931") == (False, None)
+    assert cache.get("4006381333931", allow_stale=True) == (True, {"name": "Pencil"})
+    assert cache.peek("4006381333931") == {"name": "Pencil"}
+
+
+def test_negative_entries_use_the_shorter_ttl(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl_s=100.0, negative_ttl_s=10.0)
+    cache.put("2000000000008", None)
+    assert cache.get("2000000000008") == (True, None)
+    assert cache.peek("2000000000008") is None
+    clock.now += 11
+    assert cache.get("2000000000008") == (False, None)
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path, clock):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.put("a", {"n": 1})
+    clock.now += 1
+    cache.put("b", {"n": 2})
+    clock.now += 1
+    assert cache.get("a")[0]        # touch a, so b is now least recently used
+    clock.now += 1
+    cache.put("c", {"n": 3})
+    assert cache.get("b") == (False, None)
+    assert cache.get("a")[0] and cache.get("c")[0]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_reopen_keeps_entries(tmp_path, clock):
+    cache = make_cache(tmp_path)
+    cache.put("4006381333931", {"name": "Pencil"})
+    cache.close()
+    assert make_cache(tmp_path).get("4006381333931") == (True, {"name": "Pencil"})
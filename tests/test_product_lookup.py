@@ -0,0 +1,54 @@
+# tests/test_product_lookup.py
+# lookup_product against a temporary cache, with OFF and the AI stubbed out.
+
+import pytest
+
+import product_lookup
+from product_cache import ProductCache
+
+
+@pytest.fixture
+def lookup_env(tmp_path, monkeypatch):
+    cache = ProductCache(str(tmp_path / "products.sqlite3"), 100, 3600, 600)
+    ai_calls = []
+
+    def fake_estimate(name, brand, cats):
+        ai_calls.append((name, brand, list(cats)))
+        return {"nutriments": {"energy-kcal_100g": 250}, "serving_size": "100 g"}
+
+    monkeypatch.setattr(product_lookup, "get_product_cache", lambda: cache)
+    monkeypatch.setattr(product_lookup, "get_offline_index", lambda: None)
+    monkeypatch.setattr(product_lookup, "get_category_table", lambda: None)
+    monkeypatch.setattr(product_lookup, "_estimate_nutrition_with_ai", fake_estimate)
+    yield cache, ai_calls
+    cache.close()
+
+
+def test_unknown_barcode_answers_the_same_on_repeat_scans(lookup_env, monkeypatch):
+    cache, ai_calls = lookup_env
+    fetches = []
+
+    def off_404(barcode):
+        fetches.append(barcode)
+        return {}, True
+
+    monkeypatch.setattr(product_lookup, "_fetch_off_product", off_404)
+
+    first = product_lookup.lookup_product("4006381333931")
+    second = product_lookup.lookup_product("4006381333931")
+
+    assert first is not None and first["estimated"]
+    assert second == first
+    assert product_lookup.last_lookup_source() == "cache"
+    assert len(fetches) == 1
+    assert len(ai_calls) == 1
+
+
+def test_unknown_barcode_without_estimate_is_cached_as_negative(lookup_env, monkeypatch):
+    cache, _ = lookup_env
+    monkeypatch.setattr(product_lookup, "_fetch_off_product", lambda barcode: ({}, True))
+    monkeypatch.setattr(product_lookup, "_estimate_nutrition_with_ai", lambda **kw: None)
+
+    assert product_lookup.lookup_product("4006381333931") is None
+    assert cache.get("4006381333931") == (True, None)
+    assert product_lookup.lookup_product("4006381333931") is None
@@ -1,39 +1,152 @@
 # tts.py
 # Simple wrapper around espeak-ng for TTS on Raspberry Pi.
+# With TTS_BACKEND = "persistent" a single in-process synthesizer and audio
+# player stay up (see speech_engine.py); otherwise each utterance runs espeak-ng.
+#
+# Messages are scheduled by class rather than FIFO: only the newest guidance
+# message is kept and it expires if it can't be spoken promptly, and a
+# higher-class message interrupts whatever is being said.
 
+import heapq
+import itertools
 import subprocess
 import threading
-from queue import Queue, Empty
-from config import TTS_ENGINE, TTS_WPM, TTS_VOICE
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+from config import TTS_ENGINE, TTS_WPM, TTS_VOICE, TTS_BACKEND, TTS_GUIDANCE_TTL_S
+import metrics
 
-_queue: "Queue[str]" = Queue()
+# Message classes, lowest priority first
+GUIDANCE = 0
+RESULT = 1
+CONFIRMATION = 2
+_KIND_NAMES = {GUIDANCE: "guidance", RESULT: "result", CONFIRMATION: "confirmation"}
+
+
+@dataclass
+class _Utterance:
+    text: str
+    kind: int
+    enqueued_at: float
+    deadline: Optional[float]
+    on_start: Optional[Callable[[], None]] = None
+
+
+_heap = []
+_order = itertools.count()
+_cond = threading.Condition()
+_current: Optional[_Utterance] = None
+_interrupt = False
 _worker_started = False
 _lock = threading.Lock()
 
+_engine = None
+_engine_tried = False
+
+_latencies = deque(maxlen=200)
+_counts = {"spoken": 0, "expired": 0, "coalesced": 0, "interrupted": 0}
+
+
+def _get_engine():
+    """Return the shared SpeechEngine, or None to fall back to the espeak-ng CLI."""
+    global _engine, _engine_tried
+    with _lock:
+        if not _engine_tried:
+            _engine_tried = True
+            from hardware import speech_sink
+            _engine = speech_sink()
+            if _engine is None and TTS_BACKEND == "persistent":
+                try:
+                    from speech_engine import SpeechEngine
+                    _engine = SpeechEngine()
+                except Exception:
+                    _engine = None
+        return _engine
+
+
+def prerender_phrases(phrases: Iterable[str]):
+    """Render fixed phrases to PCM up front so they play with no synthesis delay."""
+    engine = _get_engine()
+    if engine is not None:
+        try:
+            engine.prerender(phrases)
+        except Exception:
+            pass
+
+
+def _interrupted() -> bool:
+    return _interrupt
+
+
+def _say(text: str):
+    engine = _get_engine()
+    if engine is not None:
+        engine.speak(text, should_stop=_interrupted)
+        return
+    # Use espeak-ng directly
+    proc = subprocess.Popen(
+        [
+            TTS_ENGINE,
+            "-s",
+            TTS_WPM,
+            "-v",
+            TTS_VOICE,
+            text,
+        ]
+    )
+    while proc.poll() is None:
+        if _interrupt:
+            proc.terminate()
+            break
+        time.sleep(0.02)
+    proc.wait()
+
+
+def _next_utterance() -> _Utterance:
+    global _current, _interrupt
+    with _cond:
+        while True:
+            while not _heap:
+                _cond.wait()
+            _, _, utt = heapq.heappop(_heap)
+            if utt.deadline is not None and time.monotonic() > utt.deadline:
+                _counts["expired"] += 1
+                metrics.count("tts.expired")
+                continue
+            _current = utt
+            _interrupt = False
+            return utt
+
 
 def _tts_worker():
+    global _current
     while True:
-        text = _queue.get()
-        if text is None:
-            break
+        utt = _next_utterance()
+        wait = time.monotonic() - utt.enqueued_at
+        _latencies.append(wait)
+        metrics.observe(f"tts.queue_wait.{_KIND_NAMES.get(utt.kind, utt.kind)}", wait)
+        if utt.on_start is not None:
+            try:
+                utt.on_start()
+            except Exception:
+                pass
         try:
-            # Use espeak-ng directly
-            subprocess.run(
-                [
-                    TTS_ENGINE,
-                    "-s",
-                    TTS_WPM,
-                    "-v",
-                    TTS_VOICE,
-                    text,
-                ],
-                check=False,
-            )
+            with metrics.span("tts.say"):
+                _say(utt.text)
         except Exception:
             # Fail silently; this is best-effort
             pass
         finally:
-            _queue.task_done()
+            with _cond:
+                if _interrupt:
+                    _counts["interrupted"] += 1
+                    metrics.count("tts.interrupted")
+                else:
+                    _counts["spoken"] += 1
+                    metrics.count("tts.spoken")
+                _current = None
 
 
 def _ensure_worker():
@@ -45,9 +158,54 @@ def _ensure_worker():
             _worker_started = True
 
 
-def speak(text: str):
-    """Enqueue text to be spoken asynchronously."""
+def speak(text: str, kind: int = RESULT, ttl: Optional[float] = None,
+          on_start: Optional[Callable[[], None]] = None):
+    """
+    Enqueue text to be spoken asynchronously. Guidance replaces any pending
+    guidance and is dropped if not started within ttl (default
+    TTS_GUIDANCE_TTL_S); other classes never expire unless ttl is given.
+    A confirmation makes pending guidance obsolete and discards it.
+    on_start is called from the speech worker just before the text is spoken;
+    it is not called if the message expires first.
+    """
+    global _interrupt
     if not text:
         return
     _ensure_worker()
-    _queue.put(str(text))
+    now = time.monotonic()
+    if ttl is None and kind == GUIDANCE:
+        ttl = TTS_GUIDANCE_TTL_S
+    utt = _Utterance(str(text), kind, now, now + ttl if ttl is not None else None, on_start)
+
+    with _cond:
+        if kind in (GUIDANCE, CONFIRMATION):
+            kept = [e for e in _heap if e[2].kind != GUIDANCE]
+            if len(kept) != len(_heap):
+                _counts["coalesced"] += len(_heap) - len(kept)
+                metrics.count("tts.coalesced", len(_heap) - len(kept))
+                _heap[:] = kept
+                heapq.heapify(_heap)
+        heapq.heappush(_heap, (-kind, next(_order), utt))
+        metrics.gauge("tts.queue_depth", len(_heap))
+        if _current is not None and _current.kind < kind:
+            _interrupt = True
+        _cond.notify()
+
+
+def speak_guidance(text: str):
+    """speak() for guidance prompts; fits maybe_say's speak_func signature."""
+    speak(text, kind=GUIDANCE)
+
+
+def tts_metrics() -> dict:
+    """Queue depth, outcome counters, and enqueue-to-speech latency (ms)."""
+    with _cond:
+        depth = len(_heap)
+        counts = dict(_counts)
+    lat = sorted(_latencies)
+    if lat:
+        counts["latency_p50_ms"] = 1000.0 * lat[len(lat) // 2]
+        counts["latency_p95_ms"] = 1000.0 * lat[min(len(lat) - 1, int(len(lat) * 0.95))]
+        counts["latency_max_ms"] = 1000.0 * lat[-1]
+    counts["queue_depth"] = depth
+    return counts